@@ -0,0 +1,20 @@
+# Generated by Django 4.2.11 on 2026-10-17 18:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biodiversity', '0016_recordchange'),
+        ('ai', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='identificationfeedback',
+            name='biodiversity_record',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='identification_feedback', to='biodiversity.biodiversityrecord'),
+        ),
+    ]
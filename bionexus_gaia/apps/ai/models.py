@@ -31,9 +31,11 @@ class IdentificationFeedback(models.Model):
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='identification_feedback')
+    # No database constraint: records are partitioned, so their id alone is not unique-indexed
     biodiversity_record = models.ForeignKey(
         'biodiversity.BiodiversityRecord',
         on_delete=models.CASCADE,
+        db_constraint=False,
         related_name='identification_feedback'
     )
     ai_model = models.ForeignKey(AIModel, on_delete=models.CASCADE, related_name='feedback')
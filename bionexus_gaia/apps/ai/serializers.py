@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from bionexus_gaia.apps.biodiversity.serializers import MediaUploadField
 from .models import AIModel, IdentificationFeedback
 
 class AIModelSerializer(serializers.ModelSerializer):
@@ -42,6 +43,10 @@ class IdentificationSerializer(serializers.Serializer):
     image = serializers.ImageField(required=False)
     audio = serializers.FileField(required=False)
     video = serializers.FileField(required=False)
+    # Media sent earlier through the biodiversity uploads API
+    image_upload = MediaUploadField(kind='image')
+    audio_upload = MediaUploadField(kind='audio')
+    video_upload = MediaUploadField(kind='video')
     latitude = serializers.FloatField(required=False)
     longitude = serializers.FloatField(required=False)
     observation_date = serializers.DateTimeField(required=False)
@@ -50,7 +55,8 @@ class IdentificationSerializer(serializers.Serializer):
         """
         Validate that at least one media file is provided.
         """
-        if not any(key in data for key in ['image', 'audio', 'video']):
+        media_fields = ['image', 'audio', 'video', 'image_upload', 'audio_upload', 'video_upload']
+        if not any(key in data for key in media_fields):
             raise serializers.ValidationError(
                 "At least one media file (image, audio, or video) must be provided."
             )
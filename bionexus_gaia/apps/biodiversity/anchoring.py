@@ -0,0 +1,335 @@
+"""
+Merkle-batched anchoring of biodiversity records on a ledger.
+
+Records waiting to be validated are collected into a batch. Each record is
+reduced to a canonical JSON encoding and hashed into a leaf, the leaves are
+combined into a Merkle tree, and only the root is written to the ledger
+through the configured backend (``ANCHOR_BACKEND``). Every record keeps its
+inclusion proof, so it can later be checked against the stored root without
+contacting the ledger. A batch is claimed and committed before its root is
+written, so no ledger write happens inside a database transaction.
+
+Hashing follows RFC 6962: leaves and interior nodes are prefixed with
+different bytes, and a node without a sibling is promoted unchanged.
+"""
+import hashlib
+import json
+import threading
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import AnchorBatch, BiodiversityRecord, RecordAnchor
+from .signals import records_updated, records_verified
+
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+# Record fields covered by the canonical hash, besides the coordinates
+CANONICAL_FIELDS = (
+    'species_name', 'common_name', 'location_name', 'notes', 'is_public',
+    'image', 'audio', 'video',
+)
+
+
+def canonical_record_bytes(record):
+    """
+    Encode the anchored content of a record deterministically.
+    """
+    observation_date = BiodiversityRecord._meta.get_field('observation_date').to_python(record.observation_date)
+    if timezone.is_naive(observation_date):
+        observation_date = timezone.make_aware(observation_date)
+    data = {
+        'id': str(record.id),
+        'contributor': str(record.contributor_id),
+        'observation_date': observation_date.astimezone(dt_timezone.utc).isoformat(),
+        'longitude': f'{record.location.x:.7f}' if record.location else None,
+        'latitude': f'{record.location.y:.7f}' if record.location else None,
+    }
+    for field in CANONICAL_FIELDS:
+        value = getattr(record, field)
+        if field in ('image', 'audio', 'video'):
+            value = value.name if value else ''
+        data[field] = value
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def leaf_hash(data):
+    return hashlib.sha256(LEAF_PREFIX + data).hexdigest()
+
+
+def node_hash(left, right):
+    return hashlib.sha256(NODE_PREFIX + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def record_hash(record):
+    return leaf_hash(canonical_record_bytes(record))
+
+
+class MerkleTree:
+    """
+    Merkle tree over a list of hex leaf hashes.
+    """
+
+    def __init__(self, leaves):
+        if not leaves:
+            raise ValueError('A Merkle tree needs at least one leaf.')
+        self.levels = [list(leaves)]
+        while len(self.levels[-1]) > 1:
+            level = self.levels[-1]
+            parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+            if len(level) % 2:
+                parents.append(level[-1])
+            self.levels.append(parents)
+
+    @property
+    def root(self):
+        return self.levels[-1][0]
+
+    def proof(self, index):
+        """
+        Return the inclusion proof for leaf ``index`` as a list of
+        ``{'side': 'left' | 'right', 'hash': ...}`` steps from the leaf up.
+        """
+        steps = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                steps.append({
+                    'side': 'left' if sibling < index else 'right',
+                    'hash': level[sibling],
+                })
+            index //= 2
+        return steps
+
+
+def verify_proof(leaf, proof, root):
+    """
+    Check that ``leaf`` is included under ``root`` according to ``proof``.
+    """
+    current = leaf
+    for step in proof:
+        if step['side'] == 'left':
+            current = node_hash(step['hash'], current)
+        else:
+            current = node_hash(current, step['hash'])
+    return current == root
+
+
+class AnchorBackend:
+    """
+    Writes Merkle roots to a ledger. Subclasses implement ``anchor``.
+    """
+    name = 'base'
+
+    def anchor(self, root):
+        """
+        Record ``root`` (hex) on the ledger and return the transaction hash.
+        """
+        raise NotImplementedError
+
+
+class LocalChainBackend(AnchorBackend):
+    """
+    In-process hash chain standing in for a ledger in development and tests.
+
+    Each anchored root becomes a block whose hash covers the previous block,
+    so the chain is tamper-evident but lives only as long as the process.
+    """
+    name = 'local'
+
+    def __init__(self):
+        self.blocks = []
+        self._lock = threading.Lock()
+
+    def anchor(self, root):
+        with self._lock:
+            previous = self.blocks[-1]['tx_hash'] if self.blocks else '0x' + '0' * 64
+            tx_hash = '0x' + hashlib.sha256(f'{previous}:{root}'.encode('ascii')).hexdigest()
+            self.blocks.append({'tx_hash': tx_hash, 'previous': previous, 'root': root})
+            return tx_hash
+
+    def get_root(self, tx_hash):
+        for block in self.blocks:
+            if block['tx_hash'] == tx_hash:
+                return block['root']
+        return None
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_anchor_backend():
+    """
+    Return the process-wide instance of the ``ANCHOR_BACKEND`` class.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            path = getattr(
+                settings, 'ANCHOR_BACKEND',
+                'bionexus_gaia.apps.biodiversity.anchoring.LocalChainBackend'
+            )
+            _backend = import_string(path)()
+        return _backend
+
+
+def anchor_batch_size():
+    return getattr(settings, 'ANCHOR_BATCH_SIZE', 4096)
+
+
+def request_anchor(record):
+    """
+    Queue ``record`` for the next batch unless it is already queued or anchored.
+    """
+    RecordAnchor.objects.get_or_create(record=record)
+
+
+def anchor_claim_timeout():
+    return timedelta(seconds=getattr(settings, 'ANCHOR_CLAIM_TIMEOUT', 300))
+
+
+def claim_batch(batch_size=None):
+    """
+    Claim up to ``batch_size`` queued records as a new AnchorBatch and return
+    it, or None when nothing is queued.
+
+    Queued rows are claimed with SKIP LOCKED, so concurrent callers build
+    separate batches instead of waiting for each other. A batch left claimed
+    for longer than ``ANCHOR_CLAIM_TIMEOUT`` by a worker that died is taken
+    over first.
+    """
+    batch_size = batch_size or anchor_batch_size()
+    now = timezone.now()
+    with transaction.atomic():
+        stale = (
+            AnchorBatch.objects.filter(status=AnchorBatch.CLAIMED, claimed_at__lt=now - anchor_claim_timeout())
+            .select_for_update(skip_locked=True)
+            .order_by('claimed_at')
+            .first()
+        )
+        if stale is not None:
+            stale.claimed_at = now
+            stale.save(update_fields=['claimed_at'])
+            return stale
+
+        pending = list(
+            RecordAnchor.objects.filter(batch__isnull=True)
+            .select_for_update(skip_locked=True)
+            .order_by('requested_at')[:batch_size]
+        )
+        if not pending:
+            return None
+
+        records = BiodiversityRecord.objects.in_bulk([anchor.record_id for anchor in pending])
+        leaves = [record_hash(records[anchor.record_id]) for anchor in pending]
+        tree = MerkleTree(leaves)
+        batch = AnchorBatch.objects.create(
+            merkle_root=tree.root,
+            backend=get_anchor_backend().name,
+            record_count=len(pending),
+            claimed_at=now,
+        )
+        for index, anchor in enumerate(pending):
+            anchor.batch = batch
+            anchor.leaf_index = index
+            anchor.leaf_hash = leaves[index]
+            anchor.proof = tree.proof(index)
+        RecordAnchor.objects.bulk_update(pending, ['batch', 'leaf_index', 'leaf_hash', 'proof'])
+    return batch
+
+
+def anchor_batch(batch):
+    """
+    Write a claimed batch's root to the ledger, then mark the batch anchored
+    and its records verified.
+
+    The claim is committed before the ledger is contacted, so a root is never
+    on the ledger for a batch the database does not know about.
+    """
+    backend = get_anchor_backend()
+    tx_hash = backend.anchor(batch.merkle_root)
+    now = timezone.now()
+    with transaction.atomic():
+        batch = AnchorBatch.objects.select_for_update().get(pk=batch.pk)
+        # A worker that took over the batch may have finished it already
+        if batch.status == AnchorBatch.ANCHORED:
+            return batch
+        batch.status = AnchorBatch.ANCHORED
+        batch.tx_hash = tx_hash
+        batch.backend = backend.name
+        batch.anchored_at = now
+        batch.save(update_fields=['status', 'tx_hash', 'backend', 'anchored_at'])
+
+        anchors = RecordAnchor.objects.filter(batch=batch)
+        records = BiodiversityRecord.objects.in_bulk(list(anchors.values_list('record_id', flat=True)))
+        anchors.update(anchored_at=now)
+
+        # Targeted update instead of save(); derived data is told via signals
+        BiodiversityRecord.objects.filter(pk__in=records).update(
+            blockchain_hash=tx_hash,
+            is_verified=True,
+            updated_at=now,
+        )
+        verified = [record for record in records.values() if not record.is_verified]
+        for record in records.values():
+            record.blockchain_hash = tx_hash
+            record.is_verified = True
+            record.updated_at = now
+        records_updated.send(sender=BiodiversityRecord, records=list(records.values()))
+        if verified:
+            records_verified.send(sender=BiodiversityRecord, records=verified)
+    return batch
+
+
+def release_batch(batch):
+    """
+    Return the records of a batch that could not be anchored to the queue.
+    """
+    with transaction.atomic():
+        if not AnchorBatch.objects.select_for_update().filter(pk=batch.pk, status=AnchorBatch.CLAIMED).exists():
+            return
+        RecordAnchor.objects.filter(batch=batch).update(batch=None, leaf_index=None, leaf_hash='', proof=[])
+        AnchorBatch.objects.filter(pk=batch.pk).delete()
+
+
+def anchor_pending_records(batch_size=None):
+    """
+    Anchor one batch of queued records and return its AnchorBatch, or None
+    when nothing is queued. If the ledger write fails the records are
+    queued again and the error is raised.
+    """
+    batch = claim_batch(batch_size)
+    if batch is None:
+        return None
+    try:
+        return anchor_batch(batch)
+    except Exception:
+        release_batch(batch)
+        raise
+
+
+def proof_for(anchor, record):
+    """
+    Describe ``record``'s inclusion proof and whether it still holds.
+    """
+    current = record_hash(record)
+    included = verify_proof(anchor.leaf_hash, anchor.proof, anchor.batch.merkle_root)
+    return {
+        'record_id': str(record.id),
+        'leaf_hash': anchor.leaf_hash,
+        'current_hash': current,
+        'leaf_index': anchor.leaf_index,
+        'proof': anchor.proof,
+        'merkle_root': anchor.batch.merkle_root,
+        'tx_hash': anchor.batch.tx_hash,
+        'backend': anchor.batch.backend,
+        'anchored_at': anchor.anchored_at,
+        'included': included,
+        'unchanged': current == anchor.leaf_hash,
+        'valid': included and current == anchor.leaf_hash,
+    }
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class BiodiversityConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bionexus_gaia.apps.biodiversity'
+
+    def ready(self):
+        from . import signals  # noqa: F401
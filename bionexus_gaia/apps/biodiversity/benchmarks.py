@@ -0,0 +1,156 @@
+"""
+Helpers shared by the ``benchmark_*`` management commands.
+
+Benchmarks seed synthetic records inside a transaction that is rolled back at
+the end (unless ``--keep`` is given), so they can be run against any database
+without leaving data behind.
+"""
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from .models import BiodiversityRecord
+
+User = get_user_model()
+
+GENERA = [
+    'Accipiter', 'Buteo', 'Falco', 'Panthera', 'Quercus', 'Papilio', 'Bufo',
+    'Corvus', 'Turdus', 'Acacia', 'Ficus', 'Loxodonta', 'Giraffa', 'Equus',
+    'Crocodylus', 'Python', 'Haliaeetus', 'Ardea', 'Ceryle', 'Lanius',
+]
+EPITHETS = [
+    'cooperii', 'jamaicensis', 'peregrinus', 'leo', 'rubra', 'machaon', 'bufo',
+    'corax', 'merula', 'tortilis', 'sycomorus', 'africana', 'camelopardalis',
+    'quagga', 'niloticus', 'sebae', 'vocifer', 'cinerea', 'rudis', 'collaris',
+]
+PLACES = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Malindi', 'Lamu', 'Naivasha']
+
+START_DATE = datetime(2015, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class _Rollback(Exception):
+    pass
+
+
+def synthetic_species(rng):
+    return f'{rng.choice(GENERA)} {rng.choice(EPITHETS)}'
+
+
+def seed_records(count, contributor, batch_size=5000, seed=42, stdout=None):
+    """
+    Insert ``count`` synthetic public records with ``bulk_create``.
+    """
+    rng = random.Random(seed)
+    created = 0
+    while created < count:
+        batch = []
+        for _ in range(min(batch_size, count - created)):
+            species_name = synthetic_species(rng)
+            batch.append(BiodiversityRecord(
+                id=uuid.uuid4(),
+                contributor=contributor,
+                species_name=species_name,
+                common_name=species_name.split()[0],
+                location=Point(rng.uniform(-180, 180), rng.uniform(-85, 85), srid=4326),
+                location_name=f'{rng.choice(PLACES)} field site',
+                observation_date=START_DATE + timedelta(minutes=rng.randrange(10 * 365 * 24 * 60)),
+                notes='Synthetic benchmark observation',
+                is_public=rng.random() < 0.9,
+                is_verified=rng.random() < 0.3,
+                ai_prediction={'species': species_name, 'confidence': round(rng.random(), 3)},
+                ai_confidence=rng.random(),
+            ))
+        BiodiversityRecord.objects.bulk_create(batch)
+        created += len(batch)
+        if stdout is not None:
+            stdout.write(f'  seeded {created}/{count} records')
+    return created
+
+
+def analyze():
+    """
+    Refresh planner statistics for the records table.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'ANALYZE {connection.ops.quote_name(BiodiversityRecord._meta.db_table)}')
+
+
+def best_time(func, repeat=5):
+    """
+    Return the fastest of ``repeat`` runs of ``func`` in milliseconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+def uses_index(plan):
+    return 'Index Scan' in plan or 'Index Only Scan' in plan or 'Bitmap Index Scan' in plan
+
+
+class BenchmarkCommand(BaseCommand):
+    """
+    Base class for benchmark commands.
+
+    Subclasses implement ``run_benchmark(options)``; seeding and rollback are
+    handled here.
+    """
+    default_rows = 100000
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=self.default_rows,
+            help=f'Number of synthetic records to seed (default: {self.default_rows}).'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Number of timed runs per query; the best is reported (default: 5).'
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Commit the seeded records instead of rolling them back.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                contributor, _ = User.objects.get_or_create(
+                    username='benchmark',
+                    defaults={'email': 'benchmark@bionexusgaia.com'}
+                )
+                self.stdout.write(f"Seeding {options['rows']} records...")
+                seed_records(options['rows'], contributor, stdout=self.stdout)
+                analyze()
+                self.run_benchmark(options)
+                if not options['keep']:
+                    raise _Rollback
+        except _Rollback:
+            self.stdout.write('Rolled back seeded records.')
+
+    def run_benchmark(self, options):
+        raise NotImplementedError
+
+    def report(self, label, queryset, repeat):
+        """
+        Time ``queryset`` and print its plan, flagging whether an index is used.
+        """
+        plan = queryset.explain(analyze=True)
+        elapsed = best_time(lambda: list(queryset.all()), repeat=repeat)
+        marker = self.style.SUCCESS('index scan') if uses_index(plan) else self.style.WARNING('no index')
+        self.stdout.write(f'\n{label}: {elapsed:.2f} ms ({marker})')
+        self.stdout.write(plan)
+        return elapsed
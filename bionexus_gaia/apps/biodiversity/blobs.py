@@ -0,0 +1,137 @@
+"""
+Reference counting and garbage collection of content-addressed media.
+
+Every ``image``, ``audio`` and ``video`` of a record and every uploaded
+``MediaUpload.file`` that lives in the content-addressed store holds one
+reference on its MediaBlob. A blob whose count drops to zero is stamped with
+``orphaned_at`` and deleted, with its renditions, by ``collect_orphans`` once
+a grace period has passed.
+"""
+import os
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import MediaBlob
+from .storage import blob_digest, media_storage
+
+# Record fields whose files are reference-counted
+MEDIA_FIELDS = ('image', 'audio', 'video')
+
+
+def find_blob(sha256):
+    """
+    Return the stored blob with this SHA-256, if any; the duplicate check.
+    """
+    return MediaBlob.objects.filter(sha256=sha256, ref_count__gt=0).first()
+
+
+def add_reference(name):
+    digest = blob_digest(name)
+    if digest is None:
+        return
+    with transaction.atomic():
+        blob, created = MediaBlob.objects.select_for_update().get_or_create(
+            sha256=digest,
+            defaults={'name': name, 'size': _size(name), 'ref_count': 1}
+        )
+        if not created:
+            MediaBlob.objects.filter(pk=digest).update(ref_count=F('ref_count') + 1, orphaned_at=None)
+
+
+def release_reference(name):
+    digest = blob_digest(name)
+    if digest is None:
+        return
+    MediaBlob.objects.filter(pk=digest).update(ref_count=F('ref_count') - 1)
+    MediaBlob.objects.filter(pk=digest, ref_count__lte=0, orphaned_at__isnull=True).update(
+        orphaned_at=timezone.now()
+    )
+
+
+def update_references(previous_names, current_names):
+    """
+    Move references from ``previous_names`` to ``current_names``, both
+    iterables of stored file names (empty values are ignored).
+    """
+    previous = [name for name in previous_names if name]
+    current = [name for name in current_names if name]
+    for name in current:
+        if name in previous:
+            previous.remove(name)
+        else:
+            add_reference(name)
+    for name in previous:
+        release_reference(name)
+
+
+def _size(name):
+    try:
+        return media_storage.size(name)
+    except OSError:
+        return 0
+
+
+def _modified_time(name):
+    try:
+        return media_storage.get_modified_time(name)
+    except FileNotFoundError:
+        return None
+
+
+def _delete_files(name):
+    """
+    Delete a blob's file, its renditions and any copy stored under another
+    extension before the blob was recorded.
+    """
+    directory = os.path.dirname(media_storage.path(name))
+    digest = blob_digest(name)
+    try:
+        entries = os.listdir(directory)
+    except FileNotFoundError:
+        return
+    for entry in sorted(entries):
+        if entry.startswith(digest):
+            try:
+                os.unlink(os.path.join(directory, entry))
+            except FileNotFoundError:
+                pass
+
+
+def collect_orphans(grace=timedelta(hours=24), batch_size=500, dry_run=False):
+    """
+    Delete one batch of blobs that have been unreferenced for at least
+    ``grace``. Returns ``(deleted, bytes_freed)``.
+
+    Rows are claimed with SKIP LOCKED so collectors and concurrent uploads do
+    not wait on each other. A blob whose file was written again within the
+    grace period (a fresh duplicate upload) gets a new grace period instead.
+    Storage commits and new references take the same row lock, so both checks
+    are repeated right before a file is deleted.
+    """
+    cutoff = timezone.now() - grace
+    deleted = 0
+    freed = 0
+    with transaction.atomic():
+        blobs = list(
+            MediaBlob.objects.filter(ref_count__lte=0, orphaned_at__lt=cutoff)
+            .select_for_update(skip_locked=True)
+            .order_by('orphaned_at')[:batch_size]
+        )
+        for blob in blobs:
+            if MediaBlob.objects.filter(pk=blob.pk, ref_count__gt=0).exists():
+                continue
+            modified = _modified_time(blob.name)
+            if modified is not None and modified > cutoff:
+                # Written again since it was orphaned; restart its grace period
+                if not dry_run:
+                    MediaBlob.objects.filter(pk=blob.pk).update(orphaned_at=modified)
+                continue
+            if not dry_run:
+                _delete_files(blob.name)
+                blob.delete()
+            deleted += 1
+            freed += blob.size
+    return deleted, freed
@@ -0,0 +1,141 @@
+"""
+Change log behind the records delta sync feed.
+
+Every save, delete, bulk insert and ``update()`` of a record upserts the
+record's RecordChange row with the next value of ``RECORD_CHANGE_SEQUENCE``
+and ``txid_current()``. The feed is ordered by ``(txid, seq)`` and only
+serves changes of transactions older than the oldest one still running
+(``txid_snapshot_xmin``): nothing can later commit below that horizon, so a
+client's cursor never skips a change that was still in flight when it read.
+"""
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import RecordChange
+
+RECORD_CHANGE_SEQUENCE = 'biodiversity_recordchange_seq'
+
+_UPSERT_SQL = """
+    INSERT INTO {table}
+        (record_id, contributor_id, action, is_public, was_public, txid, seq, changed_at)
+    VALUES {values}
+    ON CONFLICT (record_id) DO UPDATE SET
+        contributor_id = EXCLUDED.contributor_id,
+        action = EXCLUDED.action,
+        is_public = EXCLUDED.is_public,
+        was_public = {table}.was_public OR EXCLUDED.was_public,
+        txid = EXCLUDED.txid,
+        seq = EXCLUDED.seq,
+        changed_at = EXCLUDED.changed_at
+"""
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def log_changes(changes):
+    """
+    Record changes to records.
+
+    ``changes`` is an iterable of ``(record, action, was_public)``, where
+    ``was_public`` says whether the record was public before this change.
+    """
+    # ON CONFLICT cannot update a row twice: keep each record's last change
+    merged = {}
+    for record, action, was_public in changes:
+        previous = merged.get(record.pk)
+        merged[record.pk] = (
+            record.contributor_id,
+            action,
+            record.is_public,
+            was_public or record.is_public or (previous is not None and previous[3]),
+        )
+    if not merged:
+        return
+
+    now = timezone.now()
+    values = []
+    params = []
+    for record_id, (contributor_id, action, is_public, was_public) in merged.items():
+        values.append(f"(%s, %s, %s, %s, %s, txid_current(), nextval('{RECORD_CHANGE_SEQUENCE}'), %s)")
+        params.extend([record_id, contributor_id, action, is_public, was_public, now])
+
+    sql = _UPSERT_SQL.format(
+        table=connection.ops.quote_name(RecordChange._meta.db_table),
+        values=', '.join(values)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def format_cursor(txid, seq):
+    return f'{txid}.{seq}'
+
+
+def parse_cursor(value):
+    """
+    Return the ``(txid, seq)`` a cursor points after; ``(0, 0)`` for none.
+    """
+    if not value:
+        return 0, 0
+    try:
+        txid, seq = (int(part) for part in value.split('.'))
+    except ValueError:
+        raise InvalidCursor('since must be a cursor returned by this feed.')
+    if txid < 0 or seq < 0:
+        raise InvalidCursor('since must be a cursor returned by this feed.')
+    return txid, seq
+
+
+def visible_horizon():
+    """
+    Transaction id below which every transaction has finished.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT txid_snapshot_xmin(txid_current_snapshot())')
+        return cursor.fetchone()[0]
+
+
+def visible_changes(user):
+    """
+    Changes a user may sync: to public records, records that used to be
+    public, and the user's own; staff see every record.
+    """
+    if user is not None and user.is_staff:
+        return RecordChange.objects.all()
+    scope = Q(is_public=True) | Q(was_public=True)
+    if user is not None and user.is_authenticated:
+        scope |= Q(contributor=user)
+    return RecordChange.objects.filter(scope)
+
+
+def changes_since(user, cursor, limit):
+    """
+    Return ``(changes, next_cursor, has_more)``: up to ``limit`` changes the
+    user may see after ``cursor``, oldest first.
+    """
+    txid, seq = cursor
+    queryset = visible_changes(user).filter(
+        Q(txid__gt=txid) | Q(txid=txid, seq__gt=seq),
+        txid__lt=visible_horizon(),
+    ).order_by('txid', 'seq')
+    changes = list(queryset[:limit + 1])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    if changes:
+        cursor = (changes[-1].txid, changes[-1].seq)
+    return changes, format_cursor(*cursor), has_more
+
+
+def is_tombstone(change, user):
+    """
+    Whether the user should drop the record: it was deleted or hidden from them.
+    """
+    if change.action == 'deleted':
+        return True
+    if user is not None and user.is_staff:
+        return False
+    own = user is not None and user.is_authenticated and change.contributor_id == user.pk
+    return not (change.is_public or own)
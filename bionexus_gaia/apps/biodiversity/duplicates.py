@@ -0,0 +1,299 @@
+"""
+Detection of near-duplicate observations.
+
+A record duplicates another when both name the same species
+(case-insensitively), were observed within ``DEDUP_WINDOW_MINUTES`` and
+``DEDUP_DISTANCE_METRES`` of each other, and come from the same contributor
+or share a media file (media is content-addressed, so equal names mean equal
+content). Duplicates point at their group's canonical record through
+``duplicate_of``; canonical records have none. The species summary,
+leaderboard, mission progress, rollups, map clusters and heatmaps count
+canonical records only. Vector tiles, the delta feed and exports list every
+record: a duplicate is still a submission in its own right, with its own
+media and notes. The record API and delta feed carry ``duplicate_of`` for
+clients to collapse.
+
+Changes to grouping made with ``update()`` send ``records_regrouped`` with
+the records that became canonical or became duplicates, so the aggregates
+can move their counts between the two.
+
+New records are matched against stored ones before they are inserted, using
+the spatial and observation_date indexes. ``detect_duplicates`` regroups
+existing records one time window at a time, so memory use is bounded by the
+window rather than the table. Editing a record's species, location, date or
+media regroups it; the duplicates of a canonical record stay with it only if
+they still match it, otherwise the earliest of them is promoted.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.gis.measure import D
+from django.db import connection
+from django.db.models import Min, Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .blobs import MEDIA_FIELDS
+from .models import BiodiversityRecord
+from .summaries import normalize_species_name
+
+EARTH_RADIUS_METRES = 6371008.8
+
+_EARLIER_MATCH_SQL = """
+    SELECT r.id, r.contributor_id, r.is_public, r.duplicate_of_id, (
+        SELECT c.id FROM {table} c
+        WHERE lower(c.species_name) = lower(r.species_name)
+          AND c.observation_date >= r.observation_date - %(window)s
+          AND c.observation_date <= r.observation_date
+          AND (c.observation_date, c.id) < (r.observation_date, r.id)
+          AND ST_DWithin(c.location, r.location, %(distance)s)
+          AND (
+              c.contributor_id = r.contributor_id
+              OR nullif(r.image, '') IN (c.image, c.audio, c.video)
+              OR nullif(r.audio, '') IN (c.image, c.audio, c.video)
+              OR nullif(r.video, '') IN (c.image, c.audio, c.video)
+          )
+        ORDER BY c.observation_date, c.id
+        LIMIT 1
+    )
+    FROM {table} r
+    WHERE r.observation_date >= %(start)s AND r.observation_date < %(end)s
+      AND r.species_name <> ''
+    ORDER BY r.observation_date, r.id
+"""
+
+_REGROUP_SQL = """
+    UPDATE {table} AS r
+    SET duplicate_of_id = v.canonical::uuid, updated_at = %s
+    FROM (VALUES {values}) AS v (id, canonical)
+    WHERE r.id = v.id::uuid AND r.observation_date >= %s AND r.observation_date < %s
+"""
+
+
+def dedup_distance():
+    return getattr(settings, 'DEDUP_DISTANCE_METRES', 50)
+
+
+def dedup_window():
+    return timedelta(minutes=getattr(settings, 'DEDUP_WINDOW_MINUTES', 30))
+
+
+def _observed_at(record):
+    value = BiodiversityRecord._meta.get_field('observation_date').to_python(record.observation_date)
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def _media_names(record):
+    return {getattr(record, field).name for field in MEDIA_FIELDS if getattr(record, field)}
+
+
+def candidates(record):
+    """
+    Stored records ``record`` would duplicate.
+    """
+    species_key = normalize_species_name(record.species_name)
+    observed_at = _observed_at(record)
+    if not species_key or observed_at is None or record.location is None:
+        return BiodiversityRecord.objects.none()
+
+    same_source = Q(contributor_id=record.contributor_id)
+    for name in _media_names(record):
+        for field in MEDIA_FIELDS:
+            same_source |= Q(**{field: name})
+    window = dedup_window()
+    # A record's own duplicates cannot be its canonical record
+    return BiodiversityRecord.objects.alias(species_key=Lower('species_name')).filter(
+        same_source,
+        species_key=species_key,
+        observation_date__gte=observed_at - window,
+        observation_date__lte=observed_at + window,
+        location__dwithin=(record.location, D(m=dedup_distance())),
+    ).exclude(pk=record.pk).exclude(duplicate_of_id=record.pk)
+
+
+def find_canonical(record):
+    """
+    Return the id of the canonical record ``record`` duplicates, or None.
+    """
+    match = candidates(record).order_by('observation_date', 'id').values_list(
+        'id', 'duplicate_of'
+    ).first()
+    if match is None:
+        return None
+    return match[1] or match[0]
+
+
+def grouping_changed(previous, record):
+    """
+    Whether an edit to ``record`` changed what it may duplicate, given its
+    previously stored values.
+    """
+    return (
+        normalize_species_name(previous['species_name']) != normalize_species_name(record.species_name)
+        or previous['location'] != record.location
+        or previous['observation_date'] != _observed_at(record)
+        or [previous[field] or '' for field in MEDIA_FIELDS]
+        != [getattr(record, field).name or '' for field in MEDIA_FIELDS]
+    )
+
+
+def _metres_between(a, b):
+    longitude_a, latitude_a, longitude_b, latitude_b = map(math.radians, (a.x, a.y, b.x, b.y))
+    h = (
+        math.sin((latitude_b - latitude_a) / 2) ** 2
+        + math.cos(latitude_a) * math.cos(latitude_b) * math.sin((longitude_b - longitude_a) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_METRES * math.asin(math.sqrt(h))
+
+
+def _duplicates(record, other):
+    if normalize_species_name(record.species_name) != normalize_species_name(other.species_name):
+        return False
+    if not (record.contributor_id == other.contributor_id or _media_names(record) & _media_names(other)):
+        return False
+    return (
+        abs(_observed_at(record) - _observed_at(other)) <= dedup_window()
+        and _metres_between(record.location, other.location) <= dedup_distance()
+    )
+
+
+def assign_duplicates(records):
+    """
+    Set ``duplicate_of`` on unsaved ``records`` that duplicate a stored record
+    or an earlier record of the same batch.
+    """
+    checked = []
+    for record in records:
+        if record.duplicate_of_id is None:
+            record.duplicate_of_id = find_canonical(record)
+        if record.duplicate_of_id is None and normalize_species_name(record.species_name):
+            for earlier in checked:
+                if _duplicates(record, earlier):
+                    record.duplicate_of_id = earlier.duplicate_of_id or earlier.pk
+                    break
+        checked.append(record)
+
+
+def promote_duplicates(record):
+    """
+    Make the earliest duplicate of a deleted canonical ``record`` canonical
+    and point the rest of its group at it. Returns the records changed.
+    """
+    members = list(
+        BiodiversityRecord.objects.filter(duplicate_of_id=record.pk)
+        .only(
+            'id', 'contributor_id', 'is_public', 'is_verified', 'species_name',
+            'location', 'observation_date', 'duplicate_of',
+        )
+        .order_by('observation_date', 'id')
+    )
+    if not members:
+        return []
+
+    now = timezone.now()
+    canonical, rest = members[0], members[1:]
+    BiodiversityRecord.objects.filter(pk=canonical.pk).update(duplicate_of=None, updated_at=now)
+    canonical.duplicate_of_id = None
+    if rest:
+        BiodiversityRecord.objects.filter(pk__in=[member.pk for member in rest]).update(
+            duplicate_of=canonical.pk, updated_at=now
+        )
+        for member in rest:
+            member.duplicate_of_id = canonical.pk
+    return members
+
+
+def regroup_edited(record, previous):
+    """
+    Regroup a saved ``record`` after an edit that changed its grouping.
+
+    Updates its ``duplicate_of`` and, if it was canonical, promotes a new
+    canonical record for those of its duplicates it no longer matches.
+    Returns the other records changed.
+    """
+    canonical = find_canonical(record)
+    if canonical != record.duplicate_of_id:
+        BiodiversityRecord.objects.filter(pk=record.pk).update(duplicate_of=canonical)
+        record.duplicate_of_id = canonical
+    if previous['duplicate_of'] is not None:
+        return []
+
+    members = list(BiodiversityRecord.objects.filter(duplicate_of_id=record.pk))
+    if record.duplicate_of_id is None and all(_duplicates(member, record) for member in members):
+        return []
+    return promote_duplicates(record)
+
+
+def regroup_window(start, end):
+    """
+    Recompute ``duplicate_of`` for records observed in ``[start, end)``.
+
+    Records are matched against earlier ones, including those of the previous
+    window, which must already be grouped. Returns ``(records examined,
+    changed records, regrouped records)``: the changed records carry the
+    fields the change log needs, the regrouped ones are those that became
+    canonical or became duplicates, loaded in full.
+    """
+    table = connection.ops.quote_name(BiodiversityRecord._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(_EARLIER_MATCH_SQL.format(table=table), {
+            'window': dedup_window(),
+            'distance': dedup_distance(),
+            'start': start,
+            'end': end,
+        })
+        rows = cursor.fetchall()
+
+    in_window = {row[0] for row in rows}
+    prior = dict(
+        BiodiversityRecord.objects.filter(
+            pk__in={row[4] for row in rows if row[4] is not None and row[4] not in in_window}
+        ).values_list('id', 'duplicate_of')
+    )
+
+    canonical_of = {}
+    changed = []
+    flipped = []
+    for record_id, contributor_id, is_public, current, earlier in rows:
+        canonical = None
+        if earlier is not None:
+            canonical = (canonical_of[earlier] if earlier in canonical_of else prior[earlier]) or earlier
+        canonical_of[record_id] = canonical
+        if canonical != current:
+            changed.append(BiodiversityRecord(
+                id=record_id, contributor_id=contributor_id, is_public=is_public, duplicate_of_id=canonical
+            ))
+            if (canonical is None) != (current is None):
+                flipped.append(record_id)
+
+    if changed:
+        values = ', '.join(['(%s, %s)'] * len(changed))
+        params = [timezone.now()]
+        for record in changed:
+            params.extend([str(record.pk), str(record.duplicate_of_id) if record.duplicate_of_id else None])
+        params.extend([start, end])
+        with connection.cursor() as cursor:
+            cursor.execute(_REGROUP_SQL.format(table=table, values=values), params)
+    regrouped = list(BiodiversityRecord.objects.filter(
+        pk__in=flipped, observation_date__gte=start, observation_date__lt=end
+    )) if flipped else []
+    return len(rows), changed, regrouped
+
+
+def record_windows(window=timedelta(days=1), since=None):
+    """
+    Yield ``(start, end)`` windows of ``window`` covering every record with a
+    species observed from ``since`` on, skipping stretches without records.
+    The next window is looked up only once the caller asks for it.
+    """
+    records = BiodiversityRecord.objects.exclude(species_name='')
+    if since is not None:
+        records = records.filter(observation_date__gte=since)
+    start = records.aggregate(first=Min('observation_date'))['first']
+    while start is not None:
+        end = start + window
+        yield start, end
+        start = records.filter(observation_date__gte=end).aggregate(next=Min('observation_date'))['next']
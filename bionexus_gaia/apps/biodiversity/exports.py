@@ -0,0 +1,99 @@
+"""
+Streaming exporters for biodiversity records.
+
+Rows are pulled from a server-side cursor and encoded one at a time, so memory
+use stays flat regardless of how many records are exported.
+"""
+import csv
+import json
+
+from .serializers import BiodiversityRecordExportSerializer
+
+# Number of rows fetched per round trip from the server-side cursor
+EXPORT_CHUNK_SIZE = 2000
+
+# Encoded rows are grouped into writes of roughly this many characters
+EXPORT_WRITE_SIZE = 64 * 1024
+
+EXPORT_FIELDS = BiodiversityRecordExportSerializer.Meta.fields
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class Echo:
+    """
+    File-like object whose ``write`` returns the value instead of storing it,
+    so ``csv.writer`` can be used to encode single rows.
+    """
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield export dicts for each record in ``queryset`` without caching results.
+    """
+    # A single serializer instance is reused so its fields are only built once
+    serializer = BiodiversityRecordExportSerializer()
+    for record in queryset.select_related('contributor').iterator(chunk_size=chunk_size):
+        yield serializer.to_representation(record)
+
+
+def _buffered(pieces, size=EXPORT_WRITE_SIZE):
+    """
+    Join small encoded pieces into larger writes.
+    """
+    buffer = []
+    buffered = 0
+    for piece in pieces:
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= size:
+            yield ''.join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _encode_json(row):
+    return json.dumps(row, separators=(',', ':'), default=str)
+
+
+def _csv_pieces(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+def _json_pieces(rows):
+    yield '['
+    separator = ''
+    for row in rows:
+        yield separator + _encode_json(row)
+        separator = ','
+    yield ']'
+
+
+def _ndjson_pieces(rows):
+    for row in rows:
+        yield _encode_json(row) + '\n'
+
+
+_ENCODERS = {
+    'csv': _csv_pieces,
+    'json': _json_pieces,
+    'ndjson': _ndjson_pieces,
+}
+
+
+def stream_export(queryset, format_type, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Return an iterator of encoded chunks for ``queryset`` in ``format_type``.
+    """
+    return _buffered(_ENCODERS[format_type](export_rows(queryset, chunk_size=chunk_size)))
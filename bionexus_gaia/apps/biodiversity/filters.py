@@ -1,22 +1,118 @@
+from django.contrib.gis.geos import Polygon
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.functions import Upper
 from django_filters import rest_framework as filters
-from .models import BiodiversityRecord
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
+from .models import BiodiversityRecord, location_geometry
+
+MATCH_CHOICES = (
+    ('contains', 'Case-insensitive substring match'),
+    ('fuzzy', 'Trigram similarity, ordered by score'),
+)
+
+
+def parse_bbox(value):
+    """
+    Parse ``west,south,east,north`` (degrees) into a tuple of floats.
+    """
+    try:
+        west, south, east, north = (float(part) for part in value.split(','))
+    except ValueError:
+        raise ValidationError({'in_bbox': ['Expected "west,south,east,north" in degrees.']})
+    if not (-180 <= west <= 180 and -180 <= east <= 180 and -90 <= south <= north <= 90):
+        raise ValidationError({'in_bbox': ['Bounding box is outside the valid coordinate range.']})
+    return west, south, east, north
+
 
 class BiodiversityRecordFilter(filters.FilterSet):
     """
     Filter for BiodiversityRecord model.
     """
-    species_name = filters.CharFilter(lookup_expr='icontains')
-    common_name = filters.CharFilter(lookup_expr='icontains')
-    location_name = filters.CharFilter(lookup_expr='icontains')
+    species_name = filters.CharFilter(method='filter_text')
+    common_name = filters.CharFilter(method='filter_text')
+    location_name = filters.CharFilter(method='filter_text')
+    match = filters.ChoiceFilter(
+        choices=MATCH_CHOICES,
+        method='filter_match',
+        label='How species_name, common_name and location_name are matched'
+    )
     observation_date_min = filters.DateTimeFilter(field_name='observation_date', lookup_expr='gte')
     observation_date_max = filters.DateTimeFilter(field_name='observation_date', lookup_expr='lte')
     is_verified = filters.BooleanFilter()
     contributor_id = filters.CharFilter(field_name='contributor__id')
+    in_bbox = filters.CharFilter(
+        method='filter_in_bbox',
+        label='Bounding box as "west,south,east,north" in degrees'
+    )
     
     class Meta:
         model = BiodiversityRecord
         fields = [
             'species_name', 'common_name', 'location_name',
             'observation_date_min', 'observation_date_max',
-            'is_verified', 'contributor_id'
-        ]
\ No newline at end of file
+            'is_verified', 'contributor_id', 'in_bbox', 'match'
+        ]
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.similarity_aliases = []
+    
+    @property
+    def fuzzy(self):
+        return self.form.cleaned_data.get('match') == 'fuzzy' and connection.vendor == 'postgresql'
+    
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not self.similarity_aliases:
+            return queryset
+        
+        score = F(self.similarity_aliases[0])
+        for alias in self.similarity_aliases[1:]:
+            score = score + F(alias)
+        queryset = queryset.annotate(similarity=score)
+        if self.request is None or OrderingFilter.ordering_param not in self.request.query_params:
+            queryset = queryset.order_by('-similarity', *queryset.query.order_by)
+        return queryset
+    
+    def filter_match(self, queryset, name, value):
+        # Applied through filter_text
+        return queryset
+    
+    def filter_text(self, queryset, name, value):
+        """
+        Match a text field by substring or, with ``?match=fuzzy``, by trigram
+        similarity. Both forms compare ``UPPER(field)`` so that they are
+        served by the field's trigram index.
+        """
+        if not self.fuzzy:
+            return queryset.filter(**{f'{name}__icontains': value})
+        
+        upper_alias = f'{name}_upper'
+        similarity_alias = f'{name}_similarity'
+        self.similarity_aliases.append(similarity_alias)
+        return queryset.alias(**{
+            upper_alias: Upper(name),
+            similarity_alias: TrigramSimilarity(name, value),
+        }).filter(**{f'{upper_alias}__trigram_similar': value.upper()})
+    
+    def filter_in_bbox(self, queryset, name, value):
+        """
+        Keep records inside the bounding box, using the geometry GiST index.
+        
+        A box whose west edge is east of its east edge crosses the antimeridian.
+        """
+        west, south, east, north = parse_bbox(value)
+        if west <= east:
+            boxes = [(west, south, east, north)]
+        else:
+            boxes = [(west, south, 180, north), (-180, south, east, north)]
+        
+        condition = Q()
+        for box in boxes:
+            polygon = Polygon.from_bbox(box)
+            polygon.srid = 4326
+            condition |= Q(location_geom__bboverlaps=polygon)
+        return queryset.alias(location_geom=location_geometry()).filter(condition)
@@ -0,0 +1,259 @@
+"""
+Precomputed observation density heatmaps.
+
+Public record locations are binned into grids of ``HEATMAP_BASE_DEGREES``
+cells at level 0, halving the cell size at every level up to
+``HEATMAP_LEVELS - 1``, for all records and for selected species or genera.
+Near-duplicates are left out. Each grid is cut into ``TILE_SIZE`` square
+tiles of uint32 counts, stored as ``.npy`` files named after a digest of
+their content so they can be cached forever; empty tiles are not stored.
+
+A refresh bins only records created since the grid's watermark and rewrites
+just the tiles they fall into. Edits, deletes and regrouped duplicates are
+not tracked, so a full rebuild should run periodically.
+"""
+import hashlib
+from datetime import timedelta
+from io import BytesIO
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .fastpath import coordinate_annotations
+from .models import BiodiversityRecord, HeatmapGrid, HeatmapTile
+from .summaries import normalize_species_name
+
+# Cells along each side of a tile
+TILE_SIZE = 256
+
+TILE_DTYPE = np.uint32
+
+
+def base_degrees():
+    return getattr(settings, 'HEATMAP_BASE_DEGREES', 1.0)
+
+
+def level_count():
+    return getattr(settings, 'HEATMAP_LEVELS', 4)
+
+
+def cell_degrees(level):
+    """
+    Width and height of a grid cell at ``level``, in degrees.
+    """
+    return base_degrees() / 2 ** level
+
+
+def grid_shape(level):
+    """
+    ``(rows, columns)`` of the cell grid at ``level``.
+    """
+    size = cell_degrees(level)
+    return int(np.ceil(180 / size)), int(np.ceil(360 / size))
+
+
+def tile_counts(level):
+    """
+    ``(rows, columns)`` of tiles covering the grid at ``level``.
+    """
+    rows, columns = grid_shape(level)
+    return -(-rows // TILE_SIZE), -(-columns // TILE_SIZE)
+
+
+def tile_bounds(level, tile_x, tile_y):
+    """
+    ``[west, south, east, north]`` of a tile; cells past the antimeridian or
+    the poles are always zero.
+    """
+    span = TILE_SIZE * cell_degrees(level)
+    west = tile_x * span - 180.0
+    south = tile_y * span - 90.0
+    return [west, south, min(180.0, west + span), min(90.0, south + span)]
+
+
+def cell_indices(points, level):
+    """
+    Row and column of the cell containing each ``(longitude, latitude)`` row
+    of ``points``.
+    """
+    size = cell_degrees(level)
+    rows, columns = grid_shape(level)
+    x = np.clip(np.floor((points[:, 0] + 180.0) / size), 0, columns - 1).astype(np.int64)
+    y = np.clip(np.floor((points[:, 1] + 90.0) / size), 0, rows - 1).astype(np.int64)
+    return y, x
+
+
+def grid_records(rank='', taxon=''):
+    """
+    Public records counted by a grid for all records (``rank`` ''), a
+    species or a genus (the first word of the scientific name).
+    """
+    queryset = BiodiversityRecord.objects.filter(is_public=True, duplicate_of__isnull=True)
+    if not rank:
+        return queryset
+    queryset = queryset.alias(species_key=Lower('species_name'))
+    if rank == 'genus':
+        return queryset.filter(species_key__startswith=f'{taxon} ')
+    return queryset.filter(species_key=taxon)
+
+
+def iter_points(queryset, chunk_size=50000):
+    """
+    Yield ``(n, 2)`` float arrays of record coordinates, computed by the
+    database, ``chunk_size`` rows at a time.
+    """
+    rows = queryset.annotate(**coordinate_annotations()).values_list(
+        'location_x', 'location_y'
+    ).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield np.array(chunk, dtype=np.float64)
+
+
+def accumulate(tiles, points, level, load_tile):
+    """
+    Add ``points`` to the ``(tile_x, tile_y) -> array`` dict ``tiles``,
+    loading each tile the first time a point falls into it.
+    """
+    y, x = cell_indices(points, level)
+    tile_y, row = np.divmod(y, TILE_SIZE)
+    tile_x, column = np.divmod(x, TILE_SIZE)
+    tile_ids = tile_y * tile_counts(level)[1] + tile_x
+    order = np.argsort(tile_ids, kind='stable')
+    _, starts = np.unique(tile_ids[order], return_index=True)
+    for members in np.split(order, starts[1:]):
+        key = (int(tile_x[members[0]]), int(tile_y[members[0]]))
+        if key not in tiles:
+            tiles[key] = load_tile(*key)
+        cells = row[members] * TILE_SIZE + column[members]
+        tiles[key] += np.bincount(cells, minlength=TILE_SIZE * TILE_SIZE).astype(TILE_DTYPE).reshape(
+            TILE_SIZE, TILE_SIZE
+        )
+
+
+def empty_tile():
+    return np.zeros((TILE_SIZE, TILE_SIZE), dtype=TILE_DTYPE)
+
+
+def read_tile(tile):
+    with default_storage.open(tile.file_name, 'rb') as handle:
+        return np.load(handle, allow_pickle=False)
+
+
+def tile_bytes(array):
+    buffer = BytesIO()
+    np.save(buffer, array, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def store_tiles(grid, tiles, existing):
+    """
+    Write changed tiles of ``grid`` and delete tiles left empty.
+
+    ``existing`` maps ``(tile_x, tile_y)`` to the grid's HeatmapTile rows.
+    Replaced files are removed once the transaction commits.
+    """
+    stale = []
+    for (tile_x, tile_y), array in tiles.items():
+        tile = existing.get((tile_x, tile_y))
+        total = int(array.sum())
+        if not total:
+            if tile is not None:
+                stale.append(tile.file_name)
+                tile.delete()
+            continue
+
+        content = tile_bytes(array)
+        digest = hashlib.sha256(content).hexdigest()
+        if tile is not None and tile.digest == digest:
+            continue
+        name = f'heatmaps/{grid.pk}/{tile_x}-{tile_y}-{digest[:16]}.npy'
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(content))
+        if tile is None:
+            tile = HeatmapTile(grid=grid, tile_x=tile_x, tile_y=tile_y)
+        elif tile.file_name != name:
+            stale.append(tile.file_name)
+        tile.digest = digest
+        tile.file_name = name
+        tile.total = total
+        tile.max_count = int(array.max())
+        tile.save()
+
+    if stale:
+        transaction.on_commit(lambda: [default_storage.delete(name) for name in stale])
+
+
+def ensure_grids(rank='', taxon=''):
+    """
+    Return the HeatmapGrid rows of every level for a taxon, creating missing ones.
+    """
+    taxon = normalize_species_name(taxon).strip() if rank else ''
+    return [
+        HeatmapGrid.objects.get_or_create(rank=rank, taxon=taxon, level=level)[0]
+        for level in range(level_count())
+    ]
+
+
+def refresh_grids(grids, full=False, chunk_size=50000):
+    """
+    Bring the grids of one taxon up to date and return the number of records
+    binned.
+
+    ``full`` rebuilds every tile from all records; otherwise only records
+    created since the watermark are added. Records are read up to
+    ``HEATMAP_SETTLE_SECONDS`` ago, so rows saved by transactions still open
+    at that point are not skipped by the next refresh.
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'HEATMAP_SETTLE_SECONDS', 60))
+    with transaction.atomic():
+        grids = list(HeatmapGrid.objects.select_for_update().filter(
+            pk__in=[grid.pk for grid in grids]
+        ).order_by('level'))
+        if not grids:
+            return 0
+        # Grids never refreshed before have nothing to add to
+        full = full or any(grid.watermark is None for grid in grids)
+
+        queryset = grid_records(grids[0].rank, grids[0].taxon).filter(created_at__lte=cutoff)
+        if not full:
+            queryset = queryset.filter(created_at__gt=min(grid.watermark for grid in grids))
+
+        existing = {}
+        tiles = {}
+        for grid in grids:
+            existing[grid.pk] = {(tile.tile_x, tile.tile_y): tile for tile in grid.tiles.all()}
+            if full:
+                # Every stored tile is rewritten, or deleted if nothing falls into it
+                tiles[grid.pk] = {key: empty_tile() for key in existing[grid.pk]}
+            else:
+                tiles[grid.pk] = {}
+
+        binned = 0
+        for points in iter_points(queryset, chunk_size):
+            binned += len(points)
+            for grid in grids:
+                stored = existing[grid.pk]
+
+                def load_tile(tile_x, tile_y, stored=stored):
+                    tile = stored.get((tile_x, tile_y))
+                    if full or tile is None:
+                        return empty_tile()
+                    return read_tile(tile).astype(TILE_DTYPE, copy=True)
+
+                accumulate(tiles[grid.pk], points, grid.level, load_tile)
+
+        for grid in grids:
+            store_tiles(grid, tiles[grid.pk], existing[grid.pk])
+            grid.record_count = binned if full else grid.record_count + binned
+            grid.watermark = cutoff
+            grid.save(update_fields=['watermark', 'record_count', 'updated_at'])
+    return binned
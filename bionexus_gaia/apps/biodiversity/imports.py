@@ -0,0 +1,404 @@
+"""
+High-throughput import of occurrence files (PostgreSQL only).
+
+An OccurrenceImport reads a CSV file, or a tab-separated Darwin Core
+``occurrence.txt``, in chunks of lines. Each chunk is parsed and validated
+column by column with numpy, written with ``COPY`` into a temporary staging
+table, and merged into the records table by one ``INSERT ... SELECT`` that
+builds the geography points in SQL and logs the new records for the delta
+sync feed. The chunk commits together with the import's byte offset, so an
+interrupted import resumes after the last committed chunk and never loads a
+row twice.
+
+Rows whose occurrence id was imported before are skipped: UUID ids are kept,
+other ids are hashed into one. Imported records bypass the ORM, so
+``records_imported`` is sent once the file is done, for the species
+summary, rollups and map clusters to be rebuilt. Near-duplicate detection
+is left to ``detect_duplicates``. Quoted CSV values must not span lines.
+"""
+import csv
+import warnings
+from datetime import timezone as dt_timezone
+from io import StringIO
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .changes import RECORD_CHANGE_SEQUENCE
+from .models import BiodiversityRecord, OccurrenceImport, RecordChange
+from .signals import records_imported
+
+# Lines parsed, staged and merged per transaction
+IMPORT_CHUNK_SIZE = 50000
+
+# Accepted header names of each staged column, ours first, then Darwin Core's
+COLUMN_ALIASES = {
+    'occurrence_id': ('id', 'occurrenceid'),
+    'species_name': ('species_name', 'scientificname'),
+    'common_name': ('common_name', 'vernacularname'),
+    'latitude': ('latitude', 'decimallatitude'),
+    'longitude': ('longitude', 'decimallongitude'),
+    'observation_date': ('observation_date', 'eventdate'),
+    'location_name': ('location_name', 'locality'),
+    'notes': ('notes', 'occurrenceremarks'),
+}
+
+REQUIRED_COLUMNS = ('species_name', 'latitude', 'longitude', 'observation_date')
+
+# Columns parsed as numbers or dates; longer values are invalid, which keeps
+# their fixed-width arrays small however wide a stray cell is
+PARSED_COLUMNS = ('latitude', 'longitude', 'observation_date')
+PARSED_VALUE_LENGTH = 64
+
+# Longest value kept for the records' CharFields
+TEXT_LENGTHS = {
+    'species_name': 255,
+    'common_name': 255,
+    'location_name': 255,
+}
+
+STAGING_TABLE = 'occurrence_import_staging'
+
+STAGING_COLUMNS = [
+    'line', 'occurrence_id', 'species_name', 'common_name', 'latitude', 'longitude',
+    'observation_date', 'location_name', 'notes',
+]
+
+_STAGING_SQL = f"""
+    CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+        line bigint,
+        occurrence_id text,
+        species_name text,
+        common_name text,
+        latitude double precision,
+        longitude double precision,
+        observation_date timestamptz,
+        location_name text,
+        notes text
+    )
+"""
+
+_UUID_PATTERN = '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+
+_MERGE_SQL = """
+    WITH staged AS (
+        SELECT DISTINCT ON (id) *
+        FROM (
+            SELECT
+                CASE
+                    WHEN occurrence_id ~* '{uuid_pattern}' THEN occurrence_id::uuid
+                    WHEN occurrence_id <> '' THEN md5(%(source)s || occurrence_id)::uuid
+                    ELSE gen_random_uuid()
+                END AS id,
+                {staging}.*
+            FROM {staging}
+        ) AS keyed
+        ORDER BY id, line
+    ),
+    inserted AS (
+        INSERT INTO {records} (
+            id, contributor_id, species_name, common_name, image, audio, video,
+            renditions, renditions_pending, location, location_name, observation_date,
+            notes, is_public, ai_prediction, ai_confidence, blockchain_hash,
+            is_verified, duplicate_of_id, created_at, updated_at
+        )
+        SELECT
+            s.id, %(contributor)s, s.species_name, s.common_name, '', '', '',
+            '{{}}'::jsonb, false,
+            ST_SetSRID(ST_MakePoint(s.longitude, s.latitude), 4326)::geography,
+            s.location_name, s.observation_date, s.notes, %(is_public)s, NULL, NULL, '',
+            false, NULL, %(now)s, %(now)s
+        FROM staged s
+        WHERE NOT EXISTS (SELECT 1 FROM {records} r WHERE r.id = s.id)
+        RETURNING id, contributor_id, is_public
+    )
+    INSERT INTO {changes}
+        (record_id, contributor_id, action, is_public, was_public, txid, seq, changed_at)
+    SELECT id, contributor_id, 'upsert', is_public, is_public, txid_current(),
+           nextval('{sequence}'), %(now)s
+    FROM inserted
+    ON CONFLICT (record_id) DO UPDATE SET
+        contributor_id = EXCLUDED.contributor_id,
+        action = EXCLUDED.action,
+        is_public = EXCLUDED.is_public,
+        was_public = {changes}.was_public OR EXCLUDED.was_public,
+        txid = EXCLUDED.txid,
+        seq = EXCLUDED.seq,
+        changed_at = EXCLUDED.changed_at
+"""
+
+
+class InvalidImportFile(ValueError):
+    pass
+
+
+def header_columns(header_line):
+    """
+    Return ``(delimiter, {staged column: index})`` for a file's first line.
+    """
+    text = header_line.decode('utf-8-sig').rstrip('\r\n')
+    delimiter = '\t' if '\t' in text else ','
+    names = [name.strip().lower() for name in next(csv.reader([text], delimiter=delimiter))]
+    # Darwin Core headers may carry the full term URI
+    names = [name.rsplit('/', 1)[-1] for name in names]
+    columns = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in names:
+                columns[column] = names.index(alias)
+                break
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise InvalidImportFile(f"Missing columns: {', '.join(missing)}.")
+    return delimiter, columns
+
+
+def iter_chunks(handle, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Yield ``(lines, end_offset)`` for chunks of lines read from the binary
+    ``handle``, where ``end_offset`` is the byte position after the chunk.
+    """
+    offset = handle.tell()
+    lines = []
+    while True:
+        line = handle.readline()
+        if not line:
+            break
+        offset += len(line)
+        if line.strip():
+            lines.append(line)
+        if len(lines) >= chunk_size:
+            yield lines, offset
+            lines = []
+    if lines:
+        yield lines, offset
+
+
+def parse_lines(lines, delimiter, columns):
+    """
+    Split ``lines`` into one array per staged column.
+
+    Only the staged columns' cells are kept as rows are read. Text columns
+    are object arrays, so one long value does not widen every row; numeric
+    and date columns are fixed-width strings for numpy's parsers.
+    """
+    text = (line.decode('utf-8', errors='replace').rstrip('\r\n') for line in lines)
+    # Darwin Core text files have no quoting
+    quoting = csv.QUOTE_NONE if delimiter == '\t' else csv.QUOTE_MINIMAL
+    cells = {column: [] for column in columns}
+    for row in csv.reader(text, delimiter=delimiter, quoting=quoting):
+        for column, index in columns.items():
+            cells[column].append(row[index].strip() if index < len(row) else '')
+
+    count = len(cells[REQUIRED_COLUMNS[0]])
+    values = {}
+    for column in COLUMN_ALIASES:
+        if column not in columns:
+            values[column] = np.full(count, '', dtype=object)
+        elif column in PARSED_COLUMNS:
+            values[column] = np.array(
+                [value if len(value) <= PARSED_VALUE_LENGTH else '' for value in cells[column]],
+                dtype=f'U{PARSED_VALUE_LENGTH}'
+            )
+        else:
+            values[column] = np.array(cells[column], dtype=object)
+    return values
+
+
+def _float_or_nan(value):
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+def parse_floats(values):
+    result = np.full(len(values), np.nan)
+    filled = values != ''
+    try:
+        result[filled] = values[filled].astype(np.float64)
+    except ValueError:
+        result[filled] = [_float_or_nan(value) for value in values[filled]]
+    return result
+
+
+def _parse_date_value(value):
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        return np.datetime64(day, 's') if day is not None else np.datetime64('NaT')
+    if timezone.is_aware(moment):
+        moment = timezone.make_naive(moment, dt_timezone.utc)
+    return np.datetime64(moment, 's')
+
+
+def parse_dates(values):
+    """
+    Parse ISO 8601 dates and datetimes into UTC ``datetime64[s]``, NaT where
+    invalid. Darwin Core event date intervals keep their start.
+    """
+    starts = np.char.partition(values, '/')[:, 0]
+    try:
+        # numpy's parsing of UTC offsets is deprecated; they take the slow path
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', DeprecationWarning)
+            return np.char.rstrip(starts, 'Z').astype('datetime64[s]')
+    except (ValueError, DeprecationWarning):
+        # Offsets and malformed values are handled one at a time
+        parsed = np.empty(len(starts), dtype='datetime64[s]')
+        for index, value in enumerate(starts):
+            try:
+                parsed[index] = _parse_date_value(value)
+            except ValueError:
+                parsed[index] = np.datetime64('NaT')
+        return parsed
+
+
+def transform_chunk(values):
+    """
+    Validate parsed columns; return the valid rows' columns and the number of
+    rejected rows.
+    """
+    latitude = parse_floats(values['latitude'])
+    longitude = parse_floats(values['longitude'])
+    observation_date = parse_dates(values['observation_date'])
+    valid = (
+        (values['species_name'] != '')
+        & np.isfinite(latitude) & (np.abs(latitude) <= 90)
+        & np.isfinite(longitude) & (np.abs(longitude) <= 180)
+        & ~np.isnat(observation_date)
+    )
+
+    columns = {name: array[valid] for name, array in values.items()}
+    for name, length in TEXT_LENGTHS.items():
+        columns[name] = np.array([value[:length] for value in columns[name]], dtype=object)
+    columns['latitude'] = latitude[valid]
+    columns['longitude'] = longitude[valid]
+    columns['observation_date'] = observation_date[valid]
+    return columns, int(len(valid) - valid.sum())
+
+
+# COPY text format escapes; NUL cannot be stored in text at all
+_COPY_ESCAPES = str.maketrans({'\x00': '', '\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _copy_text(values):
+    return [value.translate(_COPY_ESCAPES) for value in values]
+
+
+def copy_buffer(columns, first_line):
+    """
+    Encode transformed columns in COPY text format.
+    """
+    count = len(columns['latitude'])
+    fields = {
+        'line': np.arange(first_line, first_line + count).astype(str),
+        'latitude': columns['latitude'].astype(str),
+        'longitude': columns['longitude'].astype(str),
+        'observation_date': np.char.add(np.datetime_as_string(columns['observation_date'], unit='s'), '+00'),
+    }
+    for name in ('occurrence_id', 'species_name', 'common_name', 'location_name', 'notes'):
+        fields[name] = _copy_text(columns[name])
+    buffer = StringIO()
+    for row in zip(*(fields[name] for name in STAGING_COLUMNS)):
+        buffer.write('\t'.join(row))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+
+def load_chunk(occurrence_import, columns, first_line, offset, lines, rejected):
+    """
+    Stage and merge one chunk and advance the import's checkpoint, all in one
+    transaction. Returns the number of records created.
+    """
+    quote_name = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(_STAGING_SQL)
+        cursor.execute(f'TRUNCATE {STAGING_TABLE}')
+        cursor.copy_expert(
+            f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) FROM STDIN",
+            copy_buffer(columns, first_line)
+        )
+        cursor.execute(
+            _MERGE_SQL.format(
+                uuid_pattern=_UUID_PATTERN,
+                staging=STAGING_TABLE,
+                records=quote_name(BiodiversityRecord._meta.db_table),
+                changes=quote_name(RecordChange._meta.db_table),
+                sequence=RECORD_CHANGE_SEQUENCE,
+            ),
+            {
+                'source': f'{occurrence_import.source_name}:',
+                'contributor': occurrence_import.owner_id,
+                'is_public': occurrence_import.is_public,
+                'now': timezone.now(),
+            }
+        )
+        created = cursor.rowcount
+        valid = len(columns['latitude'])
+        OccurrenceImport.objects.filter(pk=occurrence_import.pk).update(
+            offset=offset,
+            rows_read=F('rows_read') + lines,
+            rows_imported=F('rows_imported') + created,
+            rows_skipped=F('rows_skipped') + valid - created,
+            rows_rejected=F('rows_rejected') + rejected,
+            updated_at=timezone.now(),
+        )
+    return created
+
+
+def claim_import():
+    """
+    Mark the oldest queued import running and return it, or None.
+    """
+    with transaction.atomic():
+        occurrence_import = OccurrenceImport.objects.select_for_update(skip_locked=True).filter(
+            status=OccurrenceImport.QUEUED
+        ).order_by('created_at').first()
+        if occurrence_import is not None:
+            occurrence_import.status = OccurrenceImport.RUNNING
+            occurrence_import.save(update_fields=['status', 'updated_at'])
+    return occurrence_import
+
+
+def run_import(occurrence_import, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """
+    Load ``occurrence_import`` from its checkpoint to the end of the file.
+
+    ``progress`` is called with the import after every committed chunk.
+    Failures mark the import failed and are re-raised; running it again
+    resumes from the last committed chunk.
+    """
+    OccurrenceImport.objects.filter(pk=occurrence_import.pk).update(
+        status=OccurrenceImport.RUNNING, last_error='', updated_at=timezone.now()
+    )
+    occurrence_import.refresh_from_db()
+    try:
+        with occurrence_import.file.open('rb') as handle:
+            delimiter, columns = header_columns(handle.readline())
+            if occurrence_import.offset:
+                handle.seek(occurrence_import.offset)
+            line = occurrence_import.rows_read + 1
+            for lines, offset in iter_chunks(handle, chunk_size):
+                values, rejected = transform_chunk(parse_lines(lines, delimiter, columns))
+                load_chunk(occurrence_import, values, line, offset, len(lines), rejected)
+                line += len(lines)
+                if progress is not None:
+                    occurrence_import.refresh_from_db()
+                    progress(occurrence_import)
+    except Exception as exc:
+        OccurrenceImport.objects.filter(pk=occurrence_import.pk).update(
+            status=OccurrenceImport.FAILED, last_error=str(exc), updated_at=timezone.now()
+        )
+        raise
+
+    records_imported.send(sender=BiodiversityRecord, occurrence_import=occurrence_import)
+    OccurrenceImport.objects.filter(pk=occurrence_import.pk).update(
+        status=OccurrenceImport.SUCCEEDED, completed_at=timezone.now(), updated_at=timezone.now()
+    )
+    occurrence_import.refresh_from_db()
+    return occurrence_import
@@ -0,0 +1,107 @@
+"""
+Bulk ingest of biodiversity records.
+
+Rows are validated in one pass, their media upload references are resolved
+with a single query, and valid rows are inserted with ``bulk_create`` in
+fixed-size chunks, each in its own transaction. ``bulk_create`` does not send
+``post_save``, so each committed chunk is announced through
+``records_bulk_created`` for the derived tables to catch up.
+"""
+from django.contrib.gis.geos import Point
+from django.db import DatabaseError, transaction
+
+from .duplicates import assign_duplicates
+from .models import BiodiversityRecord, MediaUpload
+from .serializers import BulkRecordSerializer
+from .signals import records_bulk_created
+
+# Records inserted per bulk_create call and transaction
+BULK_CHUNK_SIZE = 500
+
+# Largest number of rows accepted in one request
+MAX_BULK_RECORDS = 10000
+
+
+def _resolve_uploads(rows, owner):
+    """
+    Replace upload ids with the uploaded files' names, in place.
+
+    Returns the errors for rows referencing uploads that are missing, not
+    owned by ``owner`` or of the wrong kind, keyed by row index.
+    """
+    upload_ids = {
+        attrs[field]
+        for _, attrs in rows
+        for field in BulkRecordSerializer.UPLOAD_FIELDS
+        if attrs.get(field)
+    }
+    uploads = {
+        upload.id: upload
+        for upload in MediaUpload.objects.filter(
+            owner=owner, status='complete', id__in=upload_ids
+        ).only('id', 'kind', 'file')
+    }
+
+    errors = {}
+    for index, attrs in rows:
+        for field, record_field in BulkRecordSerializer.UPLOAD_FIELDS.items():
+            upload_id = attrs.pop(field, None)
+            if not upload_id:
+                continue
+            upload = uploads.get(upload_id)
+            if upload is None or upload.kind != record_field:
+                errors.setdefault(index, {})[field] = [f'No {record_field} upload with id {upload_id}.']
+                continue
+            attrs[record_field] = upload.file.name
+    return errors
+
+
+def _build_record(attrs, contributor):
+    longitude = attrs.pop('longitude')
+    latitude = attrs.pop('latitude')
+    # bulk_create skips pre_save, so queue renditions here
+    return BiodiversityRecord(
+        contributor=contributor,
+        location=Point(longitude, latitude, srid=4326),
+        renditions_pending=bool(attrs.get('image')),
+        **attrs
+    )
+
+
+def ingest_records(data, contributor, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Validate and insert ``data`` (a list of row dicts) for ``contributor``.
+
+    Returns one result per input row, in order: ``{'index', 'status': 'created',
+    'id'}`` or ``{'index', 'status': 'invalid' | 'failed', 'errors'}``.
+    """
+    results = [None] * len(data)
+    valid = []
+    for index, row in enumerate(data):
+        serializer = BulkRecordSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((index, dict(serializer.validated_data)))
+        else:
+            results[index] = {'index': index, 'status': 'invalid', 'errors': serializer.errors}
+
+    for index, errors in _resolve_uploads(valid, contributor).items():
+        results[index] = {'index': index, 'status': 'invalid', 'errors': errors}
+    valid = [(index, attrs) for index, attrs in valid if results[index] is None]
+
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        records = [_build_record(attrs, contributor) for _, attrs in chunk]
+        try:
+            with transaction.atomic():
+                # bulk_create skips pre_save, so match near-duplicates here too
+                assign_duplicates(records)
+                BiodiversityRecord.objects.bulk_create(records)
+                records_bulk_created.send(sender=BiodiversityRecord, records=records)
+        except DatabaseError as exc:
+            for index, _ in chunk:
+                results[index] = {'index': index, 'status': 'failed', 'errors': {'non_field_errors': [str(exc)]}}
+            continue
+        for (index, _), record in zip(chunk, records):
+            results[index] = {'index': index, 'status': 'created', 'id': str(record.id)}
+
+    return results
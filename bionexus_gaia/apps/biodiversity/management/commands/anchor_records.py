@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from bionexus_gaia.apps.biodiversity.anchoring import anchor_batch_size, anchor_pending_records
+
+
+class Command(BaseCommand):
+    help = 'Anchor all records queued for validation, one Merkle root per batch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Most records per Merkle tree (default: ANCHOR_BATCH_SIZE).'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or anchor_batch_size()
+        batches = 0
+        records = 0
+        while True:
+            batch = anchor_pending_records(batch_size)
+            if batch is None:
+                break
+            batches += 1
+            records += batch.record_count
+            self.stdout.write(f'  anchored {batch.record_count} records, root {batch.merkle_root} in {batch.tx_hash}')
+        self.stdout.write(self.style.SUCCESS(f'Anchored {records} records in {batches} batches.'))
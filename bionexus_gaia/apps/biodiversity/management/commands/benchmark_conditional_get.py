@@ -0,0 +1,101 @@
+import time
+
+from django.conf import settings
+from rest_framework.test import APIClient
+
+from bionexus_gaia.apps.biodiversity.benchmarks import BenchmarkCommand
+from bionexus_gaia.apps.biodiversity.models import BiodiversityRecord
+
+POLLED_ENDPOINTS = [
+    '/api/v1/biodiversity/records/',
+    '/api/v1/biodiversity/species/',
+    '/api/v1/citizen/map/',
+    '/api/v1/dashboard/',
+]
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Seed synthetic records and replay a polling workload against the read '
+        'endpoints, once as plain GETs and once revalidating with If-None-Match, '
+        'reporting the bytes and CPU time saved.'
+    )
+    default_rows = 20000
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--polls',
+            type=int,
+            default=50,
+            help='Number of polls per endpoint (default: 50).'
+        )
+        parser.add_argument(
+            '--change-every',
+            type=int,
+            default=10,
+            help='Edit one record after every N polls, so some polls see new data (default: 10).'
+        )
+
+    def run_benchmark(self, options):
+        client = APIClient(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        client.force_authenticate(user=BiodiversityRecord.objects.first().contributor)
+
+        totals = {'plain': [0, 0.0, 0.0], 'conditional': [0, 0.0, 0.0]}
+        for path in POLLED_ENDPOINTS:
+            plain = self.replay(client, path, options, conditional=False)
+            conditional = self.replay(client, path, options, conditional=True)
+            for mode, result in (('plain', plain), ('conditional', conditional)):
+                for index, value in enumerate(result[:3]):
+                    totals[mode][index] += value
+            self.stdout.write(
+                f'\n{path}: {conditional[3]}/{options["polls"]} polls answered 304\n'
+                f'  bytes: {plain[0]} -> {conditional[0]}\n'
+                f'  cpu:   {plain[1]:.1f} ms -> {conditional[1]:.1f} ms\n'
+                f'  wall:  {plain[2]:.1f} ms -> {conditional[2]:.1f} ms'
+            )
+
+        plain, conditional = totals['plain'], totals['conditional']
+        self.stdout.write(self.style.SUCCESS(
+            f'\nAll endpoints: {self.saving(plain[0], conditional[0])} of bytes, '
+            f'{self.saving(plain[1], conditional[1])} of CPU time and '
+            f'{self.saving(plain[2], conditional[2])} of wall time saved.'
+        ))
+
+    def replay(self, client, path, options, conditional):
+        """
+        Poll ``path`` and return ``(bytes, cpu_ms, wall_ms, not_modified)``.
+
+        CPU time is this process's: serialization and rendering, not the
+        database server's work.
+        """
+        received = 0
+        cpu = 0.0
+        wall = 0.0
+        not_modified = 0
+        etag = None
+        for poll in range(options['polls']):
+            if poll and options['change_every'] and poll % options['change_every'] == 0:
+                record = BiodiversityRecord.objects.order_by('-observation_date').first()
+                record.notes = f'Revisited on poll {poll}'
+                record.save()
+
+            headers = {'HTTP_IF_NONE_MATCH': etag} if conditional and etag else {}
+            cpu_started = time.process_time()
+            wall_started = time.perf_counter()
+            response = client.get(path, **headers)
+            content = response.content
+            cpu += (time.process_time() - cpu_started) * 1000
+            wall += (time.perf_counter() - wall_started) * 1000
+
+            received += len(content)
+            if response.status_code == 304:
+                not_modified += 1
+            else:
+                etag = response.get('ETag')
+        return received, cpu, wall, not_modified
+
+    def saving(self, before, after):
+        if not before:
+            return '0%'
+        return f'{(before - after) / before:.0%}'
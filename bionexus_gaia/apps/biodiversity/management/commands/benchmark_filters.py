@@ -0,0 +1,39 @@
+from django.db import connection
+
+from bionexus_gaia.apps.biodiversity.benchmarks import BenchmarkCommand
+from bionexus_gaia.apps.biodiversity.filters import BiodiversityRecordFilter
+from bionexus_gaia.apps.biodiversity.models import BiodiversityRecord
+
+FILTER_CASES = [
+    ('species_name', {'species_name': 'peregr'}),
+    ('common_name', {'common_name': 'buteo'}),
+    ('location_name', {'location_name': 'naivasha'}),
+    ('species_name (fuzzy)', {'species_name': 'Falco peregrinis', 'match': 'fuzzy'}),
+]
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Seed synthetic records and compare text filter latency with index scans '
+        'disabled (the previous sequential scan) and enabled (trigram indexes).'
+    )
+
+    def run_benchmark(self, options):
+        repeat = options['repeat']
+        for label, params in FILTER_CASES:
+            queryset = BiodiversityRecordFilter(params, queryset=BiodiversityRecord.objects.all()).qs
+
+            self.set_index_scans(False)
+            sequential = self.report(f'{label}, sequential scan', queryset, repeat)
+            self.set_index_scans(True)
+            indexed = self.report(f'{label}, trigram index', queryset, repeat)
+
+            self.stdout.write(self.style.SUCCESS(
+                f'{label}: {sequential:.2f} ms -> {indexed:.2f} ms'
+            ))
+
+    def set_index_scans(self, enabled):
+        value = 'on' if enabled else 'off'
+        with connection.cursor() as cursor:
+            for setting in ('enable_indexscan', 'enable_bitmapscan', 'enable_indexonlyscan'):
+                cursor.execute(f'SET LOCAL {setting} = {value}')
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from bionexus_gaia.apps.biodiversity.benchmarks import BenchmarkCommand, best_time
+from bionexus_gaia.apps.biodiversity.models import BiodiversityRecord
+from bionexus_gaia.apps.biodiversity.serializers import BiodiversityRecordSerializer
+
+PAGE_SIZES = [20, 100, 500]
+
+# A typical map/list client: enough to place and label a marker
+SPARSE_FIELDS = 'id,species_name,common_name,latitude,longitude,observation_date,thumbnail_url'
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Seed synthetic records and compare payload size and fetch plus '
+        'serialization time of full records against a sparse fieldset.'
+    )
+    default_rows = 10000
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--fields',
+            default=SPARSE_FIELDS,
+            help='Comma-separated fieldset for the sparse case.'
+        )
+
+    def run_benchmark(self, options):
+        factory = RequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        for page_size in PAGE_SIZES:
+            full = self.measure(factory.get('/'), page_size, options['repeat'])
+            sparse = self.measure(factory.get('/', {'fields': options['fields']}), page_size, options['repeat'])
+            self.stdout.write(
+                f'\npage size {page_size}:\n'
+                f'  payload: {full[0]} -> {sparse[0]} bytes\n'
+                f'  time:    {full[1]:.2f} -> {sparse[1]:.2f} ms'
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'page size {page_size}: {1 - sparse[0] / full[0]:.0%} smaller, '
+                f'{full[1] / sparse[1]:.1f}x faster'
+            ))
+
+    def measure(self, django_request, page_size, repeat):
+        """
+        Return ``(bytes, ms)`` for fetching, serializing and rendering one page.
+        """
+        request = Request(django_request)
+        queryset = BiodiversityRecord.objects.order_by('-observation_date', '-id')
+
+        def render():
+            serializer = BiodiversityRecordSerializer(many=True, context={'request': request})
+            page = list(serializer.child.restrict_queryset(queryset)[:page_size])
+            serializer.instance = page
+            return JSONRenderer().render(serializer.data)
+
+        payload = render()
+        return len(payload), best_time(render, repeat=repeat)
@@ -0,0 +1,42 @@
+from django.contrib.gis.db.models import PointField
+from django.contrib.gis.db.models.functions import GeometryDistance
+from django.contrib.gis.geos import Point, Polygon
+from django.contrib.gis.measure import Distance
+from django.db.models import Value
+
+from bionexus_gaia.apps.biodiversity.benchmarks import BenchmarkCommand
+from bionexus_gaia.apps.biodiversity.models import BiodiversityRecord, location_geometry
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Seed synthetic records and show that radius, bounding-box and nearest-N '
+        'queries are served by the GiST indexes on location.'
+    )
+    default_rows = 1000000
+
+    def run_benchmark(self, options):
+        repeat = options['repeat']
+        point = Point(36.8219, -1.2921, srid=4326)
+        records = BiodiversityRecord.objects.all()
+
+        self.report(
+            'Radius (50 km)',
+            records.filter(location__distance_lte=(point, Distance(km=50))),
+            repeat
+        )
+
+        bbox = Polygon.from_bbox((33.9, -4.7, 41.9, 5.0))
+        bbox.srid = 4326
+        self.report(
+            'Bounding box (Kenya)',
+            records.alias(location_geom=location_geometry()).filter(location_geom__bboverlaps=bbox),
+            repeat
+        )
+
+        geography_point = Value(point, output_field=PointField(geography=True, srid=4326))
+        self.report(
+            'Nearest 10 (KNN)',
+            records.order_by(GeometryDistance('location', geography_point))[:10],
+            repeat
+        )
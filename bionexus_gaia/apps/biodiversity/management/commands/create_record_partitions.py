@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from bionexus_gaia.apps.biodiversity.partitions import INTERVALS, ensure_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        'Create observation_date partitions of the biodiversity records table '
+        'ahead of time, and for any period whose rows landed in the default '
+        'partition. Run it regularly, e.g. monthly from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead',
+            type=int,
+            default=2,
+            help='Number of future intervals to create partitions for (default: 2).'
+        )
+        parser.add_argument(
+            '--interval',
+            choices=INTERVALS,
+            default='year',
+            help='Range covered by each new partition (default: year).'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Record partitioning requires PostgreSQL.')
+        created = ensure_partitions(ahead=options['ahead'], interval=options['interval'])
+        for name in created:
+            self.stdout.write(f'Created partition {name}')
+        self.stdout.write(self.style.SUCCESS(f'Created {len(created)} partitions.'))
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from bionexus_gaia.apps.biodiversity.duplicates import record_windows, regroup_window
+from bionexus_gaia.apps.biodiversity.models import BiodiversityRecord
+from bionexus_gaia.apps.biodiversity.signals import records_regrouped, records_updated
+
+
+class Command(BaseCommand):
+    help = (
+        'Regroup near-duplicate observations one observation_date window at a '
+        'time, moving the counts of regrouped records in the derived tables.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window-hours',
+            type=int,
+            default=24,
+            help='Hours of observations regrouped per transaction (default: 24).'
+        )
+        parser.add_argument(
+            '--since',
+            help='Only regroup records observed on or after this date (YYYY-MM-DD).'
+        )
+
+    def handle(self, *args, **options):
+        if options['window_hours'] < 1:
+            raise CommandError('--window-hours must be at least 1.')
+        since = None
+        if options['since']:
+            day = parse_date(options['since'])
+            if day is None:
+                raise CommandError('--since must be a date in YYYY-MM-DD format.')
+            since = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+        examined = regrouped = 0
+        for start, end in record_windows(timedelta(hours=options['window_hours']), since):
+            with transaction.atomic():
+                count, changed, flipped = regroup_window(start, end)
+                if changed:
+                    records_updated.send(sender=BiodiversityRecord, records=changed)
+                if flipped:
+                    records_regrouped.send(sender=BiodiversityRecord, records=flipped)
+            examined += count
+            regrouped += len(changed)
+            self.stdout.write(f'{start:%Y-%m-%d %H:%M}: {count} records, {len(changed)} regrouped')
+
+        self.stdout.write(self.style.SUCCESS(f'Examined {examined} records and regrouped {regrouped}.'))
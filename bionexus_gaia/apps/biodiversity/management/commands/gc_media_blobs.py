@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from bionexus_gaia.apps.biodiversity.blobs import collect_orphans
+
+
+class Command(BaseCommand):
+    help = 'Delete content-addressed media files that no record or upload references any more.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of blobs deleted per transaction (default: 500).'
+        )
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=24,
+            help='Only delete blobs unreferenced for at least this long (default: 24).'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report the first batch that would be deleted without deleting it.'
+        )
+
+    def handle(self, *args, **options):
+        grace = timedelta(hours=options['grace_hours'])
+        total_deleted = 0
+        total_freed = 0
+        while True:
+            deleted, freed = collect_orphans(
+                grace=grace,
+                batch_size=options['batch_size'],
+                dry_run=options['dry_run']
+            )
+            total_deleted += deleted
+            total_freed += freed
+            if options['dry_run'] or deleted < options['batch_size']:
+                break
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {total_deleted} media blobs ({filesizeformat(total_freed)}).'
+        ))
@@ -0,0 +1,93 @@
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from bionexus_gaia.apps.biodiversity.imports import IMPORT_CHUNK_SIZE, claim_import, run_import
+from bionexus_gaia.apps.biodiversity.models import OccurrenceImport
+
+
+class Command(BaseCommand):
+    help = (
+        'Load CSV or Darwin Core occurrence files into the records table with '
+        'COPY. Imports commit chunk by chunk and resume where they stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help='Occurrence file to import.')
+        parser.add_argument('--owner', help='Username the imported records are attributed to.')
+        parser.add_argument('--source-name', help='Dataset name scoping occurrence ids (default: file name).')
+        parser.add_argument('--private', action='store_true', help='Import the records as not public.')
+        parser.add_argument('--resume', metavar='IMPORT_ID', help='Continue a failed or interrupted import.')
+        parser.add_argument('--queued', action='store_true', help='Run imports queued through the API.')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help=f'Lines loaded per transaction (default: {IMPORT_CHUNK_SIZE}).'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Occurrence imports require PostgreSQL.')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+
+        if options['queued']:
+            while True:
+                occurrence_import = claim_import()
+                if occurrence_import is None:
+                    return
+                self._run(occurrence_import, options['chunk_size'])
+
+        if options['resume']:
+            try:
+                occurrence_import = OccurrenceImport.objects.get(pk=options['resume'])
+            except (OccurrenceImport.DoesNotExist, ValueError):
+                raise CommandError(f"No import {options['resume']}.")
+            if occurrence_import.status == OccurrenceImport.SUCCEEDED:
+                raise CommandError('That import has already finished.')
+        else:
+            occurrence_import = self._create(options)
+        self._run(occurrence_import, options['chunk_size'])
+
+    def _create(self, options):
+        if not options['path'] or not options['owner']:
+            raise CommandError('Pass a file and --owner, or --resume or --queued.')
+        try:
+            owner = get_user_model().objects.get(username=options['owner'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user {options['owner']}.")
+        name = os.path.basename(options['path'])
+        with open(options['path'], 'rb') as handle:
+            occurrence_import = OccurrenceImport(
+                owner=owner,
+                source_name=options['source_name'] or name,
+                is_public=not options['private'],
+                file_size=os.fstat(handle.fileno()).st_size,
+            )
+            occurrence_import.file.save(name, File(handle), save=False)
+        occurrence_import.save()
+        self.stdout.write(f'Created import {occurrence_import.pk}')
+        return occurrence_import
+
+    def _progress(self, occurrence_import):
+        percent = 100 * occurrence_import.offset / occurrence_import.file_size if occurrence_import.file_size else 0
+        self.stdout.write(
+            f'{percent:5.1f}%  {occurrence_import.rows_imported} imported, '
+            f'{occurrence_import.rows_skipped} already present, {occurrence_import.rows_rejected} rejected'
+        )
+
+    def _run(self, occurrence_import, chunk_size):
+        try:
+            occurrence_import = run_import(occurrence_import, chunk_size, progress=self._progress)
+        except Exception as exc:
+            raise CommandError(
+                f'Import {occurrence_import.pk} failed: {exc}. Resume it with --resume {occurrence_import.pk}.'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Import {occurrence_import.pk}: {occurrence_import.rows_imported} records imported, '
+            f'{occurrence_import.rows_skipped} already present, {occurrence_import.rows_rejected} rejected.'
+        ))
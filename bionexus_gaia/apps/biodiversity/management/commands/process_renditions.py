@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bionexus_gaia.apps.biodiversity.renditions import process_pending_renditions
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate thumbnail, medium and WebP renditions for records whose image '
+        'changed. Several workers can run at once; each claims its own batch.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=20,
+            help='Number of records claimed per transaction (default: 20).'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new work instead of exiting when the queue is empty.'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls of an empty queue with --loop (default: 5).'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed, failed = process_pending_renditions(options['batch_size'])
+            total += len(processed)
+            for record_id, error in failed:
+                self.stderr.write(self.style.WARNING(f'Could not render record {record_id}: {error}'))
+            if processed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'Processed renditions for {total} records.'))
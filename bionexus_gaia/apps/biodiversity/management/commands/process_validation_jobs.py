@@ -0,0 +1,52 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+
+from bionexus_gaia.apps.biodiversity.validation import run_once
+
+
+class Command(BaseCommand):
+    help = (
+        'Process queued record validations. Any number of workers can run at '
+        'once; each claims its own jobs with SKIP LOCKED.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Number of jobs claimed, and anchored together, per round (default: 100).'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new jobs instead of exiting when none are due.'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls when no job is due, with --loop (default: 2).'
+        )
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        succeeded_total = 0
+        failed_total = 0
+        while True:
+            succeeded, failed = run_once(options['batch_size'], worker)
+            succeeded_total += len(succeeded)
+            failed_total += len(failed)
+            for job in failed:
+                self.stderr.write(self.style.WARNING(f'Validation of {job.record_id} will be retried or has failed.'))
+            if succeeded or failed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Validated {succeeded_total} records; {failed_total} attempts failed.'
+        ))
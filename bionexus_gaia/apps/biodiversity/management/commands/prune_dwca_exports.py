@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from bionexus_gaia.apps.biodiversity.dwca import prune_artifacts
+
+
+class Command(BaseCommand):
+    help = 'Delete stored Darwin Core Archive exports older than the given age.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=7,
+            help='Age in days after which stored archives are deleted (default: 7).'
+        )
+
+    def handle(self, *args, **options):
+        pruned = prune_artifacts(timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f'Deleted {pruned} stored archives.'))
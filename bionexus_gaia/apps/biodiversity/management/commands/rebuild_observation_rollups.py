@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from bionexus_gaia.apps.biodiversity.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the observation rollup table from all biodiversity records.'
+
+    def handle(self, *args, **options):
+        written = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} observation rollup rows.'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from bionexus_gaia.apps.biodiversity.summaries import rebuild_species_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the species summary table from all biodiversity records.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of summary rows written per insert (default: 1000).'
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_species_summaries(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt summaries for {written} species.'))
@@ -0,0 +1,52 @@
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+
+from bionexus_gaia.apps.biodiversity.heatmaps import ensure_grids, refresh_grids
+from bionexus_gaia.apps.biodiversity.models import HeatmapGrid
+
+
+class Command(BaseCommand):
+    help = (
+        'Bin public records into the observation density heatmaps. Existing '
+        'grids only add records created since their last refresh unless --full '
+        'is given; run a full rebuild periodically to reflect edits and deletes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--species',
+            action='append',
+            default=[],
+            help='Also build grids for this species; may be repeated.'
+        )
+        parser.add_argument(
+            '--genus',
+            action='append',
+            default=[],
+            help='Also build grids for this genus; may be repeated.'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild every grid from all records.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=50000,
+            help='Number of record locations binned at a time (default: 50000).'
+        )
+
+    def handle(self, *args, **options):
+        ensure_grids()
+        for name in options['species']:
+            ensure_grids('species', name)
+        for name in options['genus']:
+            ensure_grids('genus', name)
+
+        grids = HeatmapGrid.objects.order_by('rank', 'taxon', 'level')
+        for (rank, taxon), group in groupby(grids, key=lambda grid: (grid.rank, grid.taxon)):
+            binned = refresh_grids(list(group), full=options['full'], chunk_size=options['chunk_size'])
+            self.stdout.write(f'{taxon or "all records"}: binned {binned} records')
+        self.stdout.write(self.style.SUCCESS('Heatmaps refreshed.'))
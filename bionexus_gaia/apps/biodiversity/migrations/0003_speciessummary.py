@@ -0,0 +1,70 @@
+# Generated by Django 4.2.11 on 2026-10-17 09:12
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Q
+import django.db.models.functions.text
+
+
+def populate_species_summary(apps, schema_editor):
+    BiodiversityRecord = apps.get_model('biodiversity', 'BiodiversityRecord')
+    SpeciesSummary = apps.get_model('biodiversity', 'SpeciesSummary')
+
+    rows = BiodiversityRecord.objects.exclude(species_name='').annotate(
+        normalized_name=django.db.models.functions.text.Lower('species_name')
+    ).values('normalized_name').annotate(
+        display_name=Min('species_name'),
+        display_common_name=Max('common_name'),
+        observation_count=Count('id'),
+        verified_count=Count('id', filter=Q(is_verified=True)),
+        first_seen=Min('observation_date'),
+        last_seen=Max('observation_date'),
+    ).order_by()
+
+    SpeciesSummary.objects.bulk_create(
+        [
+            SpeciesSummary(
+                normalized_name=row['normalized_name'],
+                species_name=row['display_name'],
+                common_name=row['display_common_name'] or '',
+                observation_count=row['observation_count'],
+                verified_count=row['verified_count'],
+                first_seen=row['first_seen'],
+                last_seen=row['last_seen'],
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biodiversity', '0002_alter_biodiversityrecord_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpeciesSummary',
+            fields=[
+                ('normalized_name', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('species_name', models.CharField(max_length=255)),
+                ('common_name', models.CharField(blank=True, max_length=255)),
+                ('observation_count', models.PositiveIntegerField(default=0)),
+                ('verified_count', models.PositiveIntegerField(default=0)),
+                ('first_seen', models.DateTimeField(blank=True, null=True)),
+                ('last_seen', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'species summaries',
+                'ordering': ['species_name'],
+                'indexes': [models.Index(fields=['species_name'], name='biodiversit_species_806657_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='biodiversityrecord',
+            index=models.Index(django.db.models.functions.text.Lower('species_name'), name='biodiv_species_lower_idx'),
+        ),
+        migrations.RunPython(populate_species_summary, migrations.RunPython.noop),
+    ]
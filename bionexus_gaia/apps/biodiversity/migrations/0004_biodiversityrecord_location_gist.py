@@ -0,0 +1,30 @@
+# Generated by Django 4.2.11 on 2026-10-17 11:20
+
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.indexes
+from django.db import migrations
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biodiversity', '0003_speciessummary'),
+    ]
+
+    operations = [
+        # Replace the implicit spatial index with explicitly named ones
+        migrations.AlterField(
+            model_name='biodiversityrecord',
+            name='location',
+            field=django.contrib.gis.db.models.fields.PointField(geography=True, spatial_index=False, srid=4326),
+        ),
+        migrations.AddIndex(
+            model_name='biodiversityrecord',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['location'], name='biodiv_location_gist'),
+        ),
+        migrations.AddIndex(
+            model_name='biodiversityrecord',
+            index=django.contrib.postgres.indexes.GistIndex(django.db.models.functions.comparison.Cast('location', output_field=django.contrib.gis.db.models.fields.GeometryField(srid=4326)), name='biodiv_location_geom_gist'),
+        ),
+    ]
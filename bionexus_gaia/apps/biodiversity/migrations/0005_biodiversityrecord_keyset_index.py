@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-17 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biodiversity', '0004_biodiversityrecord_location_gist'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='biodiversityrecord',
+            index=models.Index(fields=['observation_date', 'id'], name='biodiversit_observa_839dd7_idx'),
+        ),
+    ]
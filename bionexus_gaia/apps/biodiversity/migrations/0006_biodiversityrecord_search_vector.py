@@ -0,0 +1,44 @@
+# Generated by Django 4.2.11 on 2026-10-17 12:40
+
+from django.db import migrations
+
+# The generated column is maintained by PostgreSQL and deliberately not
+# declared on the model; see biodiversity.search. Other databases keep the
+# icontains search, so nothing is created there.
+ADD_SEARCH_VECTOR = """
+    ALTER TABLE biodiversity_biodiversityrecord
+    ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple'::regconfig, coalesce(species_name, '')), 'A') ||
+        setweight(to_tsvector('simple'::regconfig, coalesce(common_name, '')), 'B') ||
+        setweight(to_tsvector('simple'::regconfig, coalesce(notes, '')), 'C') ||
+        setweight(to_tsvector('simple'::regconfig, coalesce(location_name, '')), 'D')
+    ) STORED;
+    CREATE INDEX biodiv_search_vector_gin
+    ON biodiversity_biodiversityrecord USING gin (search_vector);
+"""
+
+DROP_SEARCH_VECTOR = """
+    DROP INDEX IF EXISTS biodiv_search_vector_gin;
+    ALTER TABLE biodiversity_biodiversityrecord DROP COLUMN IF EXISTS search_vector;
+"""
+
+
+def add_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(ADD_SEARCH_VECTOR)
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEARCH_VECTOR)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biodiversity', '0005_biodiversityrecord_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vector, drop_search_vector),
+    ]
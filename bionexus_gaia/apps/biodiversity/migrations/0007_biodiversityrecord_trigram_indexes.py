@@ -0,0 +1,29 @@
+# Generated by Django 4.2.11 on 2026-10-17 13:05
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biodiversity', '0006_biodiversityrecord_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='biodiversityrecord',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('species_name'), name='gin_trgm_ops'), name='biodiv_species_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='biodiversityrecord',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('common_name'), name='gin_trgm_ops'), name='biodiv_common_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='biodiversityrecord',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('location_name'), name='gin_trgm_ops'), name='biodiv_location_name_trgm'),
+        ),
+    ]
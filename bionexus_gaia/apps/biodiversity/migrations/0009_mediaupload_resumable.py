@@ -0,0 +1,44 @@
+# Generated by Django 4.2.11 on 2026-10-17 14:20
+
+import bionexus_gaia.apps.biodiversity.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biodiversity', '0008_mediaupload'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mediaupload',
+            name='file',
+            field=models.FileField(blank=True, upload_to=bionexus_gaia.apps.biodiversity.models.media_upload_path),
+        ),
+        migrations.AddField(
+            model_name='mediaupload',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('complete', 'Complete')], default='complete', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='mediaupload',
+            name='filename',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='mediaupload',
+            name='total_size',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mediaupload',
+            name='received_bytes',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='mediaupload',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
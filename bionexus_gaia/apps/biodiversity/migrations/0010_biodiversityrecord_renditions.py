@@ -0,0 +1,32 @@
+# Generated by Django 4.2.11 on 2026-10-17 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biodiversity', '0009_mediaupload_resumable'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='biodiversityrecord',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='biodiversityrecord',
+            name='renditions_pending',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='biodiversityrecord',
+            index=models.Index(condition=models.Q(('renditions_pending', True)), fields=['renditions_pending'], name='biodiv_renditions_pending_idx'),
+        ),
+        # Queue renditions for records that already have an image
+        migrations.RunSQL(
+            sql="UPDATE biodiversity_biodiversityrecord SET renditions_pending = true WHERE image IS NOT NULL AND image <> ''",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
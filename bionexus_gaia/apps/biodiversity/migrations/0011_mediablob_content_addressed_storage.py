@@ -0,0 +1,49 @@
+# Generated by Django 4.2.11 on 2026-10-17 15:50
+
+import bionexus_gaia.apps.biodiversity.models
+import bionexus_gaia.apps.biodiversity.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biodiversity', '0010_biodiversityrecord_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('size', models.BigIntegerField(default=0)),
+                ('ref_count', models.IntegerField(default=0)),
+                ('orphaned_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('ref_count__lte', 0)), fields=['orphaned_at'], name='biodiv_mediablob_orphan_idx')],
+            },
+        ),
+        migrations.AlterField(
+            model_name='biodiversityrecord',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=bionexus_gaia.apps.biodiversity.storage.ContentAddressedStorage(), upload_to='biodiversity/images/'),
+        ),
+        migrations.AlterField(
+            model_name='biodiversityrecord',
+            name='audio',
+            field=models.FileField(blank=True, null=True, storage=bionexus_gaia.apps.biodiversity.storage.ContentAddressedStorage(), upload_to='biodiversity/audio/'),
+        ),
+        migrations.AlterField(
+            model_name='biodiversityrecord',
+            name='video',
+            field=models.FileField(blank=True, null=True, storage=bionexus_gaia.apps.biodiversity.storage.ContentAddressedStorage(), upload_to='biodiversity/videos/'),
+        ),
+        migrations.AlterField(
+            model_name='mediaupload',
+            name='file',
+            field=models.FileField(blank=True, storage=bionexus_gaia.apps.biodiversity.storage.ContentAddressedStorage(), upload_to=bionexus_gaia.apps.biodiversity.models.media_upload_path),
+        ),
+    ]
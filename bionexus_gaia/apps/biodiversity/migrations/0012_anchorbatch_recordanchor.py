@@ -0,0 +1,45 @@
+# Generated by Django 4.2.11 on 2026-10-17 16:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biodiversity', '0011_mediablob_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnchorBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('merkle_root', models.CharField(max_length=64)),
+                ('tx_hash', models.CharField(db_index=True, max_length=66)),
+                ('backend', models.CharField(max_length=50)),
+                ('record_count', models.PositiveIntegerField()),
+                ('anchored_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'anchor batches',
+                'ordering': ['-anchored_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RecordAnchor',
+            fields=[
+                ('record', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='anchor', serialize=False, to='biodiversity.biodiversityrecord')),
+                ('leaf_hash', models.CharField(blank=True, max_length=64)),
+                ('leaf_index', models.PositiveIntegerField(blank=True, null=True)),
+                ('proof', models.JSONField(blank=True, default=list)),
+                ('requested_at', models.DateTimeField(auto_now_add=True)),
+                ('anchored_at', models.DateTimeField(blank=True, null=True)),
+                ('batch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='anchors', to='biodiversity.anchorbatch')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='recordanchor',
+            index=models.Index(condition=models.Q(('batch__isnull', True)), fields=['requested_at'], name='biodiv_anchor_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.11 on 2026-10-17 17:35
+
+from django.db import migrations, models
+
+
+POPULATE_SQL = """
+    INSERT INTO {table}
+        (period, period_start, species_key, species_name, cell_x, cell_y, count, verified_count)
+    SELECT period, date_trunc(period, observation_date AT TIME ZONE 'UTC')::date,
+           lower(species_name), MIN(species_name), {cell_x}, {cell_y},
+           COUNT(*), COUNT(*) FILTER (WHERE is_verified)
+    FROM {records} CROSS JOIN (VALUES ('day'), ('week'), ('month')) AS periods (period)
+    WHERE is_public
+    GROUP BY 1, 2, 3, 5, 6
+"""
+
+
+def populate_rollups(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote_name = schema_editor.connection.ops.quote_name
+    ObservationRollup = apps.get_model('biodiversity', 'ObservationRollup')
+    BiodiversityRecord = apps.get_model('biodiversity', 'BiodiversityRecord')
+    table = quote_name(ObservationRollup._meta.db_table)
+    records = quote_name(BiodiversityRecord._meta.db_table)
+    # Totals, then the default one-degree grid; rebuild_observation_rollups
+    # recomputes them for another ROLLUP_GRID_DEGREES
+    for cell_x, cell_y in [
+        ('-1', '-1'),
+        (
+            'LEAST(359, GREATEST(0, floor(ST_X(location::geometry) + 180)))::integer',
+            'LEAST(179, GREATEST(0, floor(ST_Y(location::geometry) + 90)))::integer',
+        ),
+    ]:
+        schema_editor.execute(POPULATE_SQL.format(table=table, records=records, cell_x=cell_x, cell_y=cell_y))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biodiversity', '0013_validationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ObservationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('species_key', models.CharField(max_length=255)),
+                ('species_name', models.CharField(blank=True, max_length=255)),
+                ('cell_x', models.IntegerField()),
+                ('cell_y', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('verified_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'period_start'], name='biodiv_rollup_period_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='observationrollup',
+            constraint=models.UniqueConstraint(fields=('period', 'species_key', 'cell_x', 'cell_y', 'period_start'), name='unique_observation_rollup'),
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.11 on 2026-10-17 17:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biodiversity', '0014_observationrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeatmapGrid',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.CharField(blank=True, choices=[('', 'All records'), ('species', 'Species'), ('genus', 'Genus')], max_length=10)),
+                ('taxon', models.CharField(blank=True, max_length=255)),
+                ('level', models.PositiveSmallIntegerField()),
+                ('watermark', models.DateTimeField(blank=True, null=True)),
+                ('record_count', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['rank', 'taxon', 'level'],
+            },
+        ),
+        migrations.CreateModel(
+            name='HeatmapTile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tile_x', models.PositiveIntegerField()),
+                ('tile_y', models.PositiveIntegerField()),
+                ('digest', models.CharField(max_length=64)),
+                ('file_name', models.CharField(max_length=255)),
+                ('total', models.BigIntegerField(default=0)),
+                ('max_count', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('grid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tiles', to='biodiversity.heatmapgrid')),
+            ],
+            options={
+                'ordering': ['grid', 'tile_y', 'tile_x'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='heatmapgrid',
+            constraint=models.UniqueConstraint(fields=('rank', 'taxon', 'level'), name='unique_heatmap_grid'),
+        ),
+        migrations.AddConstraint(
+            model_name='heatmaptile',
+            constraint=models.UniqueConstraint(fields=('grid', 'tile_x', 'tile_y'), name='unique_heatmap_tile'),
+        ),
+    ]
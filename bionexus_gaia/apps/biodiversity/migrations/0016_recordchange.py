@@ -0,0 +1,69 @@
+# Generated by Django 4.2.11 on 2026-10-17 18:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BACKFILL_SQL = """
+    INSERT INTO {table}
+        (record_id, contributor_id, action, is_public, was_public, txid, seq, changed_at)
+    SELECT id, contributor_id, 'upsert', is_public, is_public, txid_current(),
+           nextval('biodiversity_recordchange_seq'), now()
+    FROM (SELECT * FROM {records} ORDER BY created_at, id) AS records
+"""
+
+
+def create_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE SEQUENCE IF NOT EXISTS biodiversity_recordchange_seq')
+
+
+def drop_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP SEQUENCE IF EXISTS biodiversity_recordchange_seq')
+
+
+def backfill_changes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote_name = schema_editor.connection.ops.quote_name
+    RecordChange = apps.get_model('biodiversity', 'RecordChange')
+    BiodiversityRecord = apps.get_model('biodiversity', 'BiodiversityRecord')
+    # Existing records enter the log once, so a first sync from no cursor is complete
+    schema_editor.execute(BACKFILL_SQL.format(
+        table=quote_name(RecordChange._meta.db_table),
+        records=quote_name(BiodiversityRecord._meta.db_table),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('biodiversity', '0015_heatmapgrid_heatmaptile'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_sequence, drop_sequence),
+        migrations.CreateModel(
+            name='RecordChange',
+            fields=[
+                ('record_id', models.UUIDField(primary_key=True, serialize=False)),
+                ('action', models.CharField(choices=[('upsert', 'Created or updated'), ('deleted', 'Deleted')], max_length=10)),
+                ('is_public', models.BooleanField()),
+                ('was_public', models.BooleanField()),
+                ('txid', models.BigIntegerField()),
+                ('seq', models.BigIntegerField(unique=True)),
+                ('changed_at', models.DateTimeField()),
+                ('contributor', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['txid', 'seq'],
+                'indexes': [models.Index(fields=['txid', 'seq'], name='biodiv_change_cursor_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_changes, migrations.RunPython.noop),
+    ]
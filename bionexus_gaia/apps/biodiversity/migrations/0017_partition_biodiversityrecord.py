@@ -0,0 +1,117 @@
+# Generated by Django 4.2.11 on 2026-10-17 18:32
+
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+TABLE = 'biodiversity_biodiversityrecord'
+OLD_TABLE = 'biodiversity_biodiversityrecord_unpartitioned'
+
+
+def partition_records(apps, schema_editor):
+    """
+    Move records into a table range-partitioned by observation_date: one
+    partition per UTC year from the oldest record to next year, and a default
+    partition for dates outside them. Indexes, including the search_vector
+    column's, are recreated on the partitioned table under the same names.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote_name = schema_editor.connection.ops.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'", [TABLE]
+        )
+        (primary_key,) = cursor.fetchone()
+        cursor.execute(
+            'SELECT indexname, indexdef FROM pg_indexes '
+            'WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s',
+            [TABLE, primary_key]
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLE]
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(
+            "SELECT attname FROM pg_attribute WHERE attrelid = %s::regclass "
+            "AND attnum > 0 AND NOT attisdropped AND attgenerated = '' ORDER BY attnum",
+            [TABLE]
+        )
+        columns = ', '.join(quote_name(name) for (name,) in cursor.fetchall())
+        cursor.execute(
+            "SELECT extract(year FROM min(observation_date) AT TIME ZONE 'UTC')::integer, "
+            "extract(year FROM max(observation_date) AT TIME ZONE 'UTC')::integer "
+            f"FROM {quote_name(TABLE)}"
+        )
+        first_year, last_year = cursor.fetchone()
+
+    this_year = timezone.now().year
+    first_year = min(first_year or this_year, this_year)
+    last_year = max(last_year or this_year, this_year + 1)
+
+    table = quote_name(TABLE)
+    old_table = quote_name(OLD_TABLE)
+    statements = [
+        f'ALTER TABLE {table} RENAME TO {old_table}',
+        f'ALTER TABLE {old_table} RENAME CONSTRAINT {quote_name(primary_key)} TO {quote_name(OLD_TABLE + "_pkey")}',
+    ]
+    # Free the names for the partitioned table
+    statements += [f'DROP INDEX {quote_name(name)}' for name, _ in indexes]
+    statements += [f'ALTER TABLE {old_table} DROP CONSTRAINT {quote_name(name)}' for name, _ in foreign_keys]
+    statements += [
+        f'CREATE TABLE {table} (LIKE {old_table} INCLUDING DEFAULTS INCLUDING GENERATED '
+        f'INCLUDING CONSTRAINTS INCLUDING STORAGE INCLUDING COMMENTS) PARTITION BY RANGE (observation_date)',
+        # The partition key has to be part of every unique index
+        f'ALTER TABLE {table} ADD CONSTRAINT {quote_name(primary_key)} PRIMARY KEY (id, observation_date)',
+    ]
+    statements += [
+        f'ALTER TABLE {table} ADD CONSTRAINT {quote_name(name)} {definition}'
+        for name, definition in foreign_keys
+    ]
+    statements += [
+        f"CREATE TABLE {quote_name(f'{TABLE}_y{year}')} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{year}-01-01 00:00:00+00') TO ('{year + 1}-01-01 00:00:00+00')"
+        for year in range(first_year, last_year + 1)
+    ]
+    statements += [
+        f"CREATE TABLE {quote_name(f'{TABLE}_default')} PARTITION OF {table} DEFAULT",
+        f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {old_table}',
+        f'DROP TABLE {old_table}',
+    ]
+    # Built after the copy; each definition names the table, now the partitioned one
+    statements += [definition for _, definition in indexes]
+    statements.append(f'ANALYZE {table}')
+
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biodiversity', '0016_recordchange'),
+        ('ai', '0002_alter_identificationfeedback_biodiversity_record'),
+        ('citizen', '0004_alter_citizenobservation_biodiversity_record'),
+    ]
+
+    operations = [
+        # A partitioned table cannot have a unique index on id alone, which
+        # foreign key constraints need; Django still cascades deletes
+        migrations.AlterField(
+            model_name='recordanchor',
+            name='record',
+            field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='anchor', serialize=False, to='biodiversity.biodiversityrecord'),
+        ),
+        migrations.AlterField(
+            model_name='validationjob',
+            name='record',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='validation_jobs', to='biodiversity.biodiversityrecord'),
+        ),
+        # The partitioned table keeps the model's columns and index names, so
+        # earlier schema states are served by it unchanged. There is no
+        # reverse: unpartitioning needs a manual copy back into a plain table
+        migrations.RunPython(partition_records),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.11 on 2026-10-17 18:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biodiversity', '0017_partition_biodiversityrecord'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='biodiversityrecord',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='duplicates', to='biodiversity.biodiversityrecord'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.11 on 2026-10-17 21:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biodiversity', '0019_occurrenceimport'),
+    ]
+
+    operations = [
+        # Batches written before this migration were anchored when created
+        migrations.AddField(
+            model_name='anchorbatch',
+            name='status',
+            field=models.CharField(choices=[('claimed', 'Claimed'), ('anchored', 'Anchored')], default='anchored', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='anchorbatch',
+            name='status',
+            field=models.CharField(choices=[('claimed', 'Claimed'), ('anchored', 'Anchored')], default='claimed', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='anchorbatch',
+            name='claimed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='anchorbatch',
+            name='tx_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=66),
+        ),
+        migrations.AlterField(
+            model_name='anchorbatch',
+            name='anchored_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
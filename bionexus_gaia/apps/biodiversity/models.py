@@ -1,14 +1,36 @@
 import uuid
 from django.db import models
+from django.utils import timezone
+from django.db.models.functions import Cast, Lower, Upper
 from django.contrib.gis.db import models as gis_models
+from django.contrib.postgres.indexes import GinIndex, GistIndex, OpClass
 from django.contrib.auth import get_user_model
 
+from .storage import media_storage
+
 User = get_user_model()
 
+
+def location_geometry():
+    """
+    ``location`` cast to geometry, matching the functional GiST index used for
+    bounding-box filters (geometry ``&&`` is cheaper than geography's).
+    """
+    return Cast('location', output_field=gis_models.GeometryField(srid=4326))
+
+
+def media_upload_path(instance, filename):
+    return f"{MediaUpload.UPLOAD_DIRECTORIES[instance.kind]}/{filename}"
+
+
 class BiodiversityRecord(models.Model):
     """
     Model for storing biodiversity observations with geospatial data, media files,
     and blockchain verification metadata.
+    
+    On PostgreSQL the table is range-partitioned by ``observation_date`` (see
+    partitions.py), so its primary key is ``(id, observation_date)`` and
+    foreign keys to records are not enforced by the database.
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     contributor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='biodiversity_records')
@@ -16,12 +38,16 @@ class BiodiversityRecord(models.Model):
     common_name = models.CharField(max_length=255, blank=True)
     
     # Media files
-    image = models.ImageField(upload_to='biodiversity/images/', blank=True, null=True)
-    audio = models.FileField(upload_to='biodiversity/audio/', blank=True, null=True)
-    video = models.FileField(upload_to='biodiversity/videos/', blank=True, null=True)
+    image = models.ImageField(upload_to='biodiversity/images/', storage=media_storage, blank=True, null=True)
+    audio = models.FileField(upload_to='biodiversity/audio/', storage=media_storage, blank=True, null=True)
+    video = models.FileField(upload_to='biodiversity/videos/', storage=media_storage, blank=True, null=True)
+    
+    # Derived image renditions (name -> storage path), generated by a worker
+    renditions = models.JSONField(default=dict, blank=True)
+    renditions_pending = models.BooleanField(default=False)
     
     # Location data (PostGIS)
-    location = gis_models.PointField(geography=True)
+    location = gis_models.PointField(geography=True, spatial_index=False)
     location_name = models.CharField(max_length=255, blank=True)
     
     # Metadata
@@ -35,6 +61,16 @@ class BiodiversityRecord(models.Model):
     blockchain_hash = models.CharField(max_length=66, blank=True)
     is_verified = models.BooleanField(default=False)
     
+    # Canonical record of this near-duplicate's group (see duplicates.py)
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='duplicates'
+    )
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -44,10 +80,411 @@ class BiodiversityRecord(models.Model):
         indexes = [
             models.Index(fields=['species_name']),
             models.Index(fields=['observation_date']),
+            models.Index(fields=['observation_date', 'id']),
             models.Index(fields=['contributor']),
             models.Index(fields=['is_verified']),
             models.Index(fields=['is_public']),
+            models.Index(Lower('species_name'), name='biodiv_species_lower_idx'),
+            GistIndex(fields=['location'], name='biodiv_location_gist'),
+            GistIndex(location_geometry(), name='biodiv_location_geom_gist'),
+            # Trigram indexes on UPPER(col), the expression icontains compiles to
+            GinIndex(OpClass(Upper('species_name'), name='gin_trgm_ops'), name='biodiv_species_trgm'),
+            GinIndex(OpClass(Upper('common_name'), name='gin_trgm_ops'), name='biodiv_common_name_trgm'),
+            GinIndex(OpClass(Upper('location_name'), name='gin_trgm_ops'), name='biodiv_location_name_trgm'),
+            # Small partial index for the renditions worker's queue
+            models.Index(
+                fields=['renditions_pending'],
+                condition=models.Q(renditions_pending=True),
+                name='biodiv_renditions_pending_idx'
+            ),
         ]
     
     def __str__(self):
         return f"{self.species_name or 'Unknown'} observed by {self.contributor.username} on {self.observation_date.date()}"
+
+
+class MediaUpload(models.Model):
+    """
+    A media file uploaded ahead of the records that reference it, so bulk
+    ingest and record requests can carry upload ids instead of file bodies.
+    
+    Small files are uploaded in one request. Large audio and video can be
+    sent as a resumable session: created ``pending`` with a ``total_size``,
+    filled with byte ranges, then finalized into ``file``.
+    """
+    KIND_CHOICES = [
+        ('image', 'Image'),
+        ('audio', 'Audio'),
+        ('video', 'Video'),
+    ]
+    
+    # Same directories as the corresponding BiodiversityRecord fields
+    UPLOAD_DIRECTORIES = {
+        'image': 'biodiversity/images',
+        'audio': 'biodiversity/audio',
+        'video': 'biodiversity/videos',
+    }
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('complete', 'Complete'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='media_uploads')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    file = models.FileField(upload_to=media_upload_path, storage=media_storage, blank=True)
+    
+    # Resumable uploads stay pending until every byte has arrived and they are finalized
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='complete')
+    filename = models.CharField(max_length=255, blank=True)
+    total_size = models.BigIntegerField(null=True, blank=True)
+    received_bytes = models.BigIntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.kind} upload {self.id} by {self.owner.username}"
+
+
+class AnchorBatch(models.Model):
+    """
+    A set of records anchored together by writing their Merkle root to a ledger.
+    
+    A batch is first claimed, fixing its records and Merkle tree, and only
+    marked anchored once the root is on the ledger.
+    """
+    CLAIMED = 'claimed'
+    ANCHORED = 'anchored'
+    STATUS_CHOICES = [
+        (CLAIMED, 'Claimed'),
+        (ANCHORED, 'Anchored'),
+    ]
+    
+    merkle_root = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=CLAIMED)
+    tx_hash = models.CharField(max_length=66, blank=True, db_index=True)
+    backend = models.CharField(max_length=50)
+    record_count = models.PositiveIntegerField()
+    claimed_at = models.DateTimeField(default=timezone.now)
+    anchored_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-anchored_at']
+        verbose_name_plural = 'anchor batches'
+    
+    def __str__(self):
+        return f"Batch {self.pk} ({self.record_count} records, root {self.merkle_root[:12]})"
+
+
+class RecordAnchor(models.Model):
+    """
+    A record's place in an AnchorBatch and its Merkle inclusion proof.
+    
+    Rows without a batch are queued for the next anchoring run; the proof
+    only holds once the batch is anchored.
+    """
+    record = models.OneToOneField(
+        BiodiversityRecord,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        db_constraint=False,
+        related_name='anchor'
+    )
+    batch = models.ForeignKey(
+        AnchorBatch,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='anchors'
+    )
+    leaf_hash = models.CharField(max_length=64, blank=True)
+    leaf_index = models.PositiveIntegerField(null=True, blank=True)
+    proof = models.JSONField(default=list, blank=True)
+    requested_at = models.DateTimeField(auto_now_add=True)
+    anchored_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['requested_at'],
+                condition=models.Q(batch__isnull=True),
+                name='biodiv_anchor_pending_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Anchor for {self.record_id}"
+
+
+class ValidationJob(models.Model):
+    """
+    A queued request to validate (anchor) a record, processed by workers.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    record = models.ForeignKey(
+        BiodiversityRecord, on_delete=models.CASCADE, db_constraint=False, related_name='validation_jobs'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Workers only ever scan open jobs
+            models.Index(
+                fields=['status', 'run_after'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='biodiv_validation_open_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Validation of {self.record_id} ({self.status})"
+
+
+class MediaBlob(models.Model):
+    """
+    A content-addressed media file and the number of record and upload fields
+    that reference it. Unreferenced blobs are deleted by ``gc_media_blobs``.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255)
+    size = models.BigIntegerField(default=0)
+    ref_count = models.IntegerField(default=0)
+    orphaned_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['orphaned_at'],
+                condition=models.Q(ref_count__lte=0),
+                name='biodiv_mediablob_orphan_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
+
+
+class SpeciesSummary(models.Model):
+    """
+    Per-species observation statistics, kept up to date from BiodiversityRecord
+    saves and deletes so the species catalogue never scans the records table.
+    """
+    normalized_name = models.CharField(max_length=255, primary_key=True)
+    species_name = models.CharField(max_length=255)
+    common_name = models.CharField(max_length=255, blank=True)
+    observation_count = models.PositiveIntegerField(default=0)
+    verified_count = models.PositiveIntegerField(default=0)
+    first_seen = models.DateTimeField(null=True, blank=True)
+    last_seen = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['species_name']
+        verbose_name_plural = 'species summaries'
+        indexes = [
+            models.Index(fields=['species_name']),
+        ]
+    
+    def __str__(self):
+        return f"{self.species_name} ({self.observation_count} observations)"
+
+
+class ObservationRollup(models.Model):
+    """
+    Public observation counts per species and day, week or month, in total
+    (``cell_x`` and ``cell_y`` of -1) and per spatial grid cell.
+    
+    Maintained incrementally from BiodiversityRecord changes (see rollups.py).
+    """
+    PERIOD_CHOICES = [
+        ('day', 'Day'),
+        ('week', 'Week'),
+        ('month', 'Month'),
+    ]
+    
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    period_start = models.DateField()
+    species_key = models.CharField(max_length=255)
+    species_name = models.CharField(max_length=255, blank=True)
+    cell_x = models.IntegerField()
+    cell_y = models.IntegerField()
+    count = models.IntegerField(default=0)
+    verified_count = models.IntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            # Also serves per-species series over a date range
+            models.UniqueConstraint(
+                fields=['period', 'species_key', 'cell_x', 'cell_y', 'period_start'],
+                name='unique_observation_rollup'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['period', 'period_start'], name='biodiv_rollup_period_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.species_name or 'unknown'} {self.period} of {self.period_start}: {self.count}"
+
+
+class HeatmapGrid(models.Model):
+    """
+    Observation density grid of public records at one resolution level, for
+    all records or one taxon, stored as HeatmapTile arrays.
+    """
+    RANK_CHOICES = [
+        ('', 'All records'),
+        ('species', 'Species'),
+        ('genus', 'Genus'),
+    ]
+    
+    rank = models.CharField(max_length=10, choices=RANK_CHOICES, blank=True)
+    # Lower-case scientific name or genus; empty for all records
+    taxon = models.CharField(max_length=255, blank=True)
+    level = models.PositiveSmallIntegerField()
+    
+    # Records created up to this time have been binned
+    watermark = models.DateTimeField(null=True, blank=True)
+    record_count = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['rank', 'taxon', 'level']
+        constraints = [
+            models.UniqueConstraint(fields=['rank', 'taxon', 'level'], name='unique_heatmap_grid'),
+        ]
+    
+    def __str__(self):
+        return f"{self.taxon or 'all records'} heatmap level {self.level}"
+
+
+class HeatmapTile(models.Model):
+    """
+    One non-empty square of a heatmap grid, saved as a ``.npy`` array of
+    counts under a name derived from its content digest.
+    """
+    grid = models.ForeignKey(HeatmapGrid, on_delete=models.CASCADE, related_name='tiles')
+    tile_x = models.PositiveIntegerField()
+    tile_y = models.PositiveIntegerField()
+    digest = models.CharField(max_length=64)
+    file_name = models.CharField(max_length=255)
+    total = models.BigIntegerField(default=0)
+    max_count = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['grid', 'tile_y', 'tile_x']
+        constraints = [
+            models.UniqueConstraint(fields=['grid', 'tile_x', 'tile_y'], name='unique_heatmap_tile'),
+        ]
+    
+    def __str__(self):
+        return f"{self.grid} tile {self.tile_x},{self.tile_y}"
+
+
+class RecordChange(models.Model):
+    """
+    Latest change to each biodiversity record, for delta sync.
+    
+    One row per record, rewritten on every change with the next ``seq`` and
+    the writing transaction's id, so the log stays as large as the set of
+    records plus tombstones. Deleted records keep a ``deleted`` row.
+    """
+    ACTION_CHOICES = [
+        ('upsert', 'Created or updated'),
+        ('deleted', 'Deleted'),
+    ]
+    
+    # Not a foreign key: the row outlives the record as its tombstone
+    record_id = models.UUIDField(primary_key=True)
+    contributor = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+'
+    )
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    is_public = models.BooleanField()
+    # Public at any point, so other users get a tombstone once it is hidden
+    was_public = models.BooleanField()
+    txid = models.BigIntegerField()
+    seq = models.BigIntegerField(unique=True)
+    changed_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['txid', 'seq']
+        indexes = [
+            models.Index(fields=['txid', 'seq'], name='biodiv_change_cursor_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.action} of record {self.record_id} at {self.txid}.{self.seq}"
+
+
+class OccurrenceImport(models.Model):
+    """
+    A CSV or Darwin Core occurrence file loaded into the records table by
+    ``import_occurrences`` (see imports.py).
+    
+    ``offset`` is the byte position after the last committed chunk, so a
+    failed or interrupted import resumes from there.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Contributor of the imported records
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='occurrence_imports')
+    file = models.FileField(upload_to='imports/occurrences/')
+    # Namespace of the file's non-UUID occurrence ids; re-importing the same
+    # dataset under the same name skips rows already loaded
+    source_name = models.CharField(max_length=255)
+    is_public = models.BooleanField(default=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    file_size = models.BigIntegerField(default=0)
+    offset = models.BigIntegerField(default=0)
+    rows_read = models.BigIntegerField(default=0)
+    rows_imported = models.BigIntegerField(default=0)
+    rows_skipped = models.BigIntegerField(default=0)
+    rows_rejected = models.BigIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Import of {self.source_name} ({self.status})"
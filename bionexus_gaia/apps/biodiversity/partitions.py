@@ -0,0 +1,150 @@
+"""
+Range partitions of the biodiversity records table (PostgreSQL only).
+
+Records are stored in a table partitioned by ``observation_date``: one
+partition per UTC year, or per month where created with that interval, and a
+default partition for dates no other partition covers. Queries filtering on
+``observation_date``, such as date-filtered and keyset-paginated listings and
+exports, only scan the partitions that can match.
+
+``create_record_partitions`` creates partitions ahead of time. A new partition
+takes over the rows of its range from the default partition, so partitions
+can also be created after the fact for periods that ended up there.
+"""
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from .models import BiodiversityRecord
+
+INTERVALS = ('year', 'month')
+
+_BOUNDS_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def parent_table():
+    return BiodiversityRecord._meta.db_table
+
+
+def default_partition():
+    return f'{parent_table()}_default'
+
+
+def period_start(moment, interval):
+    """
+    Start, in UTC, of the ``interval`` containing ``moment``.
+    """
+    moment = moment.astimezone(dt_timezone.utc)
+    month = moment.month if interval == 'month' else 1
+    return datetime(moment.year, month, 1, tzinfo=dt_timezone.utc)
+
+
+def next_period(start, interval):
+    if interval == 'month':
+        return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start.replace(year=start.year + 1)
+
+
+def partition_name(start, interval):
+    if interval == 'month':
+        return f'{parent_table()}_m{start.year}_{start.month:02d}'
+    return f'{parent_table()}_y{start.year}'
+
+
+def existing_partitions():
+    """
+    Return ``(name, start, end)`` for every partition except the default one.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) '
+            'FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE pg_inherits.inhparent = %s::regclass',
+            [parent_table()]
+        )
+        rows = cursor.fetchall()
+    partitions = []
+    for name, bounds in rows:
+        match = _BOUNDS_RE.search(bounds)
+        if match:
+            partitions.append((name, parse_datetime(match.group(1)), parse_datetime(match.group(2))))
+    return partitions
+
+
+def _insertable_columns(cursor):
+    # The generated search_vector column is computed, never copied
+    cursor.execute(
+        "SELECT attname FROM pg_attribute WHERE attrelid = %s::regclass "
+        "AND attnum > 0 AND NOT attisdropped AND attgenerated = '' ORDER BY attnum",
+        [parent_table()]
+    )
+    return ', '.join(connection.ops.quote_name(name) for (name,) in cursor.fetchall())
+
+
+def create_partition(start, interval):
+    """
+    Create the partition for the ``interval`` starting at ``start`` and move
+    its rows out of the default partition. Returns the partition's name, or
+    None if another partition already overlaps the range.
+    """
+    end = next_period(start, interval)
+    if any(lower < end and start < upper for _, lower, upper in existing_partitions()):
+        return None
+
+    name = partition_name(start, interval)
+    quote_name = connection.ops.quote_name
+    parent = quote_name(parent_table())
+    with transaction.atomic(), connection.cursor() as cursor:
+        columns = _insertable_columns(cursor)
+        cursor.execute(
+            f'CREATE TABLE {quote_name(name)} (LIKE {parent} INCLUDING DEFAULTS '
+            f'INCLUDING GENERATED INCLUDING CONSTRAINTS INCLUDING STORAGE)'
+        )
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {quote_name(default_partition())} '
+            f'WHERE observation_date >= %s AND observation_date < %s RETURNING {columns}) '
+            f'INSERT INTO {quote_name(name)} ({columns}) SELECT {columns} FROM moved',
+            [start, end]
+        )
+        # Attaching builds the parent's indexes on the new partition
+        cursor.execute(
+            f'ALTER TABLE {parent} ATTACH PARTITION {quote_name(name)} FOR VALUES FROM (%s) TO (%s)',
+            [start.isoformat(), end.isoformat()]
+        )
+    return name
+
+
+def default_partition_periods(interval):
+    """
+    Starts of the periods that have rows in the default partition.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc(%s, observation_date AT TIME ZONE 'UTC') "
+            f"FROM {connection.ops.quote_name(default_partition())} ORDER BY 1",
+            [interval]
+        )
+        return [row[0].replace(tzinfo=dt_timezone.utc) for row in cursor.fetchall()]
+
+
+def ensure_partitions(ahead=2, interval='year', now=None):
+    """
+    Create partitions from the current ``interval`` to ``ahead`` intervals
+    ahead, and for every period with rows in the default partition. Returns
+    the names of the partitions created.
+    """
+    start = period_start(now or datetime.now(dt_timezone.utc), interval)
+    periods = []
+    for _ in range(ahead + 1):
+        periods.append(start)
+        start = next_period(start, interval)
+    periods.extend(default_partition_periods(interval))
+
+    created = []
+    for start in sorted(set(periods)):
+        name = create_partition(start, interval)
+        if name is not None:
+            created.append(name)
+    return created
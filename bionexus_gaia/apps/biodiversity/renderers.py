@@ -0,0 +1,67 @@
+import json
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+
+class PassthroughRenderer(BaseRenderer):
+    """
+    Renderer for endpoints that stream their own response body.
+
+    It exists so that DRF content negotiation accepts the ``?format=`` value;
+    the streamed body never goes through ``render``. Error responses (e.g. a
+    400 for a bad parameter) are emitted as plain JSON.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, bytes):
+            return data
+        return json.dumps(data, default=str).encode(self.charset)
+
+
+class CSVRenderer(PassthroughRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONRenderer(PassthroughRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+class ZipRenderer(PassthroughRenderer):
+    media_type = 'application/zip'
+    format = 'zip'
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+
+    Datetimes, lazy translation strings and other values orjson does not
+    handle like DRF are passed to DRF's encoder, so the output is the same as
+    JSONRenderer's. Indented output (e.g. for the browsable API) goes through
+    the standard encoder.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            return orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
@@ -0,0 +1,145 @@
+"""
+Derived image renditions for biodiversity records.
+
+Saving a record with a new image marks it ``renditions_pending``; the
+``process_renditions`` worker later decodes the original once, at reduced
+size where the format allows it, and writes a thumbnail, a medium JPEG and a
+WebP next to the original. Their storage paths are kept in ``renditions``.
+Rendition suffixes always add a second extension, so a rendition never has
+the original's own name, even for a WebP upload.
+"""
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import BiodiversityRecord
+from .signals import records_updated
+
+# name -> (longest edge in pixels, Pillow format, file suffix)
+RENDITIONS = {
+    'thumbnail': (256, 'JPEG', '.thumb.jpg'),
+    'medium': (1024, 'JPEG', '.medium.jpg'),
+    'webp': (1024, 'WEBP', '.rendition.webp'),
+}
+
+# Suffixes earlier versions wrote renditions under; only cleaned up
+LEGACY_SUFFIXES = ('.webp',)
+
+RENDITION_QUALITY = 82
+
+# Downscale by integer reduction until within this factor of the target size,
+# then resample; much cheaper than resampling from full resolution
+REDUCING_GAP = 3.0
+
+
+def rendition_name(image_name, suffix):
+    root, _ = os.path.splitext(image_name)
+    return f'{root}{suffix}'
+
+
+def decode_for_renditions(source):
+    """
+    Decode ``source`` just large enough for the biggest rendition.
+
+    For JPEGs ``draft`` makes libjpeg decode at 1/2, 1/4 or 1/8 scale, so a
+    large photo never materialises at full resolution.
+    """
+    largest = max(size for size, _, _ in RENDITIONS.values())
+    with Image.open(source) as image:
+        # draft keeps both edges at least the requested size, so ask for the
+        # box the largest rendition fills at this aspect ratio
+        width, height = image.size
+        scale = largest / max(width, height)
+        if scale < 1:
+            image.draft('RGB', (int(width * scale), int(height * scale)))
+        image = ImageOps.exif_transpose(image)
+        return image.convert('RGB')
+
+
+def render_renditions(image_name):
+    """
+    Create every rendition of the stored image ``image_name``.
+
+    Returns a mapping of rendition name to storage path.
+    """
+    with default_storage.open(image_name, 'rb') as source:
+        base = decode_for_renditions(source)
+
+    renditions = {}
+    for name, (size, image_format, suffix) in sorted(
+        RENDITIONS.items(), key=lambda item: -item[1][0]
+    ):
+        rendition = base.copy()
+        rendition.thumbnail((size, size), reducing_gap=REDUCING_GAP)
+        buffer = BytesIO()
+        rendition.save(buffer, format=image_format, quality=RENDITION_QUALITY)
+        target = rendition_name(image_name, suffix)
+        if target == image_name:
+            raise ValueError(f'Rendition {name} would overwrite the original image {image_name}')
+        if default_storage.exists(target):
+            default_storage.delete(target)
+        renditions[name] = default_storage.save(target, ContentFile(buffer.getvalue()))
+    return renditions
+
+
+def claim_pending(batch_size):
+    """
+    Lock up to ``batch_size`` records awaiting renditions, skipping rows that
+    another worker already holds. Must be called inside a transaction.
+    """
+    return list(
+        BiodiversityRecord.objects.filter(renditions_pending=True)
+        .select_for_update(skip_locked=True)
+        .only('id', 'image', 'contributor_id', 'is_public')
+        .order_by()[:batch_size]
+    )
+
+
+def process_pending_renditions(batch_size=20):
+    """
+    Generate renditions for one batch of pending records.
+
+    Returns ``(processed, failed)``: the ids rendered and a list of
+    ``(id, error)`` for images that could not be decoded. Failed records are
+    taken off the queue with empty renditions, so clients fall back to the
+    original image.
+    """
+    processed = []
+    failed = []
+    with transaction.atomic():
+        for record in claim_pending(batch_size):
+            renditions = {}
+            if record.image:
+                try:
+                    renditions = render_renditions(record.image.name)
+                except (OSError, ValueError, Image.DecompressionBombError) as exc:
+                    failed.append((record.id, str(exc)))
+            # update() so the record's save signals are not fired; updated_at
+            # still moves so conditional GETs see the new rendition URLs
+            BiodiversityRecord.objects.filter(pk=record.pk).update(
+                renditions=renditions,
+                renditions_pending=False,
+                updated_at=timezone.now(),
+            )
+            processed.append(record)
+        records_updated.send(sender=BiodiversityRecord, records=processed)
+    return [record.id for record in processed], failed
+
+
+def rendition_url(record, name, request=None):
+    """
+    Return the URL of one rendition of ``record``'s image, or None if it has
+    not been generated.
+    """
+    path = (record.renditions or {}).get(name)
+    if not path:
+        return None
+    url = default_storage.url(path)
+    if request is not None:
+        url = request.build_absolute_uri(url)
+    return url
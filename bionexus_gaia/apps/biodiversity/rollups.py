@@ -0,0 +1,229 @@
+"""
+Observation time series per species and period.
+
+ObservationRollup keeps the number of public observations (and how many are
+verified) per species for every day, ISO week (starting Monday) and month,
+both in total and per cell of a ``ROLLUP_GRID_DEGREES`` grid. Record saves,
+deletes, bulk inserts and verifications apply +1 / -1 deltas with a single
+``INSERT ... ON CONFLICT DO UPDATE``, so time-series queries read a handful of
+rollup rows instead of scanning the records table. Periods are UTC dates.
+Near-duplicates are not counted; regrouping moves their counts.
+"""
+import math
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Min, Sum
+from django.utils import timezone
+
+from .models import BiodiversityRecord, ObservationRollup
+from .summaries import normalize_species_name
+
+PERIODS = ('day', 'week', 'month')
+
+# cell_x / cell_y of the rows counting every cell together
+ALL_CELLS = -1
+
+_UPSERT_SQL = """
+    INSERT INTO {table}
+        (period, period_start, species_key, species_name, cell_x, cell_y, count, verified_count)
+    VALUES {values}
+    ON CONFLICT (period, species_key, cell_x, cell_y, period_start) DO UPDATE SET
+        count = {table}.count + EXCLUDED.count,
+        verified_count = {table}.verified_count + EXCLUDED.verified_count
+"""
+
+_REBUILD_SQL = """
+    INSERT INTO {table}
+        (period, period_start, species_key, species_name, cell_x, cell_y, count, verified_count)
+    SELECT %(period)s, date_trunc(%(period)s, observation_date AT TIME ZONE 'UTC')::date,
+           lower(species_name), MIN(species_name), {cell_x}, {cell_y},
+           COUNT(*), COUNT(*) FILTER (WHERE is_verified)
+    FROM {records}
+    WHERE is_public AND duplicate_of_id IS NULL
+    GROUP BY 2, 3, 5, 6
+"""
+
+
+def grid_size():
+    """
+    Width and height of a rollup grid cell in degrees.
+    """
+    return getattr(settings, 'ROLLUP_GRID_DEGREES', 1.0)
+
+
+def grid_dimensions():
+    size = grid_size()
+    return math.ceil(360 / size), math.ceil(180 / size)
+
+
+def grid_cell(longitude, latitude):
+    """
+    Return the (cell_x, cell_y) rollup grid cell containing a point.
+    """
+    size = grid_size()
+    columns, rows = grid_dimensions()
+    cell_x = min(columns - 1, max(0, int(math.floor((longitude + 180.0) / size))))
+    cell_y = min(rows - 1, max(0, int(math.floor((latitude + 90.0) / size))))
+    return cell_x, cell_y
+
+
+def cell_bounds(cell_x, cell_y):
+    """
+    Return ``[west, south, east, north]`` of a grid cell.
+    """
+    size = grid_size()
+    west = cell_x * size - 180.0
+    south = cell_y * size - 90.0
+    return [west, south, min(180.0, west + size), min(90.0, south + size)]
+
+
+def period_start(day, period):
+    """
+    First date of the ``period`` containing ``day``.
+    """
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _observation_day(observation_date):
+    value = BiodiversityRecord._meta.get_field('observation_date').to_python(observation_date)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value.astimezone(dt_timezone.utc).date()
+
+
+def rollup_change(observation_date, location, species_name, is_public, is_verified, delta):
+    """
+    Describe how one record enters (``delta`` 1) or leaves (-1) the rollups,
+    as a list for ``apply_rollup_deltas``; empty for records not counted.
+    """
+    if not is_public or observation_date is None:
+        return []
+    return [(
+        _observation_day(observation_date),
+        (location.x, location.y) if location is not None else None,
+        species_name or '',
+        delta,
+        delta if is_verified else 0,
+    )]
+
+
+def apply_rollup_deltas(changes):
+    """
+    Incrementally update rollup counts.
+
+    ``changes`` is an iterable of ``(day, (longitude, latitude) or None,
+    species_name, count_delta, verified_delta)``.
+    """
+    # Merge changes to the same row first: ON CONFLICT cannot update a row twice
+    merged = {}
+    for day, point, species_name, count_delta, verified_delta in changes:
+        species_key = normalize_species_name(species_name)
+        cells = [(ALL_CELLS, ALL_CELLS)]
+        if point is not None:
+            cells.append(grid_cell(*point))
+        for period in PERIODS:
+            start = period_start(day, period)
+            for cell_x, cell_y in cells:
+                entry = merged.setdefault((period, start, species_key, cell_x, cell_y), [species_name, 0, 0])
+                entry[1] += count_delta
+                entry[2] += verified_delta
+
+    values = []
+    params = []
+    for (period, start, species_key, cell_x, cell_y), (species_name, count, verified) in merged.items():
+        if not count and not verified:
+            continue
+        values.append('(%s, %s, %s, %s, %s, %s, %s, %s)')
+        params.extend([period, start, species_key, species_name, cell_x, cell_y, count, verified])
+
+    if not values:
+        return
+
+    sql = _UPSERT_SQL.format(
+        table=connection.ops.quote_name(ObservationRollup._meta.db_table),
+        values=', '.join(values)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def rebuild_rollups():
+    """
+    Recompute every rollup row from the records table and return the
+    number of rows written.
+    """
+    table = connection.ops.quote_name(ObservationRollup._meta.db_table)
+    records = connection.ops.quote_name(BiodiversityRecord._meta.db_table)
+    size = grid_size()
+    columns, rows = grid_dimensions()
+    grids = [
+        (str(ALL_CELLS), str(ALL_CELLS)),
+        (
+            f'LEAST({columns - 1}, GREATEST(0, floor((ST_X(location::geometry) + 180) / {size!r})))::integer',
+            f'LEAST({rows - 1}, GREATEST(0, floor((ST_Y(location::geometry) + 90) / {size!r})))::integer',
+        ),
+    ]
+    written = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table}')
+        for period in PERIODS:
+            for cell_x, cell_y in grids:
+                cursor.execute(
+                    _REBUILD_SQL.format(table=table, records=records, cell_x=cell_x, cell_y=cell_y),
+                    {'period': period}
+                )
+                written += cursor.rowcount
+    return written
+
+
+def query_rollups(period, start=None, end=None, species=None, grid=False, bbox=None):
+    """
+    Observation counts for ``period`` in periods starting between ``start``
+    and ``end`` (dates, inclusive), as dicts with ``period_start``,
+    ``scientific_name``, ``observations`` and ``verified``.
+
+    ``species`` limits the series to one species (case-insensitive). ``bbox``
+    (``[west, south, east, north]``) counts only grid cells overlapping it;
+    with ``grid`` each cell gets its own series, with ``cell_x`` and
+    ``cell_y``, instead of one total.
+    """
+    queryset = ObservationRollup.objects.filter(period=period, count__gt=0)
+    if start is not None:
+        queryset = queryset.filter(period_start__gte=period_start(start, period))
+    if end is not None:
+        queryset = queryset.filter(period_start__lte=end)
+    if species:
+        queryset = queryset.filter(species_key=normalize_species_name(species))
+
+    if not grid and bbox is None:
+        return queryset.filter(cell_x=ALL_CELLS).order_by('period_start', 'species_key').values(
+            'period_start', scientific_name=F('species_name'),
+            observations=F('count'), verified=F('verified_count')
+        )
+
+    queryset = queryset.exclude(cell_x=ALL_CELLS)
+    if bbox is not None:
+        west_x, south_y = grid_cell(bbox[0], bbox[1])
+        east_x, north_y = grid_cell(bbox[2], bbox[3])
+        queryset = queryset.filter(
+            cell_x__gte=west_x, cell_x__lte=east_x,
+            cell_y__gte=south_y, cell_y__lte=north_y,
+        )
+    if grid:
+        return queryset.order_by('period_start', 'species_key', 'cell_x', 'cell_y').values(
+            'period_start', 'cell_x', 'cell_y', scientific_name=F('species_name'),
+            observations=F('count'), verified=F('verified_count')
+        )
+    return queryset.values('period_start', 'species_key').annotate(
+        scientific_name=Min('species_name'),
+        observations=Sum('count'),
+        verified=Sum('verified_count'),
+    ).order_by('period_start', 'species_key').values(
+        'period_start', 'scientific_name', 'observations', 'verified'
+    )
@@ -0,0 +1,83 @@
+"""
+PostgreSQL full-text search for biodiversity records.
+
+Records carry a generated ``search_vector`` tsvector column (see migration
+0006) covering the viewset's ``search_fields``, weighted in that order and
+indexed with GIN. The column is generated by the database and is not declared
+on the model, so it is referenced through ``search_vector_column()``.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db import connection
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from .models import BiodiversityRecord
+
+SEARCH_CONFIG = 'simple'
+
+# Fields folded into search_vector and their weights, highest first
+SEARCH_VECTOR_WEIGHTS = {
+    'species_name': 'A',
+    'common_name': 'B',
+    'notes': 'C',
+    'location_name': 'D',
+}
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def search_vector_column():
+    table = connection.ops.quote_name(BiodiversityRecord._meta.db_table)
+    return RawSQL(f'{table}.search_vector', [], output_field=SearchVectorField())
+
+
+def build_search_query(terms):
+    """
+    Build a tsquery requiring every word, with the last one prefix-matched
+    so partially typed names still match (type-ahead).
+
+    Returns None when the terms contain no searchable words.
+    """
+    words = [word.lower() for term in terms for word in _WORD.findall(term)]
+    if not words:
+        return None
+    lexemes = [f"'{word}'" for word in words]
+    lexemes[-1] += ':*'
+    return SearchQuery(' & '.join(lexemes), search_type='raw', config=SEARCH_CONFIG)
+
+
+class RecordSearchFilter(SearchFilter):
+    """
+    ``SearchFilter`` that answers ``?search=`` from the GIN-indexed
+    ``search_vector`` column and ranks matches by relevance.
+
+    Results are ordered by rank unless the client asks for an explicit
+    ``?ordering=``; for that to hold this backend must run after
+    ``OrderingFilter``. On databases other than PostgreSQL, or if the view
+    searches fields the vector does not cover, the stock ``icontains``
+    behaviour is used.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+
+        if connection.vendor != 'postgresql' or not set(search_fields) <= set(SEARCH_VECTOR_WEIGHTS):
+            return super().filter_queryset(request, queryset, view)
+
+        query = build_search_query(search_terms)
+        if query is None:
+            return queryset.none()
+
+        queryset = queryset.alias(search_vector=search_vector_column()).filter(
+            search_vector=query
+        ).annotate(search_rank=SearchRank(F('search_vector'), query))
+
+        if OrderingFilter.ordering_param not in request.query_params:
+            queryset = queryset.order_by('-search_rank', *queryset.query.order_by)
+        return queryset
@@ -1,10 +1,122 @@
+import os
+from django.core.exceptions import FieldDoesNotExist
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from django.contrib.gis.geos import Point
 from drf_spectacular.utils import extend_schema_field
 from drf_spectacular.types import OpenApiTypes
-from .models import BiodiversityRecord
+from django.urls import reverse
+from .models import (
+    BiodiversityRecord, HeatmapGrid, HeatmapTile, MediaUpload, OccurrenceImport, SpeciesSummary, ValidationJob
+)
+from .heatmaps import TILE_SIZE, cell_degrees, grid_shape, tile_bounds
+from .renditions import rendition_url
+from .uploads import max_upload_size, start_session
 
-class BiodiversityRecordSerializer(serializers.ModelSerializer):
+class MediaUploadField(serializers.PrimaryKeyRelatedField):
+    """
+    Write-only reference to one of the requesting user's completed uploads of
+    the given ``kind``.
+    """
+    def __init__(self, kind, **kwargs):
+        self.kind = kind
+        kwargs.setdefault('write_only', True)
+        kwargs.setdefault('required', False)
+        super().__init__(**kwargs)
+    
+    def get_queryset(self):
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated:
+            return MediaUpload.objects.none()
+        return MediaUpload.objects.filter(owner=request.user, kind=self.kind, status='complete')
+
+
+def _field_list(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Lets read requests choose the output fields with ``?fields=a,b`` or drop
+    some with ``?omit=a,b``.
+    
+    ``column_sources`` names the model columns read by outputs that are not
+    backed by a model field of the same source, so ``restrict_queryset`` can
+    load only the columns the selected fields need.
+    """
+    column_sources = {}
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.selected_fields = None
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        requested = _field_list(request.query_params.get('fields'))
+        omitted = _field_list(request.query_params.get('omit'))
+        if not requested and not omitted:
+            return
+        
+        available = {name for name, field in self.fields.items() if not field.write_only}
+        available.update(self.column_sources)
+        unknown = (requested | omitted) - available
+        if unknown:
+            raise serializers.ValidationError({
+                'fields': [f"Unknown fields: {', '.join(sorted(unknown))}."]
+            })
+        self.selected_fields = (requested or available) - omitted
+        for name in list(self.fields):
+            if name not in self.selected_fields:
+                self.fields.pop(name)
+    
+    def selects(self, name):
+        """
+        Whether ``name`` is part of the requested output.
+        """
+        return self.selected_fields is None or name in self.selected_fields
+    
+    def restrict_queryset(self, queryset, required_columns=()):
+        """
+        Join the relations the output reads and, for sparse requests, defer
+        every column no selected field or ``required_columns`` needs.
+        """
+        model = queryset.model
+        columns = {model._meta.pk.name, *required_columns}
+        restrict = self.selected_fields is not None
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+            if name in self.column_sources:
+                columns.update(self.column_sources[name])
+            elif field.source == '*':
+                # Reads the whole instance
+                restrict = False
+            else:
+                columns.add(field.source.replace('.', '__'))
+        if restrict:
+            for name in self.selected_fields & set(self.column_sources):
+                columns.update(self.column_sources[name])
+        
+        related = set()
+        for column in list(columns):
+            try:
+                model._meta.get_field(column.split('__')[0])
+            except FieldDoesNotExist:
+                # A property or annotation, not something only() can name
+                columns.discard(column)
+                restrict = False
+                continue
+            if '__' in column:
+                related.add(column.rsplit('__', 1)[0])
+        
+        if related:
+            queryset = queryset.select_related(*related)
+        if restrict:
+            queryset = queryset.only(*columns)
+        return queryset
+
+
+class BiodiversityRecordSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for BiodiversityRecord model with support for geospatial data.
     """
@@ -20,15 +132,39 @@ class BiodiversityRecordSerializer(serializers.ModelSerializer):
     # Properly annotate the location field for schema generation
     location = serializers.CharField(read_only=True, help_text="PostGIS Point field in WKT format")
     
+    # Reduced-size copies of the image; null until the renditions worker has run
+    thumbnail_url = serializers.SerializerMethodField()
+    medium_url = serializers.SerializerMethodField()
+    webp_url = serializers.SerializerMethodField()
+    
+    # Media uploaded beforehand (e.g. through a resumable upload session)
+    image_upload = MediaUploadField(kind='image')
+    audio_upload = MediaUploadField(kind='audio')
+    video_upload = MediaUploadField(kind='video')
+    
+    # Columns read by outputs not backed by a same-named model field
+    column_sources = {
+        'thumbnail_url': ('renditions',),
+        'medium_url': ('renditions',),
+        'webp_url': ('renditions',),
+        'latitude': ('location',),
+        'longitude': ('location',),
+        'distance': (),
+    }
+    
     class Meta:
         model = BiodiversityRecord
         fields = [
             'id', 'contributor', 'contributor_username', 'species_name', 'common_name',
-            'image', 'audio', 'video', 'location', 'latitude', 'longitude', 'location_name',
+            'image', 'thumbnail_url', 'medium_url', 'webp_url',
+            'audio', 'video', 'location', 'latitude', 'longitude', 'location_name',
             'observation_date', 'notes', 'is_public', 'ai_prediction', 'ai_confidence',
-            'blockchain_hash', 'is_verified', 'created_at', 'updated_at'
+            'blockchain_hash', 'is_verified', 'duplicate_of', 'created_at', 'updated_at',
+            'image_upload', 'audio_upload', 'video_upload'
+        ]
+        read_only_fields = [
+            'id', 'contributor', 'blockchain_hash', 'is_verified', 'duplicate_of', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'contributor', 'blockchain_hash', 'is_verified', 'created_at', 'updated_at']
         extra_kwargs = {
             'location': {'read_only': True},
             'image': {'required': False},
@@ -39,6 +175,12 @@ class BiodiversityRecordSerializer(serializers.ModelSerializer):
         """
         Ensure at least one media file is provided and required fields are present.
         """
+        # Referenced uploads fill the matching media field
+        for field in ('image', 'audio', 'video'):
+            upload = attrs.pop(f'{field}_upload', None)
+            if upload is not None:
+                attrs[field] = upload.file.name
+        
         # Ensure at least one media file is provided
         if not any([attrs.get('image'), attrs.get('audio'), attrs.get('video')]):
             raise serializers.ValidationError({
@@ -78,15 +220,37 @@ class BiodiversityRecordSerializer(serializers.ModelSerializer):
         # Update the record
         return super().update(instance, validated_data)
     
+    @extend_schema_field(OpenApiTypes.URI)
+    def get_thumbnail_url(self, obj) -> str:
+        return rendition_url(obj, 'thumbnail', self.context.get('request'))
+    
+    @extend_schema_field(OpenApiTypes.URI)
+    def get_medium_url(self, obj) -> str:
+        return rendition_url(obj, 'medium', self.context.get('request'))
+    
+    @extend_schema_field(OpenApiTypes.URI)
+    def get_webp_url(self, obj) -> str:
+        return rendition_url(obj, 'webp', self.context.get('request'))
+    
     def to_representation(self, instance):
         """
         Add latitude and longitude to the output representation.
         """
         representation = super().to_representation(instance)
-        # Add coordinates to the representation for easier client-side handling
-        if instance.location:
-            representation['latitude'] = instance.location.y
-            representation['longitude'] = instance.location.x
+        # Add coordinates to the representation for easier client-side handling;
+        # one coords call instead of separate x and y lookups on the geometry
+        if self.selects('latitude') or self.selects('longitude'):
+            location = instance.location
+            if location:
+                longitude, latitude = location.coords
+                if self.selects('latitude'):
+                    representation['latitude'] = latitude
+                if self.selects('longitude'):
+                    representation['longitude'] = longitude
+        # Distance in metres, present when the queryset was annotated with one
+        distance = getattr(instance, 'distance', None)
+        if distance is not None and self.selects('distance'):
+            representation['distance'] = distance.m
         return representation
 
 
@@ -116,4 +280,210 @@ class BiodiversityRecordExportSerializer(serializers.ModelSerializer):
     def get_longitude(self, obj) -> float:
         if obj.location:
             return obj.location.x
-        return None
\ No newline at end of file
+        return None
+
+
+class SpeciesSummarySerializer(serializers.ModelSerializer):
+    """
+    Serializer for species catalogue entries.
+    """
+    scientific_name = serializers.CharField(source='species_name')
+    
+    class Meta:
+        model = SpeciesSummary
+        fields = [
+            'scientific_name', 'common_name', 'observation_count',
+            'verified_count', 'first_seen', 'last_seen'
+        ]
+
+
+class MediaUploadSerializer(serializers.ModelSerializer):
+    """
+    Serializer for media uploaded ahead of the records that use it.
+    
+    Send ``file`` to upload in one request, or ``filename`` and ``total_size``
+    to open a resumable session whose bytes are sent separately.
+    """
+    class Meta:
+        model = MediaUpload
+        fields = [
+            'id', 'kind', 'file', 'status', 'filename', 'total_size',
+            'received_bytes', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'status', 'received_bytes', 'created_at', 'updated_at']
+    
+    def validate(self, attrs):
+        if attrs.get('file'):
+            # Images get the same validation as BiodiversityRecord.image
+            if attrs.get('kind') == 'image':
+                serializers.ImageField().to_internal_value(attrs['file'])
+            attrs['filename'] = attrs['file'].name
+            attrs['total_size'] = attrs['file'].size
+            return attrs
+        
+        if not attrs.get('filename') or attrs.get('total_size') is None:
+            raise serializers.ValidationError({
+                'non_field_errors': ['Provide either a file, or a filename and total_size for a resumable upload.']
+            })
+        if not 0 < attrs['total_size'] <= max_upload_size():
+            raise serializers.ValidationError({
+                'total_size': [f'Must be between 1 and {max_upload_size()} bytes.']
+            })
+        attrs['filename'] = os.path.basename(attrs['filename'])
+        attrs['status'] = 'pending'
+        return attrs
+    
+    def create(self, validated_data):
+        validated_data['owner'] = self.context['request'].user
+        if validated_data.get('file'):
+            validated_data['received_bytes'] = validated_data['total_size']
+        upload = super().create(validated_data)
+        if upload.status == 'pending':
+            start_session(upload)
+        return upload
+
+
+class BulkRecordSerializer(serializers.ModelSerializer):
+    """
+    Validates one row of a bulk ingest request.
+    
+    Media are referenced by the id of a previous MediaUpload instead of being
+    sent inline; the ids are resolved for the whole batch in one query.
+    """
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+    image_upload = serializers.UUIDField(required=False)
+    audio_upload = serializers.UUIDField(required=False)
+    video_upload = serializers.UUIDField(required=False)
+    
+    # Maps each upload reference to the record field it fills
+    UPLOAD_FIELDS = {
+        'image_upload': 'image',
+        'audio_upload': 'audio',
+        'video_upload': 'video',
+    }
+    
+    class Meta:
+        model = BiodiversityRecord
+        fields = [
+            'species_name', 'common_name', 'latitude', 'longitude', 'location_name',
+            'observation_date', 'notes', 'is_public', 'ai_prediction', 'ai_confidence',
+            'image_upload', 'audio_upload', 'video_upload'
+        ]
+        extra_kwargs = {
+            'observation_date': {'required': True},
+        }
+    
+    def validate(self, attrs):
+        if not any(attrs.get(field) for field in self.UPLOAD_FIELDS):
+            raise serializers.ValidationError({
+                'non_field_errors': ['At least one media upload (image, audio, or video) must be referenced.']
+            })
+        return attrs
+
+
+class ValidationJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the status of a queued record validation.
+    """
+    blockchain_hash = serializers.CharField(source='record.blockchain_hash', read_only=True)
+    
+    class Meta:
+        model = ValidationJob
+        fields = [
+            'id', 'record', 'status', 'attempts', 'max_attempts', 'run_after',
+            'last_error', 'blockchain_hash', 'created_at', 'completed_at'
+        ]
+        read_only_fields = fields
+
+
+class OccurrenceImportSerializer(serializers.ModelSerializer):
+    """
+    Serializer for an occurrence file import and its progress.
+    """
+    source_name = serializers.CharField(max_length=255, required=False)
+    progress = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = OccurrenceImport
+        fields = [
+            'id', 'owner', 'file', 'source_name', 'is_public', 'status', 'file_size', 'offset',
+            'progress', 'rows_read', 'rows_imported', 'rows_skipped', 'rows_rejected',
+            'last_error', 'created_at', 'updated_at', 'completed_at'
+        ]
+        read_only_fields = [
+            'id', 'owner', 'status', 'file_size', 'offset', 'rows_read', 'rows_imported',
+            'rows_skipped', 'rows_rejected', 'last_error', 'created_at', 'updated_at', 'completed_at'
+        ]
+    
+    @extend_schema_field(OpenApiTypes.FLOAT)
+    def get_progress(self, obj) -> float:
+        """
+        Share of the file's bytes loaded so far, from 0 to 1.
+        """
+        if obj.status == OccurrenceImport.SUCCEEDED:
+            return 1.0
+        if not obj.file_size:
+            return 0.0
+        return min(1.0, obj.offset / obj.file_size)
+    
+    def create(self, validated_data):
+        upload = validated_data['file']
+        validated_data.setdefault('source_name', os.path.basename(upload.name))
+        validated_data['file_size'] = upload.size
+        return super().create(validated_data)
+
+
+class HeatmapTileSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a stored heatmap tile and the immutable URL of its counts.
+    """
+    bounds = serializers.SerializerMethodField()
+    url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = HeatmapTile
+        fields = ['tile_x', 'tile_y', 'bounds', 'total', 'max_count', 'url']
+        read_only_fields = fields
+    
+    @extend_schema_field(serializers.ListField(child=serializers.FloatField()))
+    def get_bounds(self, obj):
+        return tile_bounds(obj.grid.level, obj.tile_x, obj.tile_y)
+    
+    @extend_schema_field(OpenApiTypes.URI)
+    def get_url(self, obj):
+        url = reverse('heatmap-tile', kwargs={
+            'grid_id': obj.grid_id, 'tile_x': obj.tile_x, 'tile_y': obj.tile_y, 'digest': obj.digest
+        })
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+
+class HeatmapGridSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a heatmap grid with its geometry and non-empty tiles.
+    """
+    cell_degrees = serializers.SerializerMethodField()
+    shape = serializers.SerializerMethodField()
+    tile_size = serializers.SerializerMethodField()
+    tiles = HeatmapTileSerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = HeatmapGrid
+        fields = [
+            'id', 'rank', 'taxon', 'level', 'cell_degrees', 'shape', 'tile_size',
+            'record_count', 'updated_at', 'tiles'
+        ]
+        read_only_fields = fields
+    
+    @extend_schema_field(OpenApiTypes.FLOAT)
+    def get_cell_degrees(self, obj):
+        return cell_degrees(obj.level)
+    
+    @extend_schema_field(serializers.ListField(child=serializers.IntegerField()))
+    def get_shape(self, obj):
+        return list(grid_shape(obj.level))
+    
+    @extend_schema_field(OpenApiTypes.INT)
+    def get_tile_size(self, obj):
+        return TILE_SIZE
@@ -0,0 +1,289 @@
+"""
+Signal handlers that keep derived biodiversity data in sync with records.
+
+``pre_save`` stores the record's previously saved values on the instance as
+``_previous_values`` so that ``post_save`` handlers can work out what changed
+without another query.
+
+``records_bulk_created`` is sent with ``records`` after a batch is inserted
+with ``bulk_create``, ``records_updated`` with every record changed through
+``update()``, and ``records_verified`` with those of them that became
+verified; all of them bypass ``post_save``. ``records_imported`` is sent
+with ``occurrence_import`` once a file was loaded by imports.py, which writes
+rows in SQL; derived tables are rebuilt rather than updated.
+``records_regrouped`` is sent with the records that became canonical
+(``duplicate_of`` now None) or became near-duplicates through ``update()``.
+
+New records are matched against stored ones in ``pre_save`` and marked as
+near-duplicates. Edits to what a record may duplicate regroup it in the first
+``post_save`` handler, so the handlers after it see its new grouping;
+deleting a canonical record promotes its earliest duplicate before the
+species summary is refreshed.
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from .blobs import MEDIA_FIELDS, update_references
+from .changes import log_changes
+from .duplicates import find_canonical, grouping_changed, promote_duplicates, regroup_edited
+from .models import BiodiversityRecord, MediaUpload
+from .rollups import apply_rollup_deltas, rebuild_rollups, rollup_change
+from .summaries import (
+    add_to_species_summary,
+    normalize_species_name,
+    rebuild_species_summaries,
+    refresh_species_summary,
+    update_species_summary,
+)
+
+records_bulk_created = Signal()
+records_updated = Signal()
+records_verified = Signal()
+records_imported = Signal()
+records_regrouped = Signal()
+
+# Fields captured before each save of an existing record
+SNAPSHOT_FIELDS = [
+    'species_name', 'common_name', 'observation_date', 'is_verified',
+    'is_public', 'location', 'image', 'audio', 'video', 'duplicate_of',
+]
+
+
+def previous_values(instance):
+    """
+    Return the values a saved record had before the current save, or None.
+    """
+    return getattr(instance, '_previous_values', None)
+
+
+@receiver(pre_save, sender=BiodiversityRecord)
+def snapshot_previous_values(sender, instance, raw=False, **kwargs):
+    instance._previous_values = None
+    if raw or instance._state.adding:
+        return
+    instance._previous_values = sender.objects.filter(
+        pk=instance.pk
+    ).values(*SNAPSHOT_FIELDS).first()
+
+
+@receiver(pre_save, sender=BiodiversityRecord)
+def queue_renditions(sender, instance, raw=False, **kwargs):
+    """
+    Queue a new or replaced image for the renditions worker.
+    """
+    if raw:
+        return
+    image_name = instance.image.name if instance.image else ''
+    previous = previous_values(instance)
+    previous_name = (previous['image'] or '') if previous is not None else ''
+    if image_name != previous_name:
+        instance.renditions = {}
+        instance.renditions_pending = bool(image_name)
+
+
+@receiver(pre_save, sender=BiodiversityRecord)
+def mark_duplicate(sender, instance, raw=False, **kwargs):
+    if raw or not instance._state.adding or instance.duplicate_of_id is not None:
+        return
+    instance.duplicate_of_id = find_canonical(instance)
+
+
+def _send_regrouped(changed):
+    if changed:
+        records_updated.send(sender=BiodiversityRecord, records=changed)
+        records_regrouped.send(
+            sender=BiodiversityRecord, records=[record for record in changed if record.duplicate_of_id is None]
+        )
+
+
+@receiver(post_save, sender=BiodiversityRecord)
+def regroup_on_edit(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    previous = previous_values(instance)
+    if previous is None or not grouping_changed(previous, instance):
+        return
+    _send_regrouped(regroup_edited(instance, previous))
+
+
+@receiver(post_delete, sender=BiodiversityRecord)
+def promote_duplicates_on_delete(sender, instance, **kwargs):
+    if instance.duplicate_of_id is not None:
+        return
+    _send_regrouped(promote_duplicates(instance))
+
+
+@receiver(post_save, sender=BiodiversityRecord)
+def sync_species_summary_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = previous_values(instance)
+    if created or previous is None:
+        add_to_species_summary(instance)
+    else:
+        update_species_summary(previous, instance)
+
+
+@receiver(post_delete, sender=BiodiversityRecord)
+def sync_species_summary_on_delete(sender, instance, **kwargs):
+    refresh_species_summary(normalize_species_name(instance.species_name))
+
+
+@receiver(records_bulk_created, sender=BiodiversityRecord)
+def sync_species_summary_on_bulk_create(sender, records, **kwargs):
+    for normalized_name in {normalize_species_name(record.species_name) for record in records}:
+        refresh_species_summary(normalized_name)
+
+
+@receiver(records_verified, sender=BiodiversityRecord)
+def sync_species_summary_on_verify(sender, records, **kwargs):
+    for normalized_name in {normalize_species_name(record.species_name) for record in records}:
+        refresh_species_summary(normalized_name)
+
+
+@receiver(records_regrouped, sender=BiodiversityRecord)
+def sync_species_summary_on_regroup(sender, records, **kwargs):
+    for normalized_name in {normalize_species_name(record.species_name) for record in records}:
+        refresh_species_summary(normalized_name)
+
+
+@receiver(records_imported, sender=BiodiversityRecord)
+def rebuild_species_summaries_on_import(sender, **kwargs):
+    rebuild_species_summaries()
+
+
+def _record_rollup_change(values, delta):
+    # Near-duplicates are not counted
+    if values['duplicate_of'] is not None:
+        return []
+    return rollup_change(
+        values['observation_date'], values['location'], values['species_name'],
+        values['is_public'], values['is_verified'], delta
+    )
+
+
+def _instance_rollup_change(instance, delta):
+    if instance.duplicate_of_id is not None:
+        return []
+    return rollup_change(
+        instance.observation_date, instance.location, instance.species_name,
+        instance.is_public, instance.is_verified, delta
+    )
+
+
+@receiver(post_save, sender=BiodiversityRecord)
+def update_rollups_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = previous_values(instance)
+    changes = _instance_rollup_change(instance, 1)
+    if previous is not None:
+        # Unchanged rows cancel out before anything is written
+        changes = _record_rollup_change(previous, -1) + changes
+    apply_rollup_deltas(changes)
+
+
+@receiver(post_delete, sender=BiodiversityRecord)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    apply_rollup_deltas(_instance_rollup_change(instance, -1))
+
+
+@receiver(records_bulk_created, sender=BiodiversityRecord)
+def update_rollups_on_bulk_create(sender, records, **kwargs):
+    apply_rollup_deltas(
+        change for record in records for change in _instance_rollup_change(record, 1)
+    )
+
+
+@receiver(records_verified, sender=BiodiversityRecord)
+def update_rollups_on_verify(sender, records, **kwargs):
+    apply_rollup_deltas(
+        (day, point, species_name, 0, 1)
+        for record in records
+        for day, point, species_name, _, _ in _instance_rollup_change(record, 1)
+    )
+
+
+@receiver(records_regrouped, sender=BiodiversityRecord)
+def update_rollups_on_regroup(sender, records, **kwargs):
+    # Records that became canonical enter the rollups, new duplicates leave
+    apply_rollup_deltas(
+        change
+        for record in records
+        for change in rollup_change(
+            record.observation_date, record.location, record.species_name,
+            record.is_public, record.is_verified, 1 if record.duplicate_of_id is None else -1
+        )
+    )
+
+
+@receiver(records_imported, sender=BiodiversityRecord)
+def rebuild_rollups_on_import(sender, **kwargs):
+    rebuild_rollups()
+
+
+@receiver(post_save, sender=BiodiversityRecord)
+def log_change_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = previous_values(instance)
+    log_changes([(instance, 'upsert', previous is not None and previous['is_public'])])
+
+
+@receiver(post_delete, sender=BiodiversityRecord)
+def log_change_on_delete(sender, instance, **kwargs):
+    log_changes([(instance, 'deleted', instance.is_public)])
+
+
+@receiver(records_bulk_created, sender=BiodiversityRecord)
+def log_changes_on_bulk_create(sender, records, **kwargs):
+    log_changes((record, 'upsert', False) for record in records)
+
+
+@receiver(records_updated, sender=BiodiversityRecord)
+def log_changes_on_update(sender, records, **kwargs):
+    log_changes((record, 'upsert', record.is_public) for record in records)
+
+
+def _media_names(instance):
+    return [getattr(instance, field).name if getattr(instance, field) else '' for field in MEDIA_FIELDS]
+
+
+@receiver(post_save, sender=BiodiversityRecord)
+def count_media_references_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = previous_values(instance)
+    previous_names = [previous[field] for field in MEDIA_FIELDS] if previous is not None else []
+    update_references(previous_names, _media_names(instance))
+
+
+@receiver(post_delete, sender=BiodiversityRecord)
+def release_media_references_on_delete(sender, instance, **kwargs):
+    update_references(_media_names(instance), [])
+
+
+@receiver(records_bulk_created, sender=BiodiversityRecord)
+def count_media_references_on_bulk_create(sender, records, **kwargs):
+    for record in records:
+        update_references([], _media_names(record))
+
+
+@receiver(pre_save, sender=MediaUpload)
+def snapshot_upload_file(sender, instance, raw=False, **kwargs):
+    instance._previous_file = None
+    if raw or instance._state.adding:
+        return
+    instance._previous_file = sender.objects.filter(pk=instance.pk).values_list('file', flat=True).first()
+
+
+@receiver(post_save, sender=MediaUpload)
+def count_upload_reference_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    update_references([getattr(instance, '_previous_file', None)], [instance.file.name])
+
+
+@receiver(post_delete, sender=MediaUpload)
+def release_upload_reference_on_delete(sender, instance, **kwargs):
+    update_references([instance.file.name], [])
@@ -0,0 +1,118 @@
+"""
+Content-addressed file storage for observation media.
+
+Files are hashed with SHA-256 while they are written and stored once under
+``cas/<aa>/<bb>/<sha256><ext>``; saving identical content again returns the
+existing name instead of writing a copy, whatever extension it is saved
+with. Which blobs are still referenced is tracked by MediaBlob (see
+``blobs``), which also records the name each digest was first stored under.
+"""
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils.deconstruct import deconstructible
+
+CAS_PREFIX = 'cas'
+
+_CAS_NAME = re.compile(r'^cas/[0-9a-f]{2}/[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})(?P<ext>\.[A-Za-z0-9]+)?$')
+
+# Bytes hashed per read when storing a file that is already on disk
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def blob_digest(name):
+    """
+    Return the SHA-256 of a content-addressed file name, or None for names
+    stored outside the content-addressed layout.
+    """
+    match = _CAS_NAME.match(name or '')
+    return match.group('digest') if match else None
+
+
+def blob_name(digest, original_name):
+    extension = os.path.splitext(original_name)[1].lower()
+    if not re.fullmatch(r'\.[a-z0-9]{1,10}', extension):
+        extension = ''
+    return f'{CAS_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+def _lock_blob(digest):
+    """
+    Lock the MediaBlob of ``digest``, if there is one, and return its name.
+    """
+    # Imported here because the models use this storage
+    from .models import MediaBlob
+    return MediaBlob.objects.select_for_update().filter(pk=digest).values_list('name', flat=True).first()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage that names files by the SHA-256 of their content.
+
+    The ``upload_to`` directory is ignored; only the extension of the
+    original name is kept.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name depends on the content and is chosen in _save
+        return name
+
+    def _save(self, name, content):
+        directory = self.path(CAS_PREFIX)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode('utf-8')
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            return self._commit(temp_path, digest.hexdigest(), name)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def store_local_file(self, path, original_name):
+        """
+        Move a file that is already on this filesystem into the store without
+        copying it, and return its name. ``path`` no longer exists afterwards.
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as source:
+            for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        try:
+            return self._commit(path, digest.hexdigest(), original_name)
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def _commit(self, temp_path, digest, original_name):
+        # The blob's row lock keeps collect_orphans from deleting the file
+        # between the check below and the refreshed mtime or new file
+        with transaction.atomic():
+            # Same bytes under another extension share the blob's existing file
+            name = _lock_blob(digest) or blob_name(digest, original_name)
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                # Already stored; refresh the mtime so the GC grace period restarts
+                os.utime(full_path)
+                return name
+            # New, or collected since its blob was read: write it (again)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            os.replace(temp_path, full_path)
+            if self.file_permissions_mode is not None:
+                os.chmod(full_path, self.file_permissions_mode)
+        return name
+
+
+media_storage = ContentAddressedStorage()
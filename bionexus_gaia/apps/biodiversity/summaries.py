@@ -0,0 +1,161 @@
+"""
+Incremental maintenance of the SpeciesSummary table.
+
+New observations are folded into the existing summary row. Deletes and edits
+that touch summarised fields recompute only the affected species, using the
+index on ``lower(species_name)``.
+"""
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .models import BiodiversityRecord, SpeciesSummary
+
+# Record fields whose change requires the summary to be recomputed
+SUMMARY_FIELDS = ('species_name', 'common_name', 'observation_date', 'is_verified')
+
+# Aggregates shared by single-species refreshes and full rebuilds
+SUMMARY_AGGREGATES = {
+    'display_name': Min('species_name'),
+    'display_common_name': Max('common_name'),
+    'observation_count': Count('id'),
+    'verified_count': Count('id', filter=Q(is_verified=True)),
+    'first_seen': Min('observation_date'),
+    'last_seen': Max('observation_date'),
+}
+
+
+def normalize_species_name(name):
+    """
+    Return the case-insensitive key a species is summarised under.
+    """
+    return (name or '').lower()
+
+
+def summarizable_records():
+    """
+    Records that contribute to the species catalogue, annotated with their
+    key; near-duplicates are left out.
+    """
+    return BiodiversityRecord.objects.exclude(species_name='').filter(duplicate_of__isnull=True).annotate(
+        normalized_name=Lower('species_name')
+    )
+
+
+def _observation_date(record):
+    """
+    Return the record's observation date as an aware datetime, even when the
+    instance was created with a string value.
+    """
+    value = BiodiversityRecord._meta.get_field('observation_date').to_python(record.observation_date)
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def _summary_from_stats(normalized_name, stats):
+    return SpeciesSummary(
+        normalized_name=normalized_name,
+        species_name=stats['display_name'],
+        common_name=stats['display_common_name'] or '',
+        observation_count=stats['observation_count'],
+        verified_count=stats['verified_count'],
+        first_seen=stats['first_seen'],
+        last_seen=stats['last_seen'],
+    )
+
+
+def refresh_species_summary(normalized_name):
+    """
+    Recompute the summary row for one species, deleting it if no records remain.
+    """
+    if not normalized_name:
+        return
+
+    stats = summarizable_records().filter(
+        normalized_name=normalized_name
+    ).aggregate(**SUMMARY_AGGREGATES)
+
+    if not stats['observation_count']:
+        SpeciesSummary.objects.filter(normalized_name=normalized_name).delete()
+        return
+
+    _summary_from_stats(normalized_name, stats).save()
+
+
+def add_to_species_summary(record):
+    """
+    Fold a newly created record into its species summary.
+    """
+    normalized_name = normalize_species_name(record.species_name)
+    if not normalized_name or record.duplicate_of_id is not None:
+        return
+    observation_date = _observation_date(record)
+
+    with transaction.atomic():
+        summary, created = SpeciesSummary.objects.select_for_update().get_or_create(
+            normalized_name=normalized_name,
+            defaults={
+                'species_name': record.species_name,
+                'common_name': record.common_name,
+                'observation_count': 1,
+                'verified_count': int(record.is_verified),
+                'first_seen': observation_date,
+                'last_seen': observation_date,
+            }
+        )
+        if created:
+            return
+
+        # Mirror SUMMARY_AGGREGATES so incremental and rebuilt rows agree
+        summary.species_name = min(summary.species_name, record.species_name)
+        summary.common_name = max(summary.common_name, record.common_name)
+        summary.observation_count += 1
+        summary.verified_count += int(record.is_verified)
+        if summary.first_seen is None or observation_date < summary.first_seen:
+            summary.first_seen = observation_date
+        if summary.last_seen is None or observation_date > summary.last_seen:
+            summary.last_seen = observation_date
+        summary.save()
+
+
+def update_species_summary(previous, record):
+    """
+    Apply an edit to an existing record, given its previously stored values.
+    """
+    regrouped = (previous['duplicate_of'] is None) != (record.duplicate_of_id is None)
+    if not regrouped and all(previous[field] == getattr(record, field) for field in SUMMARY_FIELDS):
+        return
+
+    old_name = normalize_species_name(previous['species_name'])
+    new_name = normalize_species_name(record.species_name)
+    refresh_species_summary(old_name)
+    if new_name != old_name:
+        refresh_species_summary(new_name)
+
+
+def rebuild_species_summaries(batch_size=1000):
+    """
+    Rebuild the whole SpeciesSummary table with a single grouped query.
+
+    Returns the number of species written.
+    """
+    rows = summarizable_records().values('normalized_name').annotate(
+        **SUMMARY_AGGREGATES
+    ).order_by()
+
+    written = 0
+    with transaction.atomic():
+        SpeciesSummary.objects.all().delete()
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(_summary_from_stats(row['normalized_name'], row))
+            if len(batch) >= batch_size:
+                SpeciesSummary.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            SpeciesSummary.objects.bulk_create(batch)
+            written += len(batch)
+    return written
@@ -1,15 +1,30 @@
+import json
+import os
 import tempfile
 import uuid
-from io import BytesIO
-from django.test import TestCase
+import zipfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.http import FileResponse
+from django.db import connection
 from django.contrib.auth import get_user_model
 from django.contrib.gis.geos import Point
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
 from rest_framework.test import APIClient
 from rest_framework import status
 from PIL import Image
+import numpy as np
 
-from .models import BiodiversityRecord
+from . import imports
+from .models import (
+    AnchorBatch, BiodiversityRecord, HeatmapGrid, HeatmapTile, MediaBlob, MediaUpload, ObservationRollup,
+    OccurrenceImport, RecordAnchor, RecordChange, SpeciesSummary, ValidationJob
+)
 
 User = get_user_model()
 
@@ -191,20 +206,262 @@ class BiodiversityEndpointsTestCase(TestCase):
         self.assertEqual(response['Content-Type'], 'application/json')
         self.assertIn('attachment; filename="biodiversity_export.json"', response['Content-Disposition'])
     
+    def test_export_streams_all_rows_csv(self):
+        """Test CSV export is streamed with a header row and every record."""
+        BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Buteo jamaicensis',
+            location=Point(-122.4094, 37.7849),
+            observation_date='2024-12-03T10:00:00Z',
+            is_public=True
+        )
+        
+        response = self.client.get('/api/v1/biodiversity/records/export/?format=csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        
+        lines = b''.join(response.streaming_content).decode().strip().splitlines()
+        self.assertTrue(lines[0].startswith('id,contributor,species_name'))
+        self.assertEqual(len(lines), 3)
+    
+    def test_export_ndjson_with_limit(self):
+        """Test NDJSON export honours the opt-in limit."""
+        BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Buteo jamaicensis',
+            location=Point(-122.4094, 37.7849),
+            observation_date='2024-12-03T10:00:00Z',
+            is_public=True
+        )
+        
+        response = self.client.get('/api/v1/biodiversity/records/export/?format=ndjson&limit=1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        
+        lines = b''.join(response.streaming_content).decode().strip().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['species_name'], 'Buteo jamaicensis')
+        
+        response = self.client.get('/api/v1/biodiversity/records/export/?format=ndjson&limit=0')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_export_json_honours_filters(self):
+        """Test JSON export applies the same filters as the list endpoint."""
+        response = self.client.get('/api/v1/biodiversity/records/export/?format=json&species_name=falco')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), [])
+        
+        response = self.client.get('/api/v1/biodiversity/records/export/?format=json&species_name=accipiter')
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['contributor'], 'testuser')
+    
+    def test_export_darwin_core_archive(self):
+        """Test the DwC-A export streams a zip that is then served from storage."""
+        self.test_record.notes = 'Perched\tby the lake\nat dawn'
+        self.test_record.save()
+        
+        response = self.client.get('/api/v1/biodiversity/records/dwca/?species_name=accipiter')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        content = b''.join(response.streaming_content)
+        
+        archive = zipfile.ZipFile(BytesIO(content))
+        self.assertEqual(sorted(archive.namelist()), ['eml.xml', 'meta.xml', 'occurrence.txt'])
+        self.assertIn('dwc/terms/scientificName', archive.read('meta.xml').decode())
+        header, row = archive.read('occurrence.txt').decode().splitlines()
+        values = dict(zip(header.split('\t'), row.split('\t')))
+        self.assertEqual(values['occurrenceID'], str(self.test_record.id))
+        self.assertEqual(values['scientificName'], 'Accipiter cooperii')
+        self.assertEqual(values['decimalLatitude'], '37.7749')
+        self.assertEqual(values['occurrenceRemarks'], 'Perched by the lake at dawn')
+        
+        # The same request for unchanged records is served from the stored archive
+        response = self.client.get('/api/v1/biodiversity/records/dwca/?species_name=accipiter')
+        self.assertEqual(b''.join(response.streaming_content), content)
+        self.assertIsInstance(response, FileResponse)
+        response.close()
+        
+        response = self.client.get(
+            '/api/v1/biodiversity/records/dwca/?species_name=accipiter', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        call_command('prune_dwca_exports', '--days', '-1', stdout=StringIO())
+    
     def test_validate_biodiversity_record(self):
         """Test validating a biodiversity record on blockchain."""
         self.client.force_authenticate(user=self.user)
         
         response = self.client.post(f'/api/v1/biodiversity/records/{self.test_record.id}/validate/')
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertTrue(response.data['success'])
-        self.assertIn('blockchain_hash', response.data)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], ValidationJob.QUEUED)
+        self.assertIn('status_url', response.data)
+        
+        # Validating again while queued reuses the open job
+        again = self.client.post(f'/api/v1/biodiversity/records/{self.test_record.id}/validate/')
+        self.assertEqual(again.data['id'], response.data['id'])
+        
+        call_command('process_validation_jobs', stdout=StringIO())
         
         # Refresh record from database
         self.test_record.refresh_from_db()
         self.assertTrue(self.test_record.is_verified)
         self.assertIsNotNone(self.test_record.blockchain_hash)
+        
+        response = self.client.get(response.data['status_url'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], ValidationJob.SUCCEEDED)
+        self.assertEqual(response.data['blockchain_hash'], self.test_record.blockchain_hash)
+    
+    def test_validation_job_retried_with_backoff(self):
+        """Test that a failed validation is requeued for later and eventually fails."""
+        from .validation import enqueue_validation, run_once
+
+        job = enqueue_validation(self.test_record)
+        job.max_attempts = 2
+        job.save()
+
+        with mock.patch(
+            'bionexus_gaia.apps.biodiversity.anchoring.get_anchor_backend',
+            side_effect=ConnectionError('ledger unavailable')
+        ):
+            succeeded, failed = run_once()
+            self.assertEqual((len(succeeded), len(failed)), (0, 1))
+            job.refresh_from_db()
+            self.assertEqual(job.status, ValidationJob.QUEUED)
+            self.assertEqual(job.attempts, 1)
+            self.assertIn('ledger unavailable', job.last_error)
+            self.assertGreater(job.run_after, timezone.now())
+
+            # Not due yet, so nothing is claimed
+            self.assertEqual(run_once(), ([], []))
+
+            ValidationJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            run_once()
+            job.refresh_from_db()
+            self.assertEqual(job.status, ValidationJob.FAILED)
+            self.assertEqual(job.attempts, 2)
+
+        self.test_record.refresh_from_db()
+        self.assertFalse(self.test_record.is_verified)
+
+    def test_validation_job_waits_for_other_batch(self):
+        """Test a job whose record another worker is anchoring is requeued without using an attempt."""
+        from .validation import enqueue_validation, run_once
+
+        job = enqueue_validation(self.test_record)
+        job.max_attempts = 1
+        job.save()
+
+        # Another worker holds the record's anchor row, so this run anchors nothing
+        with mock.patch('bionexus_gaia.apps.biodiversity.validation.anchor_pending_records'):
+            self.assertEqual(run_once(), ([], []))
+        job.refresh_from_db()
+        self.assertEqual(job.status, ValidationJob.QUEUED)
+        self.assertEqual(job.attempts, 0)
+        self.assertGreater(job.run_after, timezone.now())
+
+        ValidationJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        succeeded, failed = run_once()
+        self.assertEqual((len(succeeded), len(failed)), (1, 0))
+
+    def test_validation_job_visibility(self):
+        """Test that validation jobs are only visible to the record's contributor."""
+        from .validation import enqueue_validation
+
+        job = enqueue_validation(self.test_record)
+        other = User.objects.create_user(username='otheruser', password='otherpassword123')
+        self.client.force_authenticate(user=other)
+        response = self.client.get(f'/api/v1/biodiversity/validation-jobs/{job.id}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/v1/biodiversity/validation-jobs/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['id'], str(job.id))
     
+    def test_records_anchored_in_one_batch(self):
+        """Test that queued records share one Merkle root with valid proofs."""
+        from .anchoring import anchor_pending_records, request_anchor
+
+        records = [self.test_record] + [
+            BiodiversityRecord.objects.create(
+                contributor=self.user,
+                species_name='Falco peregrinus',
+                location=Point(36.82 + index * 0.01, -1.29),
+                observation_date='2024-12-02T10:00:00Z',
+                is_public=True
+            )
+            for index in range(4)
+        ]
+        for record in records:
+            request_anchor(record)
+
+        batch = anchor_pending_records()
+        self.assertEqual(batch.record_count, 5)
+        self.assertIsNone(anchor_pending_records())
+        self.assertEqual(
+            BiodiversityRecord.objects.filter(is_verified=True, blockchain_hash=batch.tx_hash).count(), 5
+        )
+        self.assertEqual(SpeciesSummary.objects.get(normalized_name='falco peregrinus').verified_count, 4)
+
+        for record in records:
+            response = self.client.get(f'/api/v1/biodiversity/records/{record.id}/proof/')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response.data['valid'])
+            self.assertEqual(response.data['merkle_root'], batch.merkle_root)
+
+    def test_batch_claimed_before_ledger_write(self):
+        """Test the ledger is written only for a claimed batch, and failures requeue its records."""
+        from .anchoring import anchor_pending_records, claim_batch, get_anchor_backend, request_anchor
+
+        request_anchor(self.test_record)
+        backend = get_anchor_backend()
+        claimed = []
+
+        def failing_anchor(root):
+            claimed.append(AnchorBatch.objects.get(merkle_root=root).status)
+            raise ConnectionError('ledger unavailable')
+
+        with mock.patch.object(backend, 'anchor', side_effect=failing_anchor):
+            with self.assertRaises(ConnectionError):
+                anchor_pending_records()
+        self.assertEqual(claimed, [AnchorBatch.CLAIMED])
+        self.assertFalse(AnchorBatch.objects.exists())
+        self.assertIsNone(RecordAnchor.objects.get(record=self.test_record).batch_id)
+
+        # A batch abandoned by a dead worker is taken over once its claim expires
+        batch = claim_batch()
+        self.assertIsNone(anchor_pending_records())
+        AnchorBatch.objects.filter(pk=batch.pk).update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(anchor_pending_records().pk, batch.pk)
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, AnchorBatch.ANCHORED)
+        self.test_record.refresh_from_db()
+        self.assertEqual(self.test_record.blockchain_hash, batch.tx_hash)
+
+    def test_proof_detects_edited_record(self):
+        """Test that a record edited after anchoring no longer matches its proof."""
+        self.client.force_authenticate(user=self.user)
+        self.client.post(f'/api/v1/biodiversity/records/{self.test_record.id}/validate/')
+        call_command('process_validation_jobs', stdout=StringIO())
+
+        self.test_record.refresh_from_db()
+        self.test_record.species_name = 'Accipiter striatus'
+        self.test_record.save()
+
+        response = self.client.get(f'/api/v1/biodiversity/records/{self.test_record.id}/proof/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['included'])
+        self.assertFalse(response.data['unchanged'])
+        self.assertFalse(response.data['valid'])
+
+    def test_proof_for_unanchored_record(self):
+        """Test that records without an anchor have no proof."""
+        response = self.client.get(f'/api/v1/biodiversity/records/{self.test_record.id}/proof/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_species_list_endpoint(self):
         """Test the species list endpoint."""
         response = self.client.get('/api/v1/biodiversity/species/')
@@ -215,6 +472,746 @@ class BiodiversityEndpointsTestCase(TestCase):
         self.assertEqual(response.data['results'][0]['common_name'], 'Cooper\'s Hawk')
         self.assertEqual(response.data['results'][0]['observation_count'], 1)
     
+    def test_records_list_conditional_get(self):
+        """Test that unchanged record lists are answered with 304."""
+        response = self.client.get('/api/v1/biodiversity/records/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        
+        response = self.client.get('/api/v1/biodiversity/records/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        
+        # Other query parameters get their own ETag
+        response = self.client.get('/api/v1/biodiversity/records/?page_size=5', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.test_record.notes = 'Seen again'
+        self.test_record.save()
+        response = self.client.get('/api/v1/biodiversity/records/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def sync(self, since=None, **params):
+        if since:
+            params['since'] = since
+        response = self.client.get('/api/v1/biodiversity/records/changes/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+    
+    def test_record_changes_feed(self):
+        """Test the delta sync feed returns each changed record once, then nothing."""
+        other = BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Buteo jamaicensis',
+            location=Point(-122.4094, 37.7849),
+            observation_date='2024-12-03T10:00:00Z',
+            is_public=True
+        )
+        
+        page = self.sync()
+        self.assertEqual(
+            [(change['id'], change['deleted']) for change in page['changes']],
+            [(str(self.test_record.id), False), (str(other.id), False)]
+        )
+        self.assertEqual(page['changes'][1]['record']['species_name'], 'Buteo jamaicensis')
+        self.assertEqual(self.sync(page['next'])['changes'], [])
+        
+        self.test_record.notes = 'Seen again'
+        self.test_record.save()
+        other_id = other.id
+        other.delete()
+        page = self.sync(page['next'])
+        self.assertEqual(
+            [(change['id'], change['deleted']) for change in page['changes']],
+            [(str(self.test_record.id), False), (str(other_id), True)]
+        )
+        self.assertEqual(page['changes'][0]['record']['notes'], 'Seen again')
+        
+        # A full sync sees the deletion only as a tombstone
+        self.assertEqual(len(self.sync()['changes']), 2)
+    
+    def test_record_changes_paging_and_scope(self):
+        """Test delta sync pages, and tombstones for records hidden from a user."""
+        for index in range(3):
+            BiodiversityRecord.objects.create(
+                contributor=self.user,
+                species_name=f'Species {index}',
+                location=Point(-122.4094, 37.7849),
+                observation_date='2024-12-03T10:00:00Z',
+                is_public=True
+            )
+        page = self.sync(limit=2)
+        self.assertEqual(len(page['changes']), 2)
+        self.assertTrue(page['has_more'])
+        page = self.sync(page['next'], limit=2)
+        self.assertEqual(len(page['changes']), 2)
+        self.assertFalse(page['has_more'])
+        
+        self.test_record.is_public = False
+        self.test_record.save()
+        
+        self.client.force_authenticate(user=self.admin_user)
+        self.assertEqual(self.sync(page['next'])['changes'][0]['deleted'], False)
+        
+        other_user = User.objects.create_user(username='observer', email='observer@example.com', password='testpass123')
+        self.client.force_authenticate(user=other_user)
+        self.assertEqual(
+            self.sync(page['next'])['changes'],
+            [{'id': str(self.test_record.id), 'deleted': True}]
+        )
+        
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.sync(page['next'])['changes'][0]['deleted'], False)
+        
+        response = self.client.get('/api/v1/biodiversity/records/changes/', {'since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_records_sparse_fieldsets(self):
+        """Test choosing output fields with fields and omit."""
+        response = self.client.get('/api/v1/biodiversity/records/?fields=id,species_name,latitude')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        record = response.data['results'][0]
+        self.assertEqual(set(record), {'id', 'species_name', 'latitude'})
+        self.assertAlmostEqual(record['latitude'], 37.7749)
+        
+        response = self.client.get(f'/api/v1/biodiversity/records/{self.test_record.id}/?omit=ai_prediction,notes')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('ai_prediction', response.data)
+        self.assertNotIn('notes', response.data)
+        self.assertIn('contributor_username', response.data)
+        self.assertIn('longitude', response.data)
+        
+        response = self.client.get('/api/v1/biodiversity/records/?fields=species_name,secret')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_species_list_conditional_get(self):
+        """Test that the species list is versioned by the summary table."""
+        etag = self.client.get('/api/v1/biodiversity/species/')['ETag']
+        response = self.client.get('/api/v1/biodiversity/species/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        self.test_record.delete()
+        response = self.client.get('/api/v1/biodiversity/species/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 0)
+    
+    def test_species_summary_tracks_saves_and_deletes(self):
+        """Test the species summary is maintained incrementally."""
+        second = BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='ACCIPITER COOPERII',
+            location=Point(-122.4094, 37.7849),
+            observation_date='2024-12-05T10:00:00Z',
+            is_public=True
+        )
+        
+        summary = SpeciesSummary.objects.get(normalized_name='accipiter cooperii')
+        self.assertEqual(summary.observation_count, 2)
+        self.assertEqual(summary.last_seen.isoformat(), '2024-12-05T10:00:00+00:00')
+        
+        second.species_name = 'Buteo jamaicensis'
+        second.save()
+        summary.refresh_from_db()
+        self.assertEqual(summary.observation_count, 1)
+        self.assertTrue(SpeciesSummary.objects.filter(normalized_name='buteo jamaicensis').exists())
+        
+        second.delete()
+        self.assertFalse(SpeciesSummary.objects.filter(normalized_name='buteo jamaicensis').exists())
+    
+    def test_species_list_is_paginated(self):
+        """Test the species list is served in pages from the summary table."""
+        for index in range(25):
+            BiodiversityRecord.objects.create(
+                contributor=self.user,
+                species_name=f'Species {index:02d}',
+                location=Point(-122.4094, 37.7849),
+                observation_date='2024-12-03T10:00:00Z'
+            )
+        
+        response = self.client.get('/api/v1/biodiversity/species/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 26)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertIsNotNone(response.data['next'])
+    
+    def rollup_series(self, **params):
+        response = self.client.get('/api/v1/biodiversity/rollups/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            (row['period_start'].isoformat(), row['scientific_name'], row['observations'], row['verified'])
+            for row in response.data['results']
+        ]
+    
+    def test_observation_rollups_per_period(self):
+        """Test observation counts per day, week and month."""
+        BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='accipiter cooperii',
+            location=Point(-122.4094, 37.7849),
+            observation_date='2024-12-03T10:00:00Z',
+            is_public=True,
+            is_verified=True
+        )
+        BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Accipiter cooperii',
+            location=Point(-122.4094, 37.7849),
+            observation_date='2024-12-04T10:00:00Z',
+            is_public=False
+        )
+        
+        self.assertEqual(self.rollup_series(period='day'), [
+            ('2024-12-01', 'Accipiter cooperii', 1, 0),
+            ('2024-12-03', 'Accipiter cooperii', 1, 1),
+        ])
+        # 2024-12-01 is a Sunday, so it belongs to the week of 2024-11-25
+        self.assertEqual(self.rollup_series(period='week'), [
+            ('2024-11-25', 'Accipiter cooperii', 1, 0),
+            ('2024-12-02', 'Accipiter cooperii', 1, 1),
+        ])
+        self.assertEqual(self.rollup_series(period='month', species='ACCIPITER COOPERII'), [
+            ('2024-12-01', 'Accipiter cooperii', 2, 1),
+        ])
+        self.assertEqual(self.rollup_series(period='day', start='2024-12-02', end='2024-12-31'), [
+            ('2024-12-03', 'Accipiter cooperii', 1, 1),
+        ])
+        
+        response = self.client.get('/api/v1/biodiversity/rollups/', {'period': 'year'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/v1/biodiversity/rollups/', {'period': 'day', 'bbox': '10,0,-10,5'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_observation_rollups_track_edits_and_deletes(self):
+        """Test the rollups are maintained incrementally."""
+        self.test_record.observation_date = '2024-12-10T10:00:00Z'
+        self.test_record.save()
+        self.assertEqual(self.rollup_series(period='day'), [('2024-12-10', 'Accipiter cooperii', 1, 0)])
+        
+        self.test_record.is_public = False
+        self.test_record.save()
+        self.assertEqual(self.rollup_series(period='day'), [])
+        
+        self.test_record.is_public = True
+        self.test_record.save()
+        self.test_record.delete()
+        self.assertEqual(self.rollup_series(period='month'), [])
+    
+    def test_observation_rollups_by_grid_cell(self):
+        """Test rollups limited to a bounding box and split by grid cell."""
+        BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Accipiter cooperii',
+            location=Point(2.3522, 48.8566),
+            observation_date='2024-12-01T12:00:00Z',
+            is_public=True
+        )
+        
+        self.assertEqual(self.rollup_series(period='day'), [('2024-12-01', 'Accipiter cooperii', 2, 0)])
+        self.assertEqual(
+            self.rollup_series(period='day', bbox='-125,35,-120,40'),
+            [('2024-12-01', 'Accipiter cooperii', 1, 0)]
+        )
+        
+        response = self.client.get('/api/v1/biodiversity/rollups/', {'period': 'day', 'grid': 'true'})
+        cells = [row['cell'] for row in response.data['results']]
+        self.assertEqual(cells, [[-123.0, 37.0, -122.0, 38.0], [2.0, 48.0, 3.0, 49.0]])
+    
+    def test_rebuilt_rollups_match_incremental(self):
+        """Test a rebuild reproduces the incrementally maintained rollups."""
+        for day in (1, 2, 9):
+            BiodiversityRecord.objects.create(
+                contributor=self.user,
+                species_name='Buteo jamaicensis',
+                location=Point(36.8219, -1.2921),
+                observation_date=f'2024-12-{day:02d}T23:30:00Z',
+                is_public=True
+            )
+        fields = ('period', 'period_start', 'species_key', 'cell_x', 'cell_y', 'count', 'verified_count')
+        incremental = set(ObservationRollup.objects.filter(count__gt=0).values_list(*fields))
+        
+        call_command('rebuild_observation_rollups', stdout=StringIO())
+        self.assertEqual(set(ObservationRollup.objects.values_list(*fields)), incremental)
+    
+    @override_settings(HEATMAP_LEVELS=2, HEATMAP_SETTLE_SECONDS=0)
+    def test_heatmap_tiles(self):
+        """Test heatmap grids are binned into immutable .npy tiles."""
+        call_command('refresh_heatmaps', stdout=StringIO())
+        
+        response = self.client.get('/api/v1/biodiversity/heatmaps/', {'level': 0})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        grid = response.data['results'][0]
+        self.assertEqual(grid['shape'], [180, 360])
+        self.assertEqual(grid['record_count'], 1)
+        self.assertEqual(len(grid['tiles']), 1)
+        
+        response = self.client.get(grid['tiles'][0]['url'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('immutable', response['Cache-Control'])
+        counts = np.load(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(counts.shape, (256, 256))
+        self.assertEqual(counts.sum(), 1)
+        # San Francisco falls in the cell 57 degrees east of 180W, 127 north of 90S
+        self.assertEqual(counts[127, 57], 1)
+    
+    @override_settings(HEATMAP_LEVELS=2, HEATMAP_SETTLE_SECONDS=0)
+    def test_heatmap_incremental_refresh(self):
+        """Test an incremental refresh rewrites only the tiles new records fall into."""
+        call_command('refresh_heatmaps', stdout=StringIO())
+        before = {
+            (tile.grid.level, tile.tile_x, tile.tile_y): tile.digest
+            for tile in HeatmapTile.objects.select_related('grid')
+        }
+        
+        # Tokyo lies in the second tile column at level 0
+        BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Corvus macrorhynchos',
+            location=Point(139.6917, 35.6895),
+            observation_date='2024-12-05T10:00:00Z',
+            is_public=True
+        )
+        call_command('refresh_heatmaps', stdout=StringIO())
+        after = {
+            (tile.grid.level, tile.tile_x, tile.tile_y): tile.digest
+            for tile in HeatmapTile.objects.select_related('grid')
+        }
+        
+        self.assertEqual(after[(0, 0, 0)], before[(0, 0, 0)])
+        self.assertNotIn((0, 1, 0), before)
+        self.assertIn((0, 1, 0), after)
+        self.assertEqual(HeatmapGrid.objects.get(rank='', level=0).record_count, 2)
+        
+        # A full rebuild yields the same tiles
+        call_command('refresh_heatmaps', '--full', stdout=StringIO())
+        self.assertEqual(dict(
+            ((tile.grid.level, tile.tile_x, tile.tile_y), tile.digest)
+            for tile in HeatmapTile.objects.select_related('grid')
+        ), after)
+        
+        tile = HeatmapTile.objects.get(grid__rank='', grid__level=0, tile_x=0, tile_y=0)
+        response = self.client.get(f'/api/v1/biodiversity/heatmaps/{tile.grid_id}/tiles/0/0/{"0" * 64}.npy')
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertTrue(response['Location'].endswith(f'/{tile.digest}.npy'))
+    
+    @override_settings(HEATMAP_LEVELS=1, HEATMAP_SETTLE_SECONDS=0)
+    def test_heatmap_taxon_grids(self):
+        """Test heatmap grids limited to a species or genus."""
+        BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Accipiter nisus',
+            location=Point(2.3522, 48.8566),
+            observation_date='2024-12-05T10:00:00Z',
+            is_public=True
+        )
+        call_command(
+            'refresh_heatmaps', '--species', 'Accipiter Cooperii', '--genus', 'Accipiter', stdout=StringIO()
+        )
+        
+        response = self.client.get('/api/v1/biodiversity/heatmaps/', {'species': 'accipiter cooperii'})
+        self.assertEqual(response.data['results'][0]['record_count'], 1)
+        response = self.client.get('/api/v1/biodiversity/heatmaps/', {'genus': 'Accipiter'})
+        self.assertEqual(response.data['results'][0]['record_count'], 2)
+    
+    def test_fast_list_matches_serializer(self):
+        """Test that the values_list() list path returns exactly the serializer's output."""
+        self.test_record.image = self.create_test_image()
+        self.test_record.save()
+        call_command('process_renditions', stdout=StringIO())
+        BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Buteo jamaicensis',
+            location=Point(-122.41, 37.0),
+            observation_date='2024-12-03T10:00:00.123456Z',
+            ai_prediction={'species': 'Buteo jamaicensis', 'confidence': 0.5},
+            ai_confidence=0.5,
+            is_public=True
+        )
+        
+        for query in ['', '?fields=id,location,thumbnail_url,latitude', '?omit=notes&cursor=',
+                      '?lat=37.7749&lng=-122.4194&radius=10']:
+            response = self.client.get(f'/api/v1/biodiversity/records/{query}')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            results = json.loads(response.content)['results']
+            self.assertEqual(len(results), 2 if 'radius' not in query else 1)
+            for result in results:
+                detail_query = query.replace('&cursor=', '').replace('?lat=37.7749&lng=-122.4194&radius=10', '')
+                detail = json.loads(self.client.get(
+                    f"/api/v1/biodiversity/records/{result['id']}/{detail_query}"
+                ).content)
+                if 'radius' in query:
+                    self.assertGreaterEqual(result.pop('distance'), 0)
+                self.assertEqual(result, detail)
+    
+    def test_image_renditions_worker(self):
+        """Test that a new image is queued and rendered off the request path."""
+        image = Image.new('RGB', (2400, 1600), color='green')
+        image_file = BytesIO()
+        image.save(image_file, format='JPEG')
+        self.test_record.image = SimpleUploadedFile('large.jpg', image_file.getvalue(), content_type='image/jpeg')
+        self.test_record.save()
+        self.test_record.refresh_from_db()
+        self.assertTrue(self.test_record.renditions_pending)
+
+        response = self.client.get(f'/api/v1/biodiversity/records/{self.test_record.id}/')
+        self.assertIsNone(response.data['thumbnail_url'])
+
+        call_command('process_renditions', stdout=StringIO())
+        self.test_record.refresh_from_db()
+        self.assertFalse(self.test_record.renditions_pending)
+        self.assertEqual(set(self.test_record.renditions), {'thumbnail', 'medium', 'webp'})
+        with self.test_record.image.storage.open(self.test_record.renditions['thumbnail']) as thumbnail:
+            self.assertEqual(Image.open(thumbnail).size, (256, 171))
+        with self.test_record.image.storage.open(self.test_record.renditions['webp']) as webp:
+            self.assertEqual(Image.open(webp).format, 'WEBP')
+
+        response = self.client.get(f'/api/v1/biodiversity/records/{self.test_record.id}/')
+        self.assertTrue(response.data['thumbnail_url'].endswith('.thumb.jpg'))
+
+        # Edits that keep the image do not requeue it
+        self.test_record.notes = 'Updated notes'
+        self.test_record.save()
+        self.test_record.refresh_from_db()
+        self.assertFalse(self.test_record.renditions_pending)
+
+    def test_webp_renditions_keep_the_original(self):
+        """Test that the WebP rendition of a WebP upload does not replace it."""
+        image = Image.new('RGB', (2400, 1600), color='green')
+        image_file = BytesIO()
+        image.save(image_file, format='WEBP')
+        original = image_file.getvalue()
+        self.test_record.image = SimpleUploadedFile('large.webp', original, content_type='image/webp')
+        self.test_record.save()
+
+        call_command('process_renditions', stdout=StringIO())
+        self.test_record.refresh_from_db()
+        self.assertNotEqual(self.test_record.renditions['webp'], self.test_record.image.name)
+        with self.test_record.image.storage.open(self.test_record.image.name) as stored:
+            self.assertEqual(stored.read(), original)
+        with self.test_record.image.storage.open(self.test_record.renditions['webp']) as webp:
+            self.assertEqual(Image.open(webp).size, (1024, 683))
+
+    def test_identical_media_is_stored_once(self):
+        """Test content-addressed storage, reference counts and garbage collection."""
+        content = self.create_test_image().read()
+        first = BiodiversityRecord.objects.create(
+            contributor=self.user,
+            location=Point(36.82, -1.29),
+            observation_date='2024-12-02T10:00:00Z',
+            image=SimpleUploadedFile('first.jpg', content, content_type='image/jpeg')
+        )
+        second = BiodiversityRecord.objects.create(
+            contributor=self.user,
+            location=Point(36.83, -1.28),
+            observation_date='2024-12-02T11:00:00Z',
+            image=SimpleUploadedFile('retry.JPEG', content, content_type='image/jpeg')
+        )
+        # The extension of the first upload is kept for every copy
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name, r'^cas/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+        self.assertFalse(os.path.exists(os.path.splitext(first.image.path)[0] + '.jpeg'))
+
+        blob = MediaBlob.objects.get(name=first.image.name)
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(blob.size, len(content))
+
+        path = first.image.path
+        first.delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+
+        second.delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 0)
+        self.assertIsNotNone(blob.orphaned_at)
+
+        # Within the grace period nothing is collected
+        call_command('gc_media_blobs', stdout=StringIO())
+        self.assertTrue(MediaBlob.objects.filter(pk=blob.pk).exists())
+
+        MediaBlob.objects.filter(pk=blob.pk).update(orphaned_at=blob.orphaned_at - timedelta(days=2))
+        os.utime(path, (0, 0))
+        call_command('gc_media_blobs', stdout=StringIO())
+        self.assertFalse(MediaBlob.objects.filter(pk=blob.pk).exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_orphaned_media_uploaded_again(self):
+        """Test re-uploading an orphaned blob keeps it from collection and restores a missing file."""
+        content = self.create_test_image().read()
+        record = BiodiversityRecord.objects.create(
+            contributor=self.user,
+            location=Point(36.82, -1.29),
+            observation_date='2024-12-02T10:00:00Z',
+            image=SimpleUploadedFile('first.jpg', content, content_type='image/jpeg')
+        )
+        path = record.image.path
+        record.delete()
+        MediaBlob.objects.filter(name=record.image.name).update(orphaned_at=timezone.now() - timedelta(days=2))
+        os.unlink(path)
+
+        again = BiodiversityRecord.objects.create(
+            contributor=self.user,
+            location=Point(36.83, -1.28),
+            observation_date='2024-12-02T11:00:00Z',
+            image=SimpleUploadedFile('again.jpg', content, content_type='image/jpeg')
+        )
+        self.assertEqual(again.image.path, path)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(MediaBlob.objects.get(name=again.image.name).ref_count, 1)
+
+        call_command('gc_media_blobs', stdout=StringIO())
+        self.assertTrue(os.path.exists(path))
+
+    def test_media_upload(self):
+        """Test uploading media ahead of a bulk ingest."""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/api/v1/biodiversity/uploads/', {
+            'kind': 'image',
+            'file': self.create_test_image(),
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        upload = MediaUpload.objects.get(id=response.data['id'])
+        self.assertEqual(upload.owner, self.user)
+        self.assertTrue(upload.file.name.startswith('cas/'))
+
+    def test_resumable_upload_attached_to_record(self):
+        """Test a chunked upload session, resuming after a short request."""
+        self.client.force_authenticate(user=self.user)
+        content = b'RIFF' + bytes(range(256)) * 40
+        total = len(content)
+
+        response = self.client.post('/api/v1/biodiversity/uploads/', {
+            'kind': 'audio',
+            'filename': 'dawn_chorus.wav',
+            'total_size': total,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['status'], 'pending')
+        url = f"/api/v1/biodiversity/uploads/{response.data['id']}/"
+
+        response = self.client.patch(
+            url, content[:4000], content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes 0-3999/{total}'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['received_bytes'], 4000)
+
+        # A range that does not start at the received offset is refused
+        response = self.client.patch(
+            url, content[5000:], content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes 5000-{total - 1}/{total}'
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['received_bytes'], 4000)
+
+        response = self.client.post(f'{url}finalize/')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        response = self.client.patch(
+            url, content[4000:], content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes 4000-{total - 1}/{total}'
+        )
+        self.assertEqual(response.data['received_bytes'], total)
+
+        response = self.client.post(f'{url}finalize/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        upload = MediaUpload.objects.get(id=response.data['id'])
+        self.assertEqual(upload.status, 'complete')
+        self.assertTrue(upload.file.name.startswith('cas/'))
+        self.assertTrue(upload.file.name.endswith('.wav'))
+        with upload.file.open('rb') as stored:
+            self.assertEqual(stored.read(), content)
+
+        response = self.client.post('/api/v1/biodiversity/records/', {
+            'species_name': 'Turdus merula',
+            'latitude': -1.29,
+            'longitude': 36.82,
+            'observation_date': '2024-12-02T05:30:00Z',
+            'audio_upload': str(upload.id),
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        record = BiodiversityRecord.objects.get(id=response.data['id'])
+        self.assertEqual(record.audio.name, upload.file.name)
+
+    def test_bulk_create_records(self):
+        """Test bulk ingest with per-row results."""
+        self.client.force_authenticate(user=self.user)
+        upload = MediaUpload.objects.create(owner=self.user, kind='image', file=self.create_test_image())
+        rows = [
+            {
+                'species_name': 'Falco peregrinus',
+                'latitude': -1.29 + index * 0.01,
+                'longitude': 36.82,
+                'observation_date': '2024-12-02T10:00:00Z',
+                'image_upload': str(upload.id),
+            }
+            for index in range(3)
+        ]
+
+        response = self.client.post('/api/v1/biodiversity/records/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual([result['index'] for result in response.data['results']], [0, 1, 2])
+        record = BiodiversityRecord.objects.get(id=response.data['results'][0]['id'])
+        self.assertEqual(record.contributor, self.user)
+        self.assertEqual(record.image.name, upload.file.name)
+        self.assertEqual(SpeciesSummary.objects.get(normalized_name='falco peregrinus').observation_count, 3)
+
+    def test_bulk_create_ndjson_reports_invalid_rows(self):
+        """Test that invalid rows are reported without blocking valid ones."""
+        self.client.force_authenticate(user=self.user)
+        upload = MediaUpload.objects.create(owner=self.user, kind='image', file=self.create_test_image())
+        rows = [
+            {'species_name': 'Corvus corax', 'latitude': 1.0, 'longitude': 36.0,
+             'observation_date': '2024-12-02T10:00:00Z', 'image_upload': str(upload.id)},
+            {'species_name': 'No media', 'latitude': 1.0, 'longitude': 36.0,
+             'observation_date': '2024-12-02T10:00:00Z'},
+            {'species_name': 'Wrong kind', 'latitude': 1.0, 'longitude': 36.0,
+             'observation_date': '2024-12-02T10:00:00Z', 'audio_upload': str(upload.id)},
+            {'species_name': 'Bad latitude', 'latitude': 95.0, 'longitude': 36.0,
+             'observation_date': '2024-12-02T10:00:00Z', 'image_upload': str(upload.id)},
+        ]
+        body = '\n'.join(json.dumps(row) for row in rows)
+
+        response = self.client.post(
+            '/api/v1/biodiversity/records/bulk/', body, content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['created', 'invalid', 'invalid', 'invalid']
+        )
+        self.assertIn('audio_upload', response.data['results'][2]['errors'])
+        self.assertIn('latitude', response.data['results'][3]['errors'])
+
+    def test_bulk_create_requires_list(self):
+        """Test that a non-array body is rejected."""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/api/v1/biodiversity/records/bulk/', {'species_name': 'x'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def occurrence_file(self):
+        lines = [
+            'occurrenceID\tscientificName\tvernacularName\tdecimalLatitude\tdecimalLongitude\teventDate',
+            'obs-1\tPanthera leo\tLion\t-1.29\t36.82\t2024-11-02T06:30:00Z',
+            'obs-2\tPanthera leo\tLion\t-1.31\t36.85\t2024-11-03/2024-11-04',
+            'obs-3\tLoxodonta africana\t\t-2.65\t37.26\t2024-11-05T08:00:00+03:00',
+            'obs-4\tLoxodonta africana\t\t95\t37.26\t2024-11-05',
+        ]
+        return SimpleUploadedFile(
+            'occurrence.txt', ('\n'.join(lines) + '\n').encode(), content_type='text/tab-separated-values'
+        )
+    
+    def test_import_occurrences_endpoint(self):
+        """Test admins queue occurrence files that the import command loads with COPY."""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/api/v1/biodiversity/imports/', {'file': self.occurrence_file()})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.post('/api/v1/biodiversity/imports/', {'file': self.occurrence_file()})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['status'], response.data['source_name']), ('queued', 'occurrence.txt'))
+        
+        out = StringIO()
+        call_command('import_occurrences', '--queued', '--chunk-size', '2', stdout=out)
+        self.assertIn('3 records imported, 0 already present, 1 rejected', out.getvalue())
+        
+        response = self.client.get(f"/api/v1/biodiversity/imports/{response.data['id']}/")
+        self.assertEqual((response.data['status'], response.data['progress']), ('succeeded', 1.0))
+        lions = BiodiversityRecord.objects.filter(species_name='Panthera leo').order_by('observation_date')
+        self.assertEqual(lions.count(), 2)
+        self.assertEqual(lions[0].contributor, self.admin_user)
+        self.assertAlmostEqual(lions[0].location.y, -1.29)
+        self.assertEqual(lions[1].observation_date.isoformat(), '2024-11-03T00:00:00+00:00')
+        self.assertEqual(
+            BiodiversityRecord.objects.get(species_name='Loxodonta africana').observation_date.isoformat(),
+            '2024-11-05T05:00:00+00:00'
+        )
+        # Derived tables and the change log cover the imported records
+        self.assertEqual(SpeciesSummary.objects.get(normalized_name='panthera leo').observation_count, 2)
+        self.assertEqual(RecordChange.objects.filter(record_id__in=lions.values('id')).count(), 2)
+    
+    def test_import_occurrences_resumes(self):
+        """Test a failed import resumes after its last chunk without loading rows twice."""
+        occurrence_import = OccurrenceImport.objects.create(
+            owner=self.admin_user, file=self.occurrence_file(), source_name='partner'
+        )
+        real_transform = imports.transform_chunk
+        calls = []
+        
+        def fail_second_chunk(values):
+            calls.append(values)
+            if len(calls) == 2:
+                raise RuntimeError('disk full')
+            return real_transform(values)
+        
+        with mock.patch.object(imports, 'transform_chunk', side_effect=fail_second_chunk):
+            with self.assertRaises(CommandError):
+                call_command('import_occurrences', '--resume', str(occurrence_import.pk), '--chunk-size', '2',
+                             stdout=StringIO())
+        occurrence_import.refresh_from_db()
+        self.assertEqual(occurrence_import.status, OccurrenceImport.FAILED)
+        self.assertEqual((occurrence_import.rows_read, occurrence_import.rows_imported), (2, 2))
+        
+        call_command('import_occurrences', '--resume', str(occurrence_import.pk), '--chunk-size', '2',
+                     stdout=StringIO())
+        occurrence_import.refresh_from_db()
+        self.assertEqual(occurrence_import.status, OccurrenceImport.SUCCEEDED)
+        self.assertEqual((occurrence_import.rows_read, occurrence_import.rows_imported), (4, 3))
+        
+        # The same dataset imported again is recognised by its occurrence ids
+        again = OccurrenceImport.objects.create(
+            owner=self.admin_user, file=self.occurrence_file(), source_name='partner'
+        )
+        imports.run_import(again)
+        again.refresh_from_db()
+        self.assertEqual((again.rows_imported, again.rows_skipped), (0, 3))
+        self.assertEqual(BiodiversityRecord.objects.filter(species_name='Panthera leo').count(), 2)
+
+    def test_import_wide_occurrence_file(self):
+        """Test wide files keep only the staged columns and long remarks do not widen them."""
+        header = ['occurrenceID', 'scientificName', 'decimalLatitude', 'decimalLongitude', 'eventDate']
+        header += [f'extra{index}' for index in range(195)] + ['occurrenceRemarks']
+        rows = [
+            [f'obs-{index}', 'Panthera leo', '-1.29', '36.82', '2024-11-02'] + ['x' * 20] * 195
+            + ['r' * 5000 if index == 1 else 'short']
+            for index in range(3)
+        ]
+        lines = [('\t'.join(row) + '\n').encode() for row in [header] + rows]
+
+        delimiter, columns = imports.header_columns(lines[0])
+        values = imports.parse_lines(lines[1:], delimiter, columns)
+        self.assertEqual(set(values), set(imports.COLUMN_ALIASES))
+        self.assertEqual(values['notes'].dtype, object)
+        self.assertEqual(values['latitude'].dtype, f'<U{imports.PARSED_VALUE_LENGTH}')
+
+        occurrence_import = OccurrenceImport.objects.create(
+            owner=self.admin_user,
+            file=SimpleUploadedFile('wide.txt', b''.join(lines)),
+            source_name='wide'
+        )
+        imports.run_import(occurrence_import)
+        occurrence_import.refresh_from_db()
+        self.assertEqual(occurrence_import.rows_imported, 3)
+        self.assertEqual(
+            sorted(len(notes) for notes in BiodiversityRecord.objects.filter(
+                species_name='Panthera leo'
+            ).values_list('notes', flat=True)),
+            [5, 5, 5000]
+        )
+
+    def test_rebuild_species_summary_command(self):
+        """Test the rebuild command recreates summaries from records."""
+        SpeciesSummary.objects.all().delete()
+        call_command('rebuild_species_summary', stdout=StringIO())
+        
+        summary = SpeciesSummary.objects.get(normalized_name='accipiter cooperii')
+        self.assertEqual(summary.species_name, 'Accipiter cooperii')
+        self.assertEqual(summary.observation_count, 1)
+    
     def test_geographic_filter(self):
         """Test geographic radius filtering."""
         # Search within 10km of San Francisco
@@ -227,6 +1224,291 @@ class BiodiversityEndpointsTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 0)
     
+    def test_species_name_fuzzy_match(self):
+        """Test that ?match=fuzzy tolerates typos and orders by similarity."""
+        BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Accipiter gentilis',
+            common_name='Northern Goshawk',
+            location=Point(-122.4094, 37.7849),
+            observation_date='2024-12-05T10:00:00Z',
+            is_public=True
+        )
+
+        response = self.client.get('/api/v1/biodiversity/records/?species_name=Acipiter cooperi')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 0)
+
+        response = self.client.get('/api/v1/biodiversity/records/?species_name=Acipiter cooperi&match=fuzzy')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreaterEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['species_name'], 'Accipiter cooperii')
+
+    def test_invalid_match_mode(self):
+        """Test that an unknown match mode is rejected."""
+        response = self.client.get('/api/v1/biodiversity/records/?species_name=hawk&match=phonetic')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bbox_filter(self):
+        """Test bounding-box filtering, including boxes across the antimeridian."""
+        response = self.client.get('/api/v1/biodiversity/records/?in_bbox=-123,37,-122,38')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        
+        response = self.client.get('/api/v1/biodiversity/records/?in_bbox=170,37,-150,38')
+        self.assertEqual(len(response.data['results']), 0)
+        
+        response = self.client.get('/api/v1/biodiversity/records/?in_bbox=170,37,-120,38')
+        self.assertEqual(len(response.data['results']), 1)
+        
+        response = self.client.get('/api/v1/biodiversity/records/?in_bbox=a,b,c')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def record_partition(self, record):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT tableoid::regclass::text FROM {BiodiversityRecord._meta.db_table} WHERE id = %s',
+                [record.id]
+            )
+            return cursor.fetchone()[0]
+    
+    def test_record_partitions(self):
+        """Test records are routed to observation_date partitions and queries prune to them."""
+        table = BiodiversityRecord._meta.db_table
+        # Fresh databases start with partitions from the current year on
+        self.assertEqual(self.record_partition(self.test_record), f'{table}_default')
+        
+        out = StringIO()
+        call_command('create_record_partitions', '--ahead', '0', stdout=out)
+        self.assertIn(f'{table}_y2024', out.getvalue())
+        self.assertEqual(self.record_partition(self.test_record), f'{table}_y2024')
+        
+        plan = BiodiversityRecord.objects.filter(
+            observation_date__gte='2024-06-01T00:00:00Z',
+            observation_date__lt='2024-12-31T00:00:00Z'
+        ).explain()
+        self.assertIn(f'{table}_y2024', plan)
+        self.assertNotIn(f'{table}_default', plan)
+        
+        # Rows move between partitions when their date changes
+        self.test_record.observation_date = timezone.now()
+        self.test_record.save()
+        self.assertEqual(self.record_partition(self.test_record), f'{table}_y{timezone.now().year}')
+        self.assertEqual(self.client.get(f'/api/v1/biodiversity/records/{self.test_record.id}/').status_code, 200)
+    
+    def test_near_duplicates_collapse_in_species_list(self):
+        """Test resubmissions are marked as duplicates and counted once."""
+        resubmitted = BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='accipiter cooperii',
+            location=Point(-122.4196, 37.7750),
+            observation_date='2024-12-01T10:10:00Z',
+            is_public=True
+        )
+        self.assertEqual(resubmitted.duplicate_of_id, self.test_record.id)
+        
+        # Other places, species and contributors without shared media are kept apart
+        others = [
+            BiodiversityRecord.objects.create(
+                contributor=contributor,
+                species_name=species_name,
+                location=location,
+                observation_date='2024-12-01T10:05:00Z',
+                is_public=True
+            )
+            for contributor, species_name, location in [
+                (self.user, 'Accipiter cooperii', Point(-122.4094, 37.7849)),
+                (self.user, 'Buteo jamaicensis', Point(-122.4194, 37.7749)),
+                (self.admin_user, 'Accipiter cooperii', Point(-122.4194, 37.7749)),
+            ]
+        ]
+        self.assertEqual([record.duplicate_of_id for record in others], [None, None, None])
+        
+        response = self.client.get('/api/v1/biodiversity/species/')
+        counts = {row['scientific_name']: row['observation_count'] for row in response.data['results']}
+        self.assertEqual(counts, {'Accipiter cooperii': 3, 'Buteo jamaicensis': 1})
+    
+    def test_shared_media_marks_duplicate(self):
+        """Test the same media submitted by another user is a duplicate."""
+        content = self.create_test_image().read()
+        first = BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Falco peregrinus',
+            location=Point(36.82, -1.29),
+            observation_date='2024-12-02T10:00:00Z',
+            image=SimpleUploadedFile('first.jpg', content, content_type='image/jpeg')
+        )
+        shared = BiodiversityRecord.objects.create(
+            contributor=self.admin_user,
+            species_name='Falco peregrinus',
+            location=Point(36.8201, -1.2901),
+            observation_date='2024-12-02T10:20:00Z',
+            image=SimpleUploadedFile('shared.jpg', content, content_type='image/jpeg')
+        )
+        self.assertEqual(shared.duplicate_of_id, first.id)
+    
+    def test_deleting_canonical_promotes_duplicate(self):
+        """Test the earliest duplicate takes over when the canonical record is deleted."""
+        duplicates = [
+            BiodiversityRecord.objects.create(
+                contributor=self.user,
+                species_name='Accipiter cooperii',
+                location=Point(-122.4194, 37.7749),
+                observation_date=f'2024-12-01T10:{minute:02d}:00Z',
+                is_public=True
+            )
+            for minute in (5, 10)
+        ]
+        self.assertEqual({record.duplicate_of_id for record in duplicates}, {self.test_record.id})
+        
+        self.test_record.delete()
+        for record in duplicates:
+            record.refresh_from_db()
+        self.assertIsNone(duplicates[0].duplicate_of_id)
+        self.assertEqual(duplicates[1].duplicate_of_id, duplicates[0].id)
+        self.assertEqual(
+            SpeciesSummary.objects.get(normalized_name='accipiter cooperii').observation_count, 1
+        )
+        # The promoted record takes over the deleted one's place in the rollups
+        self.assertEqual(self.rollup_series(period='day'), [('2024-12-01', 'Accipiter cooperii', 1, 0)])
+    
+    def test_edits_regroup_duplicates(self):
+        """Test editing species, place or date moves a record in or out of a group."""
+        resubmitted = BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Accipiter cooperii',
+            location=Point(-122.4194, 37.7749),
+            observation_date='2024-12-01T10:05:00Z',
+            is_public=True
+        )
+        self.assertEqual(resubmitted.duplicate_of_id, self.test_record.id)
+
+        resubmitted.location = Point(-122.30, 37.80)
+        resubmitted.save()
+        resubmitted.refresh_from_db()
+        self.assertIsNone(resubmitted.duplicate_of_id)
+        self.assertEqual(
+            SpeciesSummary.objects.get(normalized_name='accipiter cooperii').observation_count, 2
+        )
+        self.assertEqual(self.rollup_series(period='day'), [('2024-12-01', 'Accipiter cooperii', 2, 0)])
+
+        resubmitted.location = Point(-122.4194, 37.7749)
+        resubmitted.save()
+        resubmitted.refresh_from_db()
+        self.assertEqual(resubmitted.duplicate_of_id, self.test_record.id)
+        self.assertEqual(self.rollup_series(period='day'), [('2024-12-01', 'Accipiter cooperii', 1, 0)])
+
+        # A canonical record renamed away hands its group to its earliest duplicate
+        self.test_record.species_name = 'Buteo jamaicensis'
+        self.test_record.save()
+        resubmitted.refresh_from_db()
+        self.assertIsNone(resubmitted.duplicate_of_id)
+        counts = {summary.normalized_name: summary.observation_count for summary in SpeciesSummary.objects.all()}
+        self.assertEqual(counts, {'accipiter cooperii': 1, 'buteo jamaicensis': 1})
+
+    def test_detect_duplicates_command(self):
+        """Test the backfill regroups records observed in each window."""
+        later = BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Accipiter cooperii',
+            location=Point(-122.4194, 37.7749),
+            observation_date='2024-12-01T10:20:00Z',
+            is_public=True
+        )
+        BiodiversityRecord.objects.filter(pk=later.pk).update(duplicate_of=None)
+        call_command('rebuild_species_summary', stdout=StringIO())
+        call_command('rebuild_observation_rollups', stdout=StringIO())
+        self.assertEqual(
+            SpeciesSummary.objects.get(normalized_name='accipiter cooperii').observation_count, 2
+        )
+        self.assertEqual(self.rollup_series(period='day'), [('2024-12-01', 'Accipiter cooperii', 2, 0)])
+        
+        out = StringIO()
+        call_command('detect_duplicates', '--window-hours', '6', stdout=out)
+        self.assertIn('regrouped 1', out.getvalue())
+        later.refresh_from_db()
+        self.assertEqual(later.duplicate_of_id, self.test_record.id)
+        self.assertEqual(
+            SpeciesSummary.objects.get(normalized_name='accipiter cooperii').observation_count, 1
+        )
+        self.assertEqual(self.rollup_series(period='day'), [('2024-12-01', 'Accipiter cooperii', 1, 0)])
+    
+    def test_nearest_observations(self):
+        """Test nearest-N returns records closest first with distances."""
+        BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Buteo jamaicensis',
+            location=Point(-122.2, 37.7749, srid=4326),
+            observation_date='2024-12-03T10:00:00Z',
+            is_public=True
+        )
+        
+        response = self.client.get('/api/v1/biodiversity/records/nearest/?lat=37.7749&lng=-122.19&limit=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['species_name'] for item in response.data],
+                         ['Buteo jamaicensis', 'Accipiter cooperii'])
+        self.assertLess(response.data[0]['distance'], response.data[1]['distance'])
+        self.assertAlmostEqual(response.data[0]['distance'], 880, delta=20)
+        
+        response = self.client.get('/api/v1/biodiversity/records/nearest/?lat=37.7749')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_radius_filter_includes_distance(self):
+        """Test the radius filter annotates each result with its distance."""
+        response = self.client.get('/api/v1/biodiversity/records/?lat=37.7749&lng=-122.4194&radius=10')
+        self.assertAlmostEqual(response.data['results'][0]['distance'], 0, delta=1)
+    
+    def test_keyset_pagination(self):
+        """Test cursor pagination walks every record once without counting."""
+        for index in range(24):
+            BiodiversityRecord.objects.create(
+                contributor=self.user,
+                species_name=f'Species {index:02d}',
+                location=Point(-122.4094, 37.7849),
+                # Shared timestamps exercise the id tie-breaker
+                observation_date=f'2024-11-{index % 6 + 1:02d}T10:00:00Z',
+                is_public=True
+            )
+        
+        seen = []
+        url = '/api/v1/biodiversity/records/?cursor='
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        
+        expected = [
+            str(pk) for pk in BiodiversityRecord.objects.order_by('-observation_date', '-id').values_list('id', flat=True)
+        ]
+        self.assertEqual(seen, expected)
+        
+        response = self.client.get('/api/v1/biodiversity/records/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        
+        # Page-number mode is unchanged for existing clients
+        response = self.client.get('/api/v1/biodiversity/records/?page=2')
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_keyset_pagination_rejects_other_orderings(self):
+        """Test a cursor is not silently combined with another ordering."""
+        response = self.client.get('/api/v1/biodiversity/records/?cursor=&ordering=-observation_date')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        for query in [
+            'ordering=species_name',
+            'search=hawk',
+            'species_name=Acipiter cooperi&match=fuzzy',
+        ]:
+            response = self.client.get(f'/api/v1/biodiversity/records/?cursor=&{query}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
+            self.assertIn('cursor', response.data)
+            # The same request by page number keeps its ordering
+            response = self.client.get(f'/api/v1/biodiversity/records/?{query}')
+            self.assertEqual(response.status_code, status.HTTP_200_OK, query)
+
     def test_search_functionality(self):
         """Test search functionality."""
         response = self.client.get('/api/v1/biodiversity/records/?search=hawk')
@@ -236,7 +1518,38 @@ class BiodiversityEndpointsTestCase(TestCase):
         response = self.client.get('/api/v1/biodiversity/records/?search=falcon')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 0)
-    
+
+    def test_search_prefix_match(self):
+        """Test that a partially typed word matches (type-ahead)."""
+        response = self.client.get('/api/v1/biodiversity/records/?search=Accip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+        response = self.client.get('/api/v1/biodiversity/records/?search=golden gate')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_search_ranks_species_matches_first(self):
+        """Test that a species name match outranks a match in the notes."""
+        BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Corvus corax',
+            common_name='Common Raven',
+            location=Point(-122.4094, 37.7849),
+            observation_date='2024-12-05T10:00:00Z',
+            notes='Chasing an accipiter away from the nest',
+            is_public=True
+        )
+
+        response = self.client.get('/api/v1/biodiversity/records/?search=accipiter')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(response.data['results'][0]['species_name'], 'Accipiter cooperii')
+
+        # An explicit ordering still wins over relevance
+        response = self.client.get('/api/v1/biodiversity/records/?search=accipiter&ordering=-observation_date')
+        self.assertEqual(response.data['results'][0]['species_name'], 'Corvus corax')
+
     def test_ordering_functionality(self):
         """Test ordering functionality."""
         # Create another record with different date
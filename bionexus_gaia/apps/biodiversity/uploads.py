@@ -0,0 +1,112 @@
+"""
+Resumable media uploads.
+
+A session's bytes are appended straight from the request stream to a
+``.part`` file under ``MEDIA_ROOT/uploads/partial/`` in fixed-size reads, so a
+chunk is never held in memory. Finalizing hashes the completed file and
+renames it into the content-addressed store with ``os.replace``, without
+copying it; if identical content is already stored the part file is dropped.
+"""
+import os
+import re
+
+from django.conf import settings
+
+from .storage import media_storage
+
+PARTIAL_UPLOAD_DIR = os.path.join('uploads', 'partial')
+
+# Bytes read from the request stream per write
+UPLOAD_COPY_SIZE = 64 * 1024
+
+_CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+
+class UploadError(Exception):
+    """
+    A chunk or finalize request that cannot be applied to the session.
+    """
+
+
+def max_upload_size():
+    return getattr(settings, 'RESUMABLE_UPLOAD_MAX_SIZE', 2 * 1024 ** 3)
+
+
+def partial_path(upload):
+    return os.path.join(settings.MEDIA_ROOT, PARTIAL_UPLOAD_DIR, f'{upload.id}.part')
+
+
+def parse_content_range(header):
+    """
+    Parse ``bytes start-end/total`` into ``(start, end, total)``; ``total`` is
+    None when given as ``*``. Raises UploadError if the header is malformed.
+    """
+    match = _CONTENT_RANGE.match(header or '')
+    if not match:
+        raise UploadError('Content-Range must look like "bytes start-end/total".')
+    start, end = int(match.group(1)), int(match.group(2))
+    total = None if match.group(3) == '*' else int(match.group(3))
+    if end < start or (total is not None and end >= total):
+        raise UploadError('Content-Range is not a valid byte range.')
+    return start, end, total
+
+
+def start_session(upload):
+    """
+    Create the empty partial file for a new pending upload.
+    """
+    path = partial_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+
+
+def append_chunk(upload, stream, content_range):
+    """
+    Append the byte range described by ``content_range`` from ``stream``.
+
+    ``upload`` must be locked by the caller (``select_for_update``). Ranges
+    must start at the number of bytes already received; a client resuming
+    after a failure asks for the session to learn where to continue.
+    """
+    start, end, total = parse_content_range(content_range)
+    if upload.status != 'pending':
+        raise UploadError('Upload is already complete.')
+    if total is not None and total != upload.total_size:
+        raise UploadError('Content-Range total does not match the session size.')
+    if end >= upload.total_size:
+        raise UploadError('Content-Range extends past the end of the upload.')
+    if start != upload.received_bytes:
+        raise UploadError(f'Expected a range starting at byte {upload.received_bytes}.')
+
+    remaining = end - start + 1
+    with open(partial_path(upload), 'r+b') as partial:
+        # Drop any tail left by an interrupted earlier attempt
+        partial.truncate(start)
+        partial.seek(start)
+        while remaining:
+            data = stream.read(min(UPLOAD_COPY_SIZE, remaining))
+            if not data:
+                break
+            partial.write(data)
+            remaining -= len(data)
+        written = partial.tell() - start
+
+    upload.received_bytes = start + written
+    upload.save(update_fields=['received_bytes', 'updated_at'])
+    if remaining:
+        raise UploadError(f'Request body ended after {written} of {end - start + 1} bytes.')
+
+
+def finalize_upload(upload):
+    """
+    Move a fully received upload into storage and mark it complete.
+    """
+    if upload.status != 'pending':
+        raise UploadError('Upload is already complete.')
+    if upload.received_bytes != upload.total_size:
+        raise UploadError(f'Only {upload.received_bytes} of {upload.total_size} bytes have been received.')
+
+    upload.file.name = media_storage.store_local_file(partial_path(upload), upload.filename)
+    upload.status = 'complete'
+    upload.save(update_fields=['file', 'status', 'updated_at'])
+    return upload
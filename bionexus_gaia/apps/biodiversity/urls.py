@@ -1,11 +1,24 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BiodiversityRecordViewSet, species_list
+from .views import (
+    BiodiversityRecordViewSet, HeatmapGridViewSet, MediaUploadViewSet, OccurrenceImportViewSet, ValidationJobViewSet,
+    heatmap_tile, observation_rollups, species_list
+)
 
 router = DefaultRouter()
 router.register(r'records', BiodiversityRecordViewSet)
+router.register(r'uploads', MediaUploadViewSet, basename='mediaupload')
+router.register(r'validation-jobs', ValidationJobViewSet, basename='validationjob')
+router.register(r'heatmaps', HeatmapGridViewSet, basename='heatmapgrid')
+router.register(r'imports', OccurrenceImportViewSet, basename='occurrenceimport')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('species/', species_list, name='species-list'),
+    path('rollups/', observation_rollups, name='observation-rollups'),
+    path(
+        'heatmaps/<int:grid_id>/tiles/<int:tile_x>/<int:tile_y>/<str:digest>.npy',
+        heatmap_tile,
+        name='heatmap-tile'
+    ),
 ]
\ No newline at end of file
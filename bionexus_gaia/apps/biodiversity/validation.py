@@ -0,0 +1,153 @@
+"""
+Database-backed queue of record validation jobs.
+
+``validate`` only enqueues a ValidationJob. Worker processes
+(``process_validation_jobs``) claim due jobs with ``SELECT ... FOR UPDATE
+SKIP LOCKED`` in a short transaction, so any number of workers can poll the
+same table without blocking each other, and then anchor the claimed records
+together in one Merkle batch. Failed jobs are retried with exponential
+backoff; jobs left running by a worker that died are reclaimed after
+``VALIDATION_JOB_TIMEOUT``. A job whose record is still being anchored by
+another worker's batch is requeued without using up an attempt.
+"""
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .anchoring import anchor_pending_records, request_anchor
+from .models import BiodiversityRecord, ValidationJob
+
+BACKOFF_BASE_SECONDS = 10
+BACKOFF_MAX_SECONDS = 3600
+
+
+def job_timeout():
+    return timedelta(seconds=getattr(settings, 'VALIDATION_JOB_TIMEOUT', 300))
+
+
+def backoff_delay(attempts):
+    """
+    Delay before retry number ``attempts``: exponential, capped, with jitter so
+    jobs that failed together do not all retry in the same instant.
+    """
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def enqueue_validation(record):
+    """
+    Return the record's open validation job, creating one if there is none.
+    """
+    with transaction.atomic():
+        # Lock the record so concurrent requests do not both create a job
+        BiodiversityRecord.objects.select_for_update().filter(pk=record.pk).exists()
+        job = ValidationJob.objects.filter(
+            record=record, status__in=[ValidationJob.QUEUED, ValidationJob.RUNNING]
+        ).first()
+        if job is None:
+            job = ValidationJob.objects.create(record=record)
+    return job
+
+
+def claim_jobs(batch_size, worker=''):
+    """
+    Claim up to ``batch_size`` due jobs for this worker and mark them running.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            ValidationJob.objects.filter(
+                Q(status=ValidationJob.QUEUED, run_after__lte=now)
+                | Q(status=ValidationJob.RUNNING, locked_at__lt=now - job_timeout())
+            )
+            .select_related('record')
+            .select_for_update(skip_locked=True, of=('self',))
+            .order_by('run_after')[:batch_size]
+        )
+        if jobs:
+            ValidationJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status=ValidationJob.RUNNING,
+                attempts=F('attempts') + 1,
+                locked_at=now,
+                locked_by=worker,
+            )
+            for job in jobs:
+                job.status = ValidationJob.RUNNING
+                job.attempts += 1
+                job.locked_at = now
+                job.locked_by = worker
+    return jobs
+
+
+def _fail(jobs, error):
+    now = timezone.now()
+    for job in jobs:
+        if job.attempts >= job.max_attempts:
+            ValidationJob.objects.filter(pk=job.pk).update(
+                status=ValidationJob.FAILED,
+                last_error=error,
+                completed_at=now,
+                locked_at=None,
+            )
+        else:
+            ValidationJob.objects.filter(pk=job.pk).update(
+                status=ValidationJob.QUEUED,
+                last_error=error,
+                run_after=now + backoff_delay(job.attempts),
+                locked_at=None,
+            )
+
+
+def _requeue(jobs):
+    ValidationJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+        status=ValidationJob.QUEUED,
+        attempts=F('attempts') - 1,
+        run_after=timezone.now() + timedelta(seconds=BACKOFF_BASE_SECONDS),
+        locked_at=None,
+    )
+
+
+def process_jobs(jobs):
+    """
+    Anchor the records of claimed ``jobs`` together and settle each job.
+
+    Returns ``(succeeded, failed)`` lists of jobs; jobs requeued behind
+    another worker's batch are in neither.
+    """
+    if not jobs:
+        return [], []
+    try:
+        for job in jobs:
+            request_anchor(job.record)
+        anchor_pending_records()
+    except Exception as exc:
+        _fail(jobs, f'{type(exc).__name__}: {exc}')
+        return [], jobs
+
+    verified = set(
+        BiodiversityRecord.objects.filter(
+            pk__in=[job.record_id for job in jobs], is_verified=True
+        ).values_list('pk', flat=True)
+    )
+    succeeded = [job for job in jobs if job.record_id in verified]
+    # Anything else is in a batch another worker has claimed; check again later
+    pending = [job for job in jobs if job.record_id not in verified]
+    ValidationJob.objects.filter(pk__in=[job.pk for job in succeeded]).update(
+        status=ValidationJob.SUCCEEDED,
+        completed_at=timezone.now(),
+        locked_at=None,
+        last_error='',
+    )
+    _requeue(pending)
+    return succeeded, []
+
+
+def run_once(batch_size=100, worker=''):
+    """
+    Claim and process one batch of jobs; returns ``(succeeded, failed)``.
+    """
+    return process_jobs(claim_jobs(batch_size, worker))
@@ -1,28 +1,72 @@
-import csv
-import json
-from datetime import datetime
-from django.http import HttpResponse
-from django.db.models import Q
+from io import BytesIO
+
+from django.db import transaction
+from django.http import FileResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.core.files.storage import default_storage
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_date
+from django.urls import reverse
+from django.db.models import Q, Value
+from django.contrib.gis.db.models import PointField
+from django.contrib.gis.db.models.functions import Distance as DistanceFunc, GeometryDistance
 from django.contrib.gis.measure import Distance
 from django.contrib.gis.geos import Point
-from rest_framework import viewsets, status, filters, generics
+from rest_framework import viewsets, status, filters, generics, mixins
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
-from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiResponse, OpenApiExample, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
 from django_filters.rest_framework import DjangoFilterBackend
 
-from .models import BiodiversityRecord
-from .serializers import BiodiversityRecordSerializer, BiodiversityRecordExportSerializer
+from bionexus_gaia.conditional import ConditionalListMixin, make_etag, queryset_version, respond_conditionally
+from bionexus_gaia.pagination import KeysetPagination
+from .models import (
+    AnchorBatch, BiodiversityRecord, HeatmapGrid, HeatmapTile, MediaUpload, OccurrenceImport, RecordAnchor,
+    SpeciesSummary, ValidationJob
+)
+from .serializers import (
+    BiodiversityRecordSerializer, BulkRecordSerializer, HeatmapGridSerializer, MediaUploadSerializer,
+    OccurrenceImportSerializer, SpeciesSummarySerializer, ValidationJobSerializer
+)
 from .filters import BiodiversityRecordFilter
+from .search import RecordSearchFilter
+from .exports import EXPORT_CONTENT_TYPES, stream_export
+from .dwca import artifact_name, store_while_streaming, stream_archive, visibility_scope
+from .renderers import CSVRenderer, FastJSONRenderer, NDJSONRenderer, ZipRenderer
+from .fastpath import FastRecordListMixin
+from .parsers import NDJSONParser
+from .ingest import MAX_BULK_RECORDS, ingest_records
+from .uploads import UploadError, append_chunk, finalize_upload
+from .anchoring import proof_for
+from .changes import changes_since, is_tombstone, parse_cursor
+from .rollups import PERIODS, cell_bounds, query_rollups
+from .summaries import normalize_species_name
+from .validation import enqueue_validation
 from .permissions import IsContributorOrReadOnly
 
-class BiodiversityRecordViewSet(viewsets.ModelViewSet):
+# Upper bound on results from the nearest-observation endpoint
+MAX_NEAREST_RESULTS = 100
+
+# Default and largest page of the delta sync feed
+DEFAULT_CHANGES_PAGE = 100
+MAX_CHANGES_PAGE = 1000
+
+class BiodiversityRecordViewSet(ConditionalListMixin, FastRecordListMixin, viewsets.ModelViewSet):
     """
     API endpoint for biodiversity records.
     
     list:
-        Return a list of all biodiversity records.
+        Return a list of all biodiversity records. Supports conditional GET
+        with ``If-None-Match`` / ``If-Modified-Since``, and ``?fields=`` /
+        ``?omit=`` (comma-separated) to choose the fields returned. Rows
+        are read with ``values_list()`` and serialized without model
+        instances (see fastpath.py).
         
     create:
         Create a new biodiversity record.
@@ -42,11 +86,15 @@ class BiodiversityRecordViewSet(viewsets.ModelViewSet):
     queryset = BiodiversityRecord.objects.all()
     serializer_class = BiodiversityRecordSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsContributorOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # Ordering runs first so fuzzy-match similarity and search relevance can take precedence
+    filter_backends = [filters.OrderingFilter, DjangoFilterBackend, RecordSearchFilter]
     filterset_class = BiodiversityRecordFilter
     search_fields = ['species_name', 'common_name', 'notes', 'location_name']
     ordering_fields = ['species_name', 'observation_date', 'created_at', 'ai_confidence']
     ordering = ['-observation_date']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-observation_date', '-id')
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     
     def get_queryset(self):
         """
@@ -73,93 +121,514 @@ class BiodiversityRecordViewSet(viewsets.ModelViewSet):
                 point = Point(float(lng), float(lat), srid=4326)
                 queryset = queryset.filter(
                     location__distance_lte=(point, Distance(km=float(radius)))
-                )
+                ).annotate(distance=DistanceFunc('location', point))
             except (ValueError, TypeError):
                 pass
         
+        # Load only the columns and relations the requested fields read
+        if self.action in ('list', 'retrieve', 'nearest', 'changes'):
+            # Keyset cursors are built from the ordering columns, so keep them loaded
+            queryset = self.get_serializer().restrict_queryset(
+                queryset, [field.lstrip('-') for field in self.keyset_ordering]
+            )
+        
         return queryset
     
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('since', OpenApiTypes.STR, description='Cursor from a previous page; omit for a full sync'),
+            OpenApiParameter('limit', OpenApiTypes.INT, description=f'Defaults to {DEFAULT_CHANGES_PAGE}, at most {MAX_CHANGES_PAGE}'),
+        ],
+        responses={
+            200: OpenApiResponse(
+                description='Changed records and tombstones, oldest change first',
+                examples=[
+                    OpenApiExample(
+                        name='Changes Response',
+                        value={
+                            "changes": [
+                                {"id": "0b9f7c1e-5d2a-4c1b-9a7e-2f6d8e4b3c21", "deleted": False, "record": {}},
+                                {"id": "5e3a1d2c-8b4f-4e6a-9c7d-1a2b3c4d5e6f", "deleted": True}
+                            ],
+                            "next": "48213.1907",
+                            "has_more": False
+                        }
+                    )
+                ]
+            )
+        }
+    )
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Return records created, updated or deleted after the ``since`` cursor.
+        
+        Each record appears once, at its latest change. Records deleted or
+        no longer visible to the user come back as ``deleted`` tombstones.
+        Pass ``next`` as ``since`` to continue; ``has_more`` says whether to
+        fetch again right away.
+        """
+        try:
+            cursor = parse_cursor(request.query_params.get('since'))
+            limit = int(request.query_params.get('limit', DEFAULT_CHANGES_PAGE))
+        except ValueError:
+            return Response(
+                {"error": "since must be a cursor returned by this feed and limit an integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, MAX_CHANGES_PAGE))
+        
+        changes, next_cursor, has_more = changes_since(request.user, cursor, limit)
+        live = [change.record_id for change in changes if not is_tombstone(change, request.user)]
+        records = list(self.get_queryset().filter(pk__in=live))
+        serialized = dict(zip(
+            (record.pk for record in records),
+            self.get_serializer(records, many=True).data
+        ))
+        
+        results = []
+        for change in changes:
+            data = serialized.get(change.record_id)
+            if data is None:
+                results.append({'id': str(change.record_id), 'deleted': True})
+            else:
+                results.append({'id': str(change.record_id), 'deleted': False, 'record': data})
+        return Response({'changes': results, 'next': next_cursor, 'has_more': has_more})
+    
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('lat', OpenApiTypes.FLOAT, required=True),
+            OpenApiParameter('lng', OpenApiTypes.FLOAT, required=True),
+            OpenApiParameter('limit', OpenApiTypes.INT, description=f'Defaults to 10, at most {MAX_NEAREST_RESULTS}'),
+        ]
+    )
     @action(detail=False, methods=['get'])
+    def nearest(self, request):
+        """
+        Return the N observations nearest to a point, closest first.
+        
+        Ordering uses the KNN ``<->`` operator so the GiST index on ``location``
+        is walked in distance order; each result carries ``distance`` in metres.
+        """
+        try:
+            point = Point(
+                float(request.query_params['lng']),
+                float(request.query_params['lat']),
+                srid=4326
+            )
+            limit = int(request.query_params.get('limit', 10))
+        except (KeyError, ValueError):
+            return Response(
+                {"error": "lat and lng are required and limit must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, MAX_NEAREST_RESULTS))
+        
+        geography_point = Value(point, output_field=PointField(geography=True, srid=4326))
+        queryset = self.filter_queryset(self.get_queryset()).annotate(
+            distance=DistanceFunc('location', point)
+        ).order_by(GeometryDistance('location', geography_point))[:limit]
+        
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+    
+    @action(
+        detail=False,
+        methods=['get'],
+        renderer_classes=[JSONRenderer, CSVRenderer, NDJSONRenderer]
+    )
     def export(self, request):
         """
-        Export biodiversity records as CSV or JSON.
+        Export biodiversity records as CSV, JSON or NDJSON.
+
+        Rows are streamed from a server-side cursor, so exports are not capped.
+        Pass ``limit`` to export at most that many records.
         """
-        format_type = request.query_params.get('format', 'csv')
-        queryset = self.get_queryset()
+        format_type = request.query_params.get('format', 'csv').lower()
+        if format_type not in EXPORT_CONTENT_TYPES:
+            return Response(
+                {"error": f"Unsupported export format '{format_type}'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Limit export to 10000 records for performance
-        queryset = queryset[:10000]
+        queryset = self.filter_queryset(self.get_queryset())
         
-        if format_type.lower() == 'json':
-            # Export as JSON
-            serializer = BiodiversityRecordExportSerializer(queryset, many=True)
-            response = HttpResponse(
-                json.dumps(serializer.data, indent=2, default=str),
-                content_type='application/json'
+        try:
+            queryset = self._limit_export(queryset)
+        except ValueError:
+            return Response(
+                {"error": "limit must be a positive integer"},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            response['Content-Disposition'] = 'attachment; filename="biodiversity_export.json"'
-            
-        else:
-            # Default: Export as CSV
-            serializer = BiodiversityRecordExportSerializer(queryset, many=True)
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = 'attachment; filename="biodiversity_export.csv"'
-            
-            # Create CSV writer and write header
-            if queryset.exists():
-                # Get field names from the first serialized item
-                first_item = BiodiversityRecordExportSerializer(queryset[0]).data
-                fieldnames = first_item.keys()
-            else:
-                # Use default fieldnames if no data
-                fieldnames = BiodiversityRecordExportSerializer.Meta.fields
-            
-            writer = csv.DictWriter(response, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            # Write data rows, handling datetime serialization
-            for item in serializer.data:
-                # Convert datetime fields to strings
-                for key, value in item.items():
-                    if isinstance(value, datetime):
-                        item[key] = value.isoformat()
-                writer.writerow(item)
         
+        response = StreamingHttpResponse(
+            stream_export(queryset, format_type),
+            content_type=EXPORT_CONTENT_TYPES[format_type]
+        )
+        response['Content-Disposition'] = f'attachment; filename="biodiversity_export.{format_type}"'
         return response
     
+    def _limit_export(self, queryset):
+        limit = self.request.query_params.get('limit')
+        if not limit:
+            return queryset
+        limit = int(limit)
+        if limit < 1:
+            raise ValueError('limit must be a positive integer')
+        return queryset[:limit]
+    
+    @extend_schema(
+        responses={
+            (200, 'application/zip'): OpenApiTypes.BINARY,
+            304: OpenApiResponse(description='The archive has not changed'),
+        }
+    )
+    @action(detail=False, methods=['get'], renderer_classes=[JSONRenderer, ZipRenderer])
+    def dwca(self, request):
+        """
+        Export biodiversity records as a Darwin Core Archive.
+        
+        Accepts the same filters and ``limit`` as ``export``. The archive is
+        streamed as it is built and stored, so an identical request for
+        unchanged records is served from the stored copy.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        count, latest = queryset_version(queryset)
+        try:
+            queryset = self._limit_export(queryset)
+        except ValueError:
+            return Response(
+                {"error": "limit must be a positive integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        name = artifact_name(request.query_params, visibility_scope(request.user), count, latest)
+        
+        def build_response():
+            if default_storage.exists(name):
+                return FileResponse(
+                    default_storage.open(name, 'rb'),
+                    content_type='application/zip',
+                    as_attachment=True,
+                    filename='biodiversity_dwca.zip'
+                )
+            response = StreamingHttpResponse(
+                store_while_streaming(stream_archive(queryset, latest or timezone.now()), name),
+                content_type='application/zip'
+            )
+            response['Content-Disposition'] = 'attachment; filename="biodiversity_dwca.zip"'
+            return response
+        
+        return respond_conditionally(request, make_etag(request, count, latest), latest, build_response)
+    
+    @extend_schema(
+        request=BulkRecordSerializer(many=True),
+        responses={
+            201: OpenApiResponse(description='All records created'),
+            207: OpenApiResponse(description='Some rows were rejected; see per-row results'),
+        }
+    )
+    @action(
+        detail=False,
+        methods=['post'],
+        permission_classes=[IsAuthenticated],
+        parser_classes=[JSONParser, NDJSONParser]
+    )
+    def bulk(self, request):
+        """
+        Create many records from a JSON array or NDJSON body.
+        
+        Media are referenced by the ids of earlier uploads (``image_upload``,
+        ``audio_upload``, ``video_upload``). Each row gets a result with its
+        index and either the new record id or its validation errors.
+        """
+        if not isinstance(request.data, list):
+            return Response(
+                {"error": "Expected a JSON array or NDJSON body of records"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(request.data) > MAX_BULK_RECORDS:
+            return Response(
+                {"error": f"At most {MAX_BULK_RECORDS} records can be created per request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        results = ingest_records(request.data, request.user)
+        created = sum(1 for result in results if result['status'] == 'created')
+        return Response(
+            {
+                "created": created,
+                "failed": len(results) - created,
+                "results": results,
+            },
+            status=status.HTTP_201_CREATED if created == len(results) else status.HTTP_207_MULTI_STATUS
+        )
+    
+    @extend_schema(
+        request=None,
+        responses={
+            200: OpenApiResponse(description='Record already verified'),
+            202: ValidationJobSerializer,
+        }
+    )
     @action(detail=True, methods=['post'])
     def validate(self, request, pk=None):
         """
-        Validate a biodiversity record on the blockchain.
-        This is a placeholder for the actual blockchain integration.
+        Queue a biodiversity record for validation on the blockchain.
+        
+        Validation runs in the ``process_validation_jobs`` workers; poll the
+        returned ``status_url`` for the outcome.
         """
         record = self.get_object()
         
-        # In a real implementation, this would interact with a blockchain smart contract
-        if not record.is_verified:
-            # Mock blockchain hash (in production this would be the actual transaction hash)
-            import secrets
-            mock_hash = "0x" + secrets.token_hex(32)  # 32 bytes = 64 hex chars
-            record.blockchain_hash = mock_hash
-            record.is_verified = True
-            record.save()
+        if record.is_verified:
             return Response({
-                "success": True,
-                "message": "Record verified on blockchain",
+                "success": False,
+                "message": "Record already verified",
                 "blockchain_hash": record.blockchain_hash
             })
         
-        return Response({
-            "success": False,
-            "message": "Record already verified",
-            "blockchain_hash": record.blockchain_hash
-        })
+        job = enqueue_validation(record)
+        data = ValidationJobSerializer(job, context=self.get_serializer_context()).data
+        data['status_url'] = request.build_absolute_uri(
+            reverse('validationjob-detail', kwargs={'pk': job.pk})
+        )
+        return Response(data, status=status.HTTP_202_ACCEPTED, headers={'Location': data['status_url']})
+    
+    @action(detail=True, methods=['get'])
+    def proof(self, request, pk=None):
+        """
+        Return the record's Merkle inclusion proof and check it locally.
+        
+        ``included`` confirms the anchored leaf hashes up to the stored root,
+        ``unchanged`` that the record still hashes to that leaf; no ledger
+        round trip is needed.
+        """
+        record = self.get_object()
+        anchor = RecordAnchor.objects.filter(
+            record=record, batch__status=AnchorBatch.ANCHORED
+        ).select_related('batch').first()
+        if anchor is None:
+            return Response(
+                {"error": "Record has not been anchored"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(proof_for(anchor, record))
+
+
+class MediaUploadViewSet(mixins.CreateModelMixin,
+                         mixins.RetrieveModelMixin,
+                         mixins.ListModelMixin,
+                         viewsets.GenericViewSet):
+    """
+    API endpoint for uploading media ahead of the records that use it.
+    
+    create:
+        Upload an image, audio or video file in one request, or open a
+        resumable session by sending ``kind``, ``filename`` and ``total_size``.
+    
+    list:
+        Return the current user's uploads.
+    
+    retrieve:
+        Return one of the current user's uploads; ``received_bytes`` tells a
+        client where to resume a session.
+    
+    partial_update:
+        Append a byte range to a resumable session. The raw bytes are the
+        request body and ``Content-Range: bytes start-end/total`` says where
+        they go; ``start`` must equal ``received_bytes``.
+    """
+    serializer_class = MediaUploadSerializer
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, JSONParser]
+    
+    def get_queryset(self):
+        return MediaUpload.objects.filter(owner=self.request.user)
+    
+    @extend_schema(
+        request={'application/octet-stream': OpenApiTypes.BINARY},
+        parameters=[
+            OpenApiParameter(
+                'Content-Range', OpenApiTypes.STR, OpenApiParameter.HEADER, required=True,
+                description='bytes start-end/total'
+            ),
+        ]
+    )
+    def partial_update(self, request, pk=None):
+        # request.data is never touched: the body is streamed to disk
+        with transaction.atomic():
+            upload = get_object_or_404(self.get_queryset().select_for_update(), pk=pk)
+            try:
+                append_chunk(upload, request.stream or BytesIO(), request.headers.get('Content-Range'))
+            except UploadError as exc:
+                return Response(
+                    {"error": str(exc), "received_bytes": upload.received_bytes},
+                    status=status.HTTP_409_CONFLICT
+                )
+        return Response(self.get_serializer(upload).data)
+    
+    @extend_schema(request=None)
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        """
+        Complete a resumable session once every byte has been received.
+        """
+        with transaction.atomic():
+            upload = get_object_or_404(self.get_queryset().select_for_update(), pk=pk)
+            try:
+                finalize_upload(upload)
+            except UploadError as exc:
+                return Response(
+                    {"error": str(exc), "received_bytes": upload.received_bytes},
+                    status=status.HTTP_409_CONFLICT
+                )
+        return Response(self.get_serializer(upload).data)
+
+
+class ValidationJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint reporting the status of queued record validations.
+    
+    list:
+        Return validation jobs for the current user's records.
+    
+    retrieve:
+        Return one validation job.
+    """
+    serializer_class = ValidationJobSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        queryset = ValidationJob.objects.select_related('record')
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(record__contributor=self.request.user)
+
+
+class OccurrenceImportViewSet(mixins.CreateModelMixin,
+                              mixins.RetrieveModelMixin,
+                              mixins.ListModelMixin,
+                              viewsets.GenericViewSet):
+    """
+    Admin API endpoint for bulk occurrence imports.
+    
+    create:
+        Upload a CSV or Darwin Core occurrence file and queue it for
+        ``import_occurrences --queued``. Records are attributed to the uploader.
+    
+    list:
+        Return all imports.
+    
+    retrieve:
+        Return one import and its progress.
+    """
+    queryset = OccurrenceImport.objects.all()
+    serializer_class = OccurrenceImportSerializer
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+    
+    def perform_create(self, serializer):
+        serializer.save(owner=self.request.user)
+    
+    @extend_schema(request=None)
+    @action(detail=True, methods=['post'])
+    def resume(self, request, pk=None):
+        """
+        Queue a failed import again; it continues after its last committed chunk.
+        """
+        with transaction.atomic():
+            occurrence_import = get_object_or_404(self.get_queryset().select_for_update(), pk=pk)
+            if occurrence_import.status != OccurrenceImport.FAILED:
+                return Response(
+                    {"error": "Only failed imports can be resumed"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            occurrence_import.status = OccurrenceImport.QUEUED
+            occurrence_import.save(update_fields=['status', 'updated_at'])
+        return Response(self.get_serializer(occurrence_import).data, status=status.HTTP_202_ACCEPTED)
+
+
+
+@extend_schema_view(
+    list=extend_schema(parameters=[
+        OpenApiParameter('species', OpenApiTypes.STR, description='Grids of one species'),
+        OpenApiParameter('genus', OpenApiTypes.STR, description='Grids of one genus'),
+        OpenApiParameter('level', OpenApiTypes.INT, description='Resolution level'),
+    ])
+)
+class HeatmapGridViewSet(ConditionalListMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint listing precomputed observation density grids.
+    
+    list:
+        Return the grids of every level for all public records, or for the
+        given ``species`` or ``genus``, with the URLs of their non-empty tiles.
+        Tiles missing from a grid are all zeros.
+    
+    retrieve:
+        Return one grid.
+    """
+    serializer_class = HeatmapGridSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    
+    def get_queryset(self):
+        queryset = HeatmapGrid.objects.prefetch_related('tiles')
+        if self.action != 'list':
+            return queryset
+        params = self.request.query_params
+        if params.get('species'):
+            queryset = queryset.filter(rank='species', taxon=normalize_species_name(params['species']).strip())
+        elif params.get('genus'):
+            queryset = queryset.filter(rank='genus', taxon=normalize_species_name(params['genus']).strip())
+        else:
+            queryset = queryset.filter(rank='')
+        if params.get('level', '').isdigit():
+            queryset = queryset.filter(level=int(params['level']))
+        return queryset
+
+
+@extend_schema(
+    tags=['Biodiversity'],
+    summary='Get heatmap tile',
+    description='Download the counts of one heatmap tile as a NumPy .npy uint32 array. '
+                'Tile URLs embed a digest of their content and are cached for a year.',
+    responses={
+        (200, 'application/octet-stream'): OpenApiTypes.BINARY,
+        302: OpenApiResponse(description='The tile has changed; redirects to its current URL'),
+        404: OpenApiResponse(description='Tile not found or now empty')
+    }
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def heatmap_tile(request, grid_id, tile_x, tile_y, digest):
+    """
+    Serve a heatmap tile's ``.npy`` file.
+    
+    The digest in the URL pins the content, so a matching request is cached
+    as immutable; an outdated digest is redirected to the tile's current URL.
+    """
+    tile = get_object_or_404(HeatmapTile, grid_id=grid_id, tile_x=tile_x, tile_y=tile_y)
+    if tile.digest != digest:
+        response = HttpResponseRedirect(reverse('heatmap-tile', kwargs={
+            'grid_id': grid_id, 'tile_x': tile_x, 'tile_y': tile_y, 'digest': tile.digest
+        }))
+        patch_cache_control(response, no_cache=True)
+        return response
+    
+    response = FileResponse(
+        default_storage.open(tile.file_name, 'rb'),
+        content_type='application/octet-stream',
+        filename=f'{tile_x}-{tile_y}.npy'
+    )
+    response['ETag'] = f'"{tile.digest}"'
+    patch_cache_control(response, public=True, max_age=365 * 24 * 60 * 60, immutable=True)
+    return response
 
 
 @extend_schema(
     tags=['Biodiversity'],
     summary='Get species list',
-    description='Get a list of unique species from biodiversity records with observation counts.',
+    description='Get a paginated list of unique species with observation counts, served from the species summary table.',
     responses={
         200: OpenApiResponse(
             description='List of unique species',
@@ -168,11 +637,16 @@ class BiodiversityRecordViewSet(viewsets.ModelViewSet):
                     name='Species List Response',
                     value={
                         "count": 2,
+                        "next": None,
+                        "previous": None,
                         "results": [
                             {
                                 "scientific_name": "Falco peregrinus",
                                 "common_name": "Peregrine Falcon", 
-                                "observation_count": 5
+                                "observation_count": 5,
+                                "verified_count": 2,
+                                "first_seen": "2024-11-02T08:15:00Z",
+                                "last_seen": "2024-12-01T10:00:00Z"
                             }
                         ]
                     }
@@ -185,38 +659,123 @@ class BiodiversityRecordViewSet(viewsets.ModelViewSet):
 @permission_classes([IsAuthenticatedOrReadOnly])
 def species_list(request):
     """
-    Get a list of unique species from biodiversity records.
-    """
-    # Get distinct species names from biodiversity records
-    species_data = BiodiversityRecord.objects.filter(
-        species_name__isnull=False,
-        species_name__gt=''
-    ).values('species_name', 'common_name').distinct()
-    
-    # Convert to a more structured format
-    species_list = []
-    seen_species = set()
-    
-    for record in species_data:
-        species_name = record['species_name']
-        common_name = record['common_name'] or ''
-        
-        # Avoid duplicates (case-insensitive)
-        species_key = species_name.lower()
-        if species_key not in seen_species:
-            seen_species.add(species_key)
-            species_list.append({
-                'scientific_name': species_name,
-                'common_name': common_name,
-                'observation_count': BiodiversityRecord.objects.filter(
-                    species_name__iexact=species_name
-                ).count()
-            })
+    Get a paginated list of unique species from the species summary table.
+    
+    The summary table's row count and latest ``updated_at`` version the
+    response, so unchanged polls are answered with 304.
+    """
+    count, latest = queryset_version(SpeciesSummary.objects.all())
+    
+    def build_response():
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(SpeciesSummary.objects.order_by('species_name'), request)
+        serializer = SpeciesSummarySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+    
+    return respond_conditionally(request, make_etag(request, count, latest), latest, build_response)
+
+
+class RollupPagination(PageNumberPagination):
+    page_size = 500
+    page_size_query_param = 'page_size'
+    max_page_size = 5000
+
+
+def _parse_rollup_params(params):
+    """
+    Return the query_rollups keyword arguments for ``params``, or raise
+    ValueError describing the first invalid one.
+    """
+    period = params.get('period')
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of: {', '.join(PERIODS)}.")
+    
+    dates = {}
+    for name in ('start', 'end'):
+        value = params.get(name)
+        if value:
+            dates[name] = parse_date(value)
+            if dates[name] is None:
+                raise ValueError(f"{name} must be a date in YYYY-MM-DD format.")
     
-    # Sort by scientific name
-    species_list.sort(key=lambda x: x['scientific_name'])
+    bbox = None
+    if params.get('bbox'):
+        try:
+            bbox = [float(value) for value in params['bbox'].split(',')]
+        except ValueError:
+            bbox = []
+        if (
+            len(bbox) != 4
+            or not -180 <= bbox[0] <= bbox[2] <= 180
+            or not -90 <= bbox[1] <= bbox[3] <= 90
+        ):
+            raise ValueError("bbox must be 'west,south,east,north' in degrees.")
+    
+    return {
+        'period': period,
+        'species': params.get('species') or None,
+        'grid': params.get('grid', '').lower() in ('1', 'true', 'yes'),
+        'bbox': bbox,
+        **dates,
+    }
+
+
+@extend_schema(
+    tags=['Biodiversity'],
+    summary='Get observation time series',
+    description='Get public observation counts per species for each day, week or month, '
+                'optionally limited to a bounding box and split by grid cell. '
+                'Served from the rollup table rather than the records.',
+    parameters=[
+        OpenApiParameter('period', OpenApiTypes.STR, enum=list(PERIODS), required=True),
+        OpenApiParameter('start', OpenApiTypes.DATE, description='First date of the series'),
+        OpenApiParameter('end', OpenApiTypes.DATE, description='Last date of the series'),
+        OpenApiParameter('species', OpenApiTypes.STR, description='Scientific name (case-insensitive)'),
+        OpenApiParameter('bbox', OpenApiTypes.STR, description="'west,south,east,north' in degrees"),
+        OpenApiParameter('grid', OpenApiTypes.BOOL, description='Return one series per grid cell'),
+    ],
+    responses={
+        200: OpenApiResponse(
+            description='Observation counts per period',
+            examples=[
+                OpenApiExample(
+                    name='Rollup Response',
+                    value={
+                        "count": 1,
+                        "next": None,
+                        "previous": None,
+                        "results": [
+                            {
+                                "period_start": "2024-11-04",
+                                "scientific_name": "Falco peregrinus",
+                                "observations": 12,
+                                "verified": 5
+                            }
+                        ]
+                    }
+                )
+            ]
+        ),
+        400: OpenApiResponse(description='Invalid parameters')
+    }
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def observation_rollups(request):
+    """
+    Get observation counts per species and period from the rollup table.
+    
+    With ``grid=true`` each result also carries its grid cell and the cell's
+    ``[west, south, east, north]`` bounds.
+    """
+    try:
+        options = _parse_rollup_params(request.query_params)
+    except ValueError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
     
-    return Response({
-        'count': len(species_list),
-        'results': species_list
-    })
+    paginator = RollupPagination()
+    page = paginator.paginate_queryset(query_rollups(**options), request)
+    if options['grid']:
+        for row in page:
+            row['cell'] = cell_bounds(row['cell_x'], row['cell_y'])
+    return paginator.get_paginated_response(page)
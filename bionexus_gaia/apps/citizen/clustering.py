@@ -0,0 +1,263 @@
+"""
+Zoom-aware clustering of public biodiversity records for the map.
+
+Records are snapped to a grid whose cells are ``360 / 2 ** (zoom + 3)`` degrees
+wide, i.e. eight cells per map tile. For coarse zooms (up to
+``CLUSTER_PRECOMPUTED_MAX_ZOOM``) per-cell, per-species counts are kept in
+MapClusterCount and updated incrementally as records change; finer zooms are
+aggregated on the fly from the records inside the requested bounding box.
+Near-duplicates are not counted at any zoom.
+"""
+import math
+from itertools import groupby
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from bionexus_gaia.apps.biodiversity.models import BiodiversityRecord
+from bionexus_gaia.apps.biodiversity.summaries import normalize_species_name
+from .models import MapClusterCount
+
+MAX_CLUSTER_ZOOM = 22
+TOP_SPECIES_PER_CLUSTER = 3
+
+_CLUSTER_SQL = """
+    WITH per_species AS ({source}),
+    ranked AS (
+        SELECT
+            cell_x, cell_y, species_name, count,
+            SUM(count) OVER cell AS total,
+            SUM(longitude_sum) OVER cell AS longitude_total,
+            SUM(latitude_sum) OVER cell AS latitude_total,
+            row_number() OVER (
+                PARTITION BY cell_x, cell_y
+                ORDER BY (species_name = ''), count DESC, species_name
+            ) AS rank
+        FROM per_species
+        WINDOW cell AS (PARTITION BY cell_x, cell_y)
+    )
+    SELECT
+        cell_x, cell_y, total,
+        longitude_total / total, latitude_total / total,
+        species_name, count
+    FROM ranked
+    WHERE rank <= %(top)s AND total > 0
+    ORDER BY cell_x, cell_y, rank
+"""
+
+_PRECOMPUTED_SOURCE = """
+    SELECT cell_x, cell_y, species_name, count, longitude_sum, latitude_sum
+    FROM {table}
+    WHERE zoom = %(zoom)s AND count > 0 AND {cell_filter}
+"""
+
+_LIVE_SOURCE = """
+    SELECT cell_x, cell_y, MIN(species_name) AS species_name, COUNT(*) AS count,
+           SUM(longitude) AS longitude_sum, SUM(latitude) AS latitude_sum
+    FROM (
+        SELECT
+            {cell_x} AS cell_x, {cell_y} AS cell_y,
+            lower(species_name) AS species_key, species_name,
+            ST_X(location::geometry) AS longitude,
+            ST_Y(location::geometry) AS latitude
+        FROM {table}
+        WHERE is_public AND duplicate_of_id IS NULL AND location && ST_MakeEnvelope(
+            %(west)s, %(south)s, %(east)s, %(north)s, 4326
+        )::geography
+    ) AS snapped
+    WHERE {cell_filter}
+    GROUP BY cell_x, cell_y, species_key
+"""
+
+_UPSERT_SQL = """
+    INSERT INTO {table}
+        (zoom, cell_x, cell_y, species_key, species_name, count, longitude_sum, latitude_sum)
+    VALUES {values}
+    ON CONFLICT (zoom, cell_x, cell_y, species_key) DO UPDATE SET
+        count = {table}.count + EXCLUDED.count,
+        longitude_sum = {table}.longitude_sum + EXCLUDED.longitude_sum,
+        latitude_sum = {table}.latitude_sum + EXCLUDED.latitude_sum
+"""
+
+_REBUILD_SQL = """
+    INSERT INTO {table}
+        (zoom, cell_x, cell_y, species_key, species_name, count, longitude_sum, latitude_sum)
+    SELECT %(zoom)s, {cell_x}, {cell_y}, lower(species_name), MIN(species_name),
+           COUNT(*), SUM(ST_X(location::geometry)), SUM(ST_Y(location::geometry))
+    FROM {records}
+    WHERE is_public AND duplicate_of_id IS NULL
+    GROUP BY 2, 3, 4
+"""
+
+
+def precomputed_max_zoom():
+    return getattr(settings, 'CLUSTER_PRECOMPUTED_MAX_ZOOM', 8)
+
+
+def cell_size(zoom):
+    """
+    Width and height of a grid cell in degrees at ``zoom``.
+    """
+    return 360.0 / 2 ** (zoom + 3)
+
+
+def grid_dimensions(zoom):
+    """
+    Number of (columns, rows) in the grid at ``zoom``.
+    """
+    return 2 ** (zoom + 3), 2 ** (zoom + 2)
+
+
+def cell_for(longitude, latitude, zoom):
+    """
+    Return the (cell_x, cell_y) grid cell containing a point.
+    """
+    size = cell_size(zoom)
+    columns, rows = grid_dimensions(zoom)
+    cell_x = min(columns - 1, max(0, int(math.floor((longitude + 180.0) / size))))
+    cell_y = min(rows - 1, max(0, int(math.floor((latitude + 90.0) / size))))
+    return cell_x, cell_y
+
+
+def _sql_cell_expressions(zoom):
+    """
+    SQL expressions snapping ``location`` to the grid at ``zoom``.
+    """
+    size = cell_size(zoom)
+    columns, rows = grid_dimensions(zoom)
+    cell_x = f'LEAST({columns - 1}, GREATEST(0, floor((ST_X(location::geometry) + 180) / {size!r})))::integer'
+    cell_y = f'LEAST({rows - 1}, GREATEST(0, floor((ST_Y(location::geometry) + 90) / {size!r})))::integer'
+    return cell_x, cell_y
+
+
+def _cell_filter(bbox, zoom):
+    """
+    SQL condition and params restricting cells to ``bbox``.
+
+    A bounding box whose west edge is east of its east edge crosses the
+    antimeridian and is split into two column ranges.
+    """
+    west, south, east, north = bbox
+    min_x, min_y = cell_for(west, south, zoom)
+    max_x, max_y = cell_for(east, north, zoom)
+    params = {'min_x': min_x, 'max_x': max_x, 'min_y': min_y, 'max_y': max_y}
+    rows = 'cell_y BETWEEN %(min_y)s AND %(max_y)s'
+    if west <= east:
+        return f'cell_x BETWEEN %(min_x)s AND %(max_x)s AND {rows}', params
+    return f'(cell_x >= %(min_x)s OR cell_x <= %(max_x)s) AND {rows}', params
+
+
+def _live_envelopes(bbox):
+    west, south, east, north = bbox
+    if west <= east:
+        return [(west, south, east, north)]
+    return [(west, south, 180.0, north), (-180.0, south, east, north)]
+
+
+def _fold(rows):
+    clusters = []
+    for (cell_x, cell_y), cell_rows in groupby(rows, key=lambda row: (row[0], row[1])):
+        cell_rows = list(cell_rows)
+        _, _, total, longitude, latitude, _, _ = cell_rows[0]
+        clusters.append({
+            'cell': [cell_x, cell_y],
+            'count': int(total),
+            'longitude': longitude,
+            'latitude': latitude,
+            'top_species': [
+                {'species_name': species_name, 'count': int(count)}
+                for _, _, _, _, _, species_name, count in cell_rows
+                if species_name
+            ],
+        })
+    return clusters
+
+
+def get_clusters(bbox, zoom):
+    """
+    Return clusters of public records inside ``bbox`` at ``zoom``.
+
+    ``bbox`` is ``(west, south, east, north)`` in degrees.
+    """
+    cell_filter, params = _cell_filter(bbox, zoom)
+    params.update({'zoom': zoom, 'top': TOP_SPECIES_PER_CLUSTER})
+
+    if zoom <= precomputed_max_zoom():
+        source = _PRECOMPUTED_SOURCE.format(
+            table=connection.ops.quote_name(MapClusterCount._meta.db_table),
+            cell_filter=cell_filter
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(_CLUSTER_SQL.format(source=source), params)
+            return _fold(cursor.fetchall())
+
+    cell_x, cell_y = _sql_cell_expressions(zoom)
+    clusters = []
+    for west, south, east, north in _live_envelopes(bbox):
+        source = _LIVE_SOURCE.format(
+            table=connection.ops.quote_name(BiodiversityRecord._meta.db_table),
+            cell_x=cell_x,
+            cell_y=cell_y,
+            cell_filter=cell_filter
+        )
+        envelope_params = dict(params, west=west, south=south, east=east, north=north)
+        with connection.cursor() as cursor:
+            cursor.execute(_CLUSTER_SQL.format(source=source), envelope_params)
+            clusters.extend(_fold(cursor.fetchall()))
+    return clusters
+
+
+def apply_cluster_deltas(changes):
+    """
+    Incrementally update precomputed cluster counts.
+
+    ``changes`` is an iterable of ``(longitude, latitude, species_name, delta)``
+    where ``delta`` is +1 for a record entering the public map and -1 for one
+    leaving it.
+    """
+    # Merge changes to the same row first: ON CONFLICT cannot update a row twice
+    merged = {}
+    for longitude, latitude, species_name, delta in changes:
+        species_key = normalize_species_name(species_name)
+        for zoom in range(precomputed_max_zoom() + 1):
+            cell_x, cell_y = cell_for(longitude, latitude, zoom)
+            key = (zoom, cell_x, cell_y, species_key)
+            entry = merged.setdefault(key, [species_name or '', 0, 0.0, 0.0])
+            entry[1] += delta
+            entry[2] += longitude * delta
+            entry[3] += latitude * delta
+
+    values = []
+    params = []
+    for (zoom, cell_x, cell_y, species_key), (species_name, count, longitude_sum, latitude_sum) in merged.items():
+        values.append('(%s, %s, %s, %s, %s, %s, %s, %s)')
+        params.extend([
+            zoom, cell_x, cell_y, species_key, species_name,
+            count, longitude_sum, latitude_sum,
+        ])
+
+    if not values:
+        return
+
+    sql = _UPSERT_SQL.format(
+        table=connection.ops.quote_name(MapClusterCount._meta.db_table),
+        values=', '.join(values)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def rebuild_cluster_counts():
+    """
+    Recompute all precomputed cluster counts from the records table.
+    """
+    table = connection.ops.quote_name(MapClusterCount._meta.db_table)
+    records = connection.ops.quote_name(BiodiversityRecord._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table}')
+        for zoom in range(precomputed_max_zoom() + 1):
+            cell_x, cell_y = _sql_cell_expressions(zoom)
+            cursor.execute(
+                _REBUILD_SQL.format(table=table, records=records, cell_x=cell_x, cell_y=cell_y),
+                {'zoom': zoom}
+            )
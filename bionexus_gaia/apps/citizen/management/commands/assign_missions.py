@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from bionexus_gaia.apps.citizen.missions import assign_missions
+
+
+class Command(BaseCommand):
+    help = (
+        'Credit every submitted citizen observation to the active missions '
+        'whose area, dates and target species it matches, with one spatial join.'
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Mission assignment requires PostgreSQL.')
+        credited, missions = assign_missions()
+        self.stdout.write(self.style.SUCCESS(
+            f'Credited {credited} observations to {missions} missions.'
+        ))
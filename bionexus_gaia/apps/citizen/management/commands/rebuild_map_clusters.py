@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from bionexus_gaia.apps.citizen.clustering import precomputed_max_zoom, rebuild_cluster_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed map cluster counts from all public biodiversity records.'
+
+    def handle(self, *args, **options):
+        rebuild_cluster_counts()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt map cluster counts for zoom levels 0-{precomputed_max_zoom()}.'
+        ))
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.11 on 2026-10-17 10:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+POPULATE_SQL = """
+    INSERT INTO {table}
+        (zoom, cell_x, cell_y, species_key, species_name, count, longitude_sum, latitude_sum)
+    SELECT %(zoom)s, {cell_x}, {cell_y}, lower(species_name), MIN(species_name),
+           COUNT(*), SUM(ST_X(location::geometry)), SUM(ST_Y(location::geometry))
+    FROM {records}
+    WHERE is_public
+    GROUP BY 2, 3, 4
+"""
+
+
+def populate_cluster_counts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote_name = schema_editor.connection.ops.quote_name
+    MapClusterCount = apps.get_model('citizen', 'MapClusterCount')
+    BiodiversityRecord = apps.get_model('biodiversity', 'BiodiversityRecord')
+    table = quote_name(MapClusterCount._meta.db_table)
+    records = quote_name(BiodiversityRecord._meta.db_table)
+    # Same grid as clustering.rebuild_cluster_counts: 2 ** (zoom + 3) columns
+    # of 360 / 2 ** (zoom + 3) degrees
+    for zoom in range(getattr(settings, 'CLUSTER_PRECOMPUTED_MAX_ZOOM', 8) + 1):
+        size = 360.0 / 2 ** (zoom + 3)
+        columns, rows = 2 ** (zoom + 3), 2 ** (zoom + 2)
+        cell_x = f'LEAST({columns - 1}, GREATEST(0, floor((ST_X(location::geometry) + 180) / {size!r})))::integer'
+        cell_y = f'LEAST({rows - 1}, GREATEST(0, floor((ST_Y(location::geometry) + 90) / {size!r})))::integer'
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                POPULATE_SQL.format(table=table, records=records, cell_x=cell_x, cell_y=cell_y),
+                {'zoom': zoom}
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('citizen', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MapClusterCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField()),
+                ('cell_x', models.IntegerField()),
+                ('cell_y', models.IntegerField()),
+                ('species_key', models.CharField(max_length=255)),
+                ('species_name', models.CharField(blank=True, max_length=255)),
+                ('count', models.IntegerField(default=0)),
+                ('longitude_sum', models.FloatField(default=0)),
+                ('latitude_sum', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='mapclustercount',
+            constraint=models.UniqueConstraint(fields=('zoom', 'cell_x', 'cell_y', 'species_key'), name='unique_map_cluster_cell_species'),
+        ),
+        migrations.RunPython(populate_cluster_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.11 on 2026-10-17 12:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('citizen', '0002_mapclustercount'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='citizenobservation',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='citizen_cit_user_id_787ba0_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.11 on 2026-10-17 18:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biodiversity', '0016_recordchange'),
+        ('citizen', '0003_citizenobservation_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='citizenobservation',
+            name='biodiversity_record',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='citizen_observations', to='biodiversity.biodiversityrecord'),
+        ),
+    ]
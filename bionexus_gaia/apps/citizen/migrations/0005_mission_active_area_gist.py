@@ -0,0 +1,25 @@
+# Generated by Django 4.2.11 on 2026-10-17 19:05
+
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('citizen', '0004_alter_citizenobservation_biodiversity_record'),
+    ]
+
+    operations = [
+        # Replace the implicit spatial index with a partial one on active missions
+        migrations.AlterField(
+            model_name='mission',
+            name='area',
+            field=django.contrib.gis.db.models.fields.PolygonField(blank=True, geography=True, null=True, spatial_index=False, srid=4326),
+        ),
+        migrations.AddIndex(
+            model_name='mission',
+            index=django.contrib.postgres.indexes.GistIndex(condition=models.Q(('is_active', True)), fields=['area'], name='citizen_mission_active_area_gist'),
+        ),
+    ]
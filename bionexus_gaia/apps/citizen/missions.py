@@ -0,0 +1,254 @@
+"""
+Spatial assignment of observations to missions.
+
+A record counts towards every active mission whose area covers its location,
+whose date window contains its observation date and whose target species, if
+any, include its species (case-insensitively). Missions without an area are
+only joined explicitly, by naming them when submitting an observation.
+Single records are matched with one ST_Covers lookup served by the partial
+GiST index on active missions' areas; ``assign_missions`` backfills all
+submitted observations with a single set-based spatial join.
+"""
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from bionexus_gaia.apps.biodiversity.models import BiodiversityRecord
+from bionexus_gaia.apps.biodiversity.summaries import normalize_species_name
+from .models import CitizenObservation, Mission, MissionParticipation
+
+# Matches of submitted records to missions they are not yet credited to. Each
+# record's first mission claims its unassigned observation; further missions
+# get new observation rows.
+_ASSIGN_SQL = """
+    WITH submitted AS (
+        SELECT DISTINCT ON (biodiversity_record_id)
+            id, biodiversity_record_id, user_id, mission_id IS NULL AS unassigned
+        FROM {observations}
+        ORDER BY biodiversity_record_id, (mission_id IS NOT NULL), created_at, id
+    ),
+    matches AS (
+        SELECT
+            s.id AS observation_id, s.unassigned, s.biodiversity_record_id AS record_id,
+            s.user_id, m.id AS mission_id,
+            CASE WHEN r.duplicate_of_id IS NULL THEN m.points_reward ELSE 0 END AS points,
+            row_number() OVER (PARTITION BY r.id ORDER BY m.start_date, m.id) AS rank
+        FROM submitted s
+        JOIN {records} r ON r.id = s.biodiversity_record_id
+        JOIN {missions} m ON m.is_active
+            AND ST_Covers(m.area, r.location)
+            AND r.observation_date >= m.start_date
+            AND (m.end_date IS NULL OR r.observation_date <= m.end_date)
+        WHERE (
+            coalesce(jsonb_typeof(m.target_species), 'null') NOT IN ('array', 'string')
+            OR m.target_species = '[]'::jsonb
+            OR lower(r.species_name) IN (
+                SELECT lower(target.name) FROM jsonb_array_elements_text(
+                    CASE jsonb_typeof(m.target_species)
+                        WHEN 'array' THEN m.target_species
+                        ELSE jsonb_build_array(m.target_species)
+                    END
+                ) AS target (name)
+            )
+        )
+        AND NOT EXISTS (
+            SELECT 1 FROM {observations} o
+            WHERE o.biodiversity_record_id = r.id AND o.mission_id = m.id
+        )
+    ),
+    claimed AS (
+        UPDATE {observations} o
+        SET mission_id = matches.mission_id, points_awarded = matches.points
+        FROM matches
+        WHERE matches.rank = 1 AND matches.unassigned AND o.id = matches.observation_id
+        RETURNING o.mission_id, o.user_id
+    ),
+    inserted AS (
+        INSERT INTO {observations}
+            (id, biodiversity_record_id, mission_id, user_id, points_awarded, created_at)
+        SELECT gen_random_uuid(), record_id, mission_id, user_id, points, %(now)s
+        FROM matches
+        WHERE NOT (rank = 1 AND unassigned)
+        RETURNING mission_id, user_id
+    )
+    SELECT mission_id, user_id FROM claimed
+    UNION ALL
+    SELECT mission_id, user_id FROM inserted
+"""
+
+# Points of observations of the given records, after they were regrouped
+_RESCORE_SQL = """
+    UPDATE {observations} o
+    SET points_awarded = CASE WHEN r.duplicate_of_id IS NULL THEN m.points_reward ELSE 0 END
+    FROM {records} r, {missions} m
+    WHERE o.biodiversity_record_id = ANY(%(records)s::uuid[])
+      AND r.id = o.biodiversity_record_id AND m.id = o.mission_id
+    RETURNING o.mission_id
+"""
+
+# Participation and mission stats of the given missions, recomputed from
+# their observations; near-duplicates don't count, as when submitted.
+# Participations left with no counted observation are reset first.
+_RESET_PARTICIPATION_SQL = """
+    UPDATE {participations} SET observations_count = 0, points_earned = 0
+    WHERE mission_id = ANY(%(missions)s::uuid[])
+"""
+
+_PARTICIPATION_SQL = """
+    INSERT INTO {participations}
+        (id, user_id, mission_id, joined_at, observations_count, points_earned, is_completed)
+    SELECT
+        gen_random_uuid(), o.user_id, o.mission_id, %(now)s,
+        count(*), coalesce(sum(o.points_awarded), 0), false
+    FROM {observations} o
+    JOIN {records} r ON r.id = o.biodiversity_record_id
+    WHERE o.mission_id = ANY(%(missions)s::uuid[]) AND r.duplicate_of_id IS NULL
+    GROUP BY o.user_id, o.mission_id
+    ON CONFLICT (user_id, mission_id) DO UPDATE SET
+        observations_count = EXCLUDED.observations_count,
+        points_earned = EXCLUDED.points_earned
+"""
+
+_MISSION_STATS_SQL = """
+    UPDATE {missions} m SET
+        observations_count = (
+            SELECT count(*) FROM {observations} o
+            JOIN {records} r ON r.id = o.biodiversity_record_id
+            WHERE o.mission_id = m.id AND r.duplicate_of_id IS NULL
+        ),
+        participants_count = (
+            SELECT count(*) FROM {participations} p WHERE p.mission_id = m.id
+        ),
+        updated_at = %(now)s
+    WHERE m.id = ANY(%(missions)s::uuid[])
+"""
+
+
+def target_species_keys(mission):
+    """
+    Case-insensitive keys of a mission's target species; empty for any species.
+    """
+    targets = mission.target_species
+    if isinstance(targets, str):
+        targets = [targets]
+    if not isinstance(targets, list):
+        return set()
+    return {normalize_species_name(str(target)) for target in targets}
+
+
+def targets_species(mission, species_name):
+    targets = target_species_keys(mission)
+    return not targets or normalize_species_name(species_name) in targets
+
+
+def _observed_at(record):
+    observed_at = BiodiversityRecord._meta.get_field('observation_date').to_python(record.observation_date)
+    if observed_at is not None and timezone.is_naive(observed_at):
+        observed_at = timezone.make_aware(observed_at)
+    return observed_at
+
+
+def accepts_record(mission, record):
+    """
+    Whether ``record`` can count towards ``mission`` when submitted to it.
+    """
+    observed_at = _observed_at(record)
+    if not mission.is_active or observed_at is None:
+        return False
+    if observed_at < mission.start_date or (mission.end_date is not None and observed_at > mission.end_date):
+        return False
+    if mission.area is not None and (record.location is None or not mission.area.covers(record.location)):
+        return False
+    return targets_species(mission, record.species_name)
+
+
+def matching_missions(record):
+    """
+    Active missions with an area that ``record`` counts towards, earliest
+    started first.
+    """
+    if record.location is None:
+        return []
+    observed_at = _observed_at(record)
+    if observed_at is None:
+        return []
+
+    missions = Mission.objects.filter(
+        Q(end_date__isnull=True) | Q(end_date__gte=observed_at),
+        is_active=True,
+        area__covers=record.location,
+        start_date__lte=observed_at,
+    ).order_by('start_date', 'id')
+    return [mission for mission in missions if targets_species(mission, record.species_name)]
+
+
+def credit_mission(user, mission, points):
+    """
+    Count one observation by ``user`` towards ``mission``.
+    """
+    participation, created = MissionParticipation.objects.get_or_create(
+        user=user,
+        mission=mission,
+        defaults={'observations_count': 1, 'points_earned': points}
+    )
+    if created:
+        mission.participants_count += 1
+    else:
+        participation.observations_count += 1
+        participation.points_earned += points
+        participation.save()
+
+    mission.observations_count += 1
+    mission.save()
+
+
+def _tables():
+    quote_name = connection.ops.quote_name
+    return {
+        'observations': quote_name(CitizenObservation._meta.db_table),
+        'records': quote_name(BiodiversityRecord._meta.db_table),
+        'missions': quote_name(Mission._meta.db_table),
+        'participations': quote_name(MissionParticipation._meta.db_table),
+    }
+
+
+def _recompute_mission_stats(cursor, tables, missions, now):
+    params = {'now': now, 'missions': missions}
+    cursor.execute(_RESET_PARTICIPATION_SQL.format(**tables), params)
+    cursor.execute(_PARTICIPATION_SQL.format(**tables), params)
+    cursor.execute(_MISSION_STATS_SQL.format(**tables), params)
+
+
+def assign_missions():
+    """
+    Credit every submitted observation to the missions it matches and is not
+    yet credited to, then recompute the stats of the missions affected.
+    Returns ``(observations credited, missions affected)``.
+    """
+    tables = _tables()
+    now = timezone.now()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(_ASSIGN_SQL.format(**tables), {'now': now})
+        credited = cursor.fetchall()
+        missions = sorted({str(mission_id) for mission_id, _ in credited})
+        if missions:
+            _recompute_mission_stats(cursor, tables, missions, now)
+    return len(credited), len(missions)
+
+
+def rescore_records(record_ids):
+    """
+    Re-award the mission points of observations of records that became
+    canonical or near-duplicates, and recompute the stats of their missions.
+    Returns the number of missions affected.
+    """
+    record_ids = [str(record_id) for record_id in record_ids]
+    if not record_ids:
+        return 0
+    tables = _tables()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(_RESCORE_SQL.format(**tables), {'records': record_ids})
+        missions = sorted({str(row[0]) for row in cursor.fetchall()})
+        if missions:
+            _recompute_mission_stats(cursor, tables, missions, timezone.now())
+    return len(missions)
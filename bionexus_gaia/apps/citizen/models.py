@@ -1,5 +1,6 @@
 import uuid
 from django.db import models
+from django.contrib.postgres.indexes import GistIndex
 from django.contrib.gis.db import models as gis_models
 from django.contrib.auth import get_user_model
 
@@ -20,7 +21,7 @@ class Mission(models.Model):
     
     # Location (optional bounding box or point)
     location_name = models.CharField(max_length=255, blank=True)
-    area = gis_models.PolygonField(geography=True, null=True, blank=True)
+    area = gis_models.PolygonField(geography=True, spatial_index=False, null=True, blank=True)
     
     # Rewards
     points_reward = models.IntegerField(default=100)
@@ -42,6 +43,8 @@ class Mission(models.Model):
             models.Index(fields=['is_active']),
             models.Index(fields=['start_date']),
             models.Index(fields=['end_date']),
+            # Observations are only matched against active missions (see missions.py)
+            GistIndex(fields=['area'], condition=models.Q(is_active=True), name='citizen_mission_active_area_gist'),
         ]
     
     def __str__(self):
@@ -74,9 +77,11 @@ class CitizenObservation(models.Model):
     Model for citizen science observations (reference to BiodiversityRecord).
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # No database constraint: records are partitioned, so their id alone is not unique-indexed
     biodiversity_record = models.ForeignKey(
         'biodiversity.BiodiversityRecord',
         on_delete=models.CASCADE,
+        db_constraint=False,
         related_name='citizen_observations'
     )
     mission = models.ForeignKey(
@@ -92,6 +97,37 @@ class CitizenObservation(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"Observation by {self.user.username} for {self.mission.title if self.mission else 'No Mission'}"
+
+
+class MapClusterCount(models.Model):
+    """
+    Precomputed count of public records per map grid cell and species.
+    
+    Maintained incrementally from BiodiversityRecord changes for the coarse
+    zoom levels served by the clustered map (see clustering.py).
+    """
+    zoom = models.PositiveSmallIntegerField()
+    cell_x = models.IntegerField()
+    cell_y = models.IntegerField()
+    species_key = models.CharField(max_length=255)
+    species_name = models.CharField(max_length=255, blank=True)
+    count = models.IntegerField(default=0)
+    longitude_sum = models.FloatField(default=0)
+    latitude_sum = models.FloatField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['zoom', 'cell_x', 'cell_y', 'species_key'],
+                name='unique_map_cluster_cell_species'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"z{self.zoom} ({self.cell_x}, {self.cell_y}) {self.species_key or 'unknown'}: {self.count}"
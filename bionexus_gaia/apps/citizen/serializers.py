@@ -1,10 +1,13 @@
+from django.db import transaction
 from rest_framework import serializers
 from django.contrib.gis.geos import Polygon
 from drf_spectacular.utils import extend_schema_field
 from drf_spectacular.types import OpenApiTypes
+from .missions import accepts_record, credit_mission, matching_missions
 from .models import Mission, MissionParticipation, CitizenObservation
 from bionexus_gaia.apps.biodiversity.serializers import BiodiversityRecordSerializer
 from bionexus_gaia.apps.biodiversity.models import BiodiversityRecord
+from bionexus_gaia.apps.biodiversity.renditions import rendition_url
 
 class MissionSerializer(serializers.ModelSerializer):
     """
@@ -106,7 +109,12 @@ class CitizenObservationSerializer(serializers.ModelSerializer):
             'mission', 'mission_title', 'user', 'username',
             'points_awarded', 'created_at'
         ]
+        # Missions with an area are assigned from the record's location, date
+        # and species; ``mission`` names one without an area to submit to
         read_only_fields = ['id', 'user', 'username', 'points_awarded', 'created_at']
+        extra_kwargs = {
+            'mission': {'required': False},
+        }
     
     @extend_schema_field(OpenApiTypes.STR)
     def get_mission_title(self, obj) -> str:
@@ -121,37 +129,59 @@ class CitizenObservationSerializer(serializers.ModelSerializer):
             'species_name': obj.biodiversity_record.species_name,
             'common_name': obj.biodiversity_record.common_name,
             'observation_date': obj.biodiversity_record.observation_date,
-            'image': obj.biodiversity_record.image.url if obj.biodiversity_record.image else None
+            'image': obj.biodiversity_record.image.url if obj.biodiversity_record.image else None,
+            'thumbnail_url': rendition_url(obj.biodiversity_record, 'thumbnail'),
+            'medium_url': rendition_url(obj.biodiversity_record, 'medium'),
         }
     
+    def validate(self, attrs):
+        """
+        Check an explicitly named mission is open to the record.
+        """
+        mission = attrs.get('mission')
+        if mission is not None and not accepts_record(mission, attrs['biodiversity_record']):
+            raise serializers.ValidationError({
+                'mission': "This mission is not open to the record's date, species or location."
+            })
+        return attrs
+    
     def create(self, validated_data):
         """
-        Set the user from the request and calculate points.
+        Set the user from the request and credit the observation to the named
+        mission and every active mission whose area its record falls within,
+        one observation per mission.
         """
-        validated_data['user'] = self.context['request'].user
+        user = validated_data['user'] = self.context['request'].user
+        record = validated_data['biodiversity_record']
+        explicit = validated_data.pop('mission', None)
         
-        # Calculate points based on mission if applicable
-        if validated_data.get('mission'):
-            mission = validated_data['mission']
-            validated_data['points_awarded'] = mission.points_reward
-            
-            # Update mission participation if exists
-            participation, created = MissionParticipation.objects.get_or_create(
-                user=validated_data['user'],
-                mission=mission,
-                defaults={'observations_count': 1, 'points_earned': mission.points_reward}
-            )
-            
-            if not created:
-                participation.observations_count += 1
-                participation.points_earned += mission.points_reward
-                participation.save()
-            
-            # Update mission stats
-            mission.observations_count += 1
-            mission.save()
+        # Missions this record was already submitted to are not credited twice
+        credited = set(CitizenObservation.objects.filter(
+            biodiversity_record=record, mission__isnull=False
+        ).values_list('mission_id', flat=True))
+        candidates = ([explicit] if explicit is not None else []) + [
+            mission for mission in matching_missions(record) if explicit is None or mission.pk != explicit.pk
+        ]
+        missions = [mission for mission in candidates if mission.pk not in credited]
+        # Near-duplicates of an earlier observation earn nothing and don't
+        # advance the mission
+        duplicate = record.duplicate_of_id is not None
         
-        return super().create(validated_data)
+        with transaction.atomic():
+            observation = None
+            for mission in missions:
+                points = 0 if duplicate else mission.points_reward
+                if observation is None:
+                    observation = super().create({**validated_data, 'mission': mission, 'points_awarded': points})
+                else:
+                    CitizenObservation.objects.create(
+                        biodiversity_record=record, mission=mission, user=user, points_awarded=points
+                    )
+                if not duplicate:
+                    credit_mission(user, mission, points)
+            if observation is None:
+                observation = super().create(validated_data)
+        return observation
 
 
 class LeaderboardEntrySerializer(serializers.Serializer):
@@ -177,5 +207,7 @@ class MapDataSerializer(serializers.Serializer):
     longitude = serializers.FloatField()
     observation_date = serializers.DateTimeField()
     image_url = serializers.URLField(allow_null=True)
+    thumbnail_url = serializers.URLField(allow_null=True)
+    webp_url = serializers.URLField(allow_null=True)
     contributor_username = serializers.CharField()
     is_verified = serializers.BooleanField()
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+Keep map caches, precomputed clusters and mission scores consistent with
+BiodiversityRecord changes.
+
+Cached tiles are removed once the change commits; removed any earlier, a tile
+rendered concurrently from the not yet committed data would be cached again.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from bionexus_gaia.apps.biodiversity.models import BiodiversityRecord
+from bionexus_gaia.apps.biodiversity.signals import (
+    previous_values,
+    records_bulk_created,
+    records_imported,
+    records_regrouped,
+    records_verified,
+)
+from .tiles import clear_tile_cache, invalidate_point, invalidate_points
+from .clustering import apply_cluster_deltas, rebuild_cluster_counts
+from .missions import rescore_records
+
+
+def _invalidate_record_tiles(location, is_public):
+    if location is not None and is_public:
+        transaction.on_commit(partial(invalidate_point, location.x, location.y))
+
+
+def _invalidate_tiles(points):
+    points = list(points)
+    if points:
+        transaction.on_commit(partial(invalidate_points, points))
+
+
+@receiver(post_save, sender=BiodiversityRecord)
+def invalidate_tiles_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = previous_values(instance)
+    if previous is not None:
+        _invalidate_record_tiles(previous['location'], previous['is_public'])
+    _invalidate_record_tiles(instance.location, instance.is_public)
+
+
+@receiver(post_delete, sender=BiodiversityRecord)
+def invalidate_tiles_on_delete(sender, instance, **kwargs):
+    _invalidate_record_tiles(instance.location, instance.is_public)
+
+
+def _cluster_entry(location, species_name, is_public, duplicate_of, delta):
+    # Near-duplicates are not counted
+    if location is None or not is_public or duplicate_of is not None:
+        return []
+    return [(location.x, location.y, species_name, delta)]
+
+
+@receiver(post_save, sender=BiodiversityRecord)
+def update_clusters_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = previous_values(instance)
+    changes = _cluster_entry(
+        instance.location, instance.species_name, instance.is_public, instance.duplicate_of_id, 1
+    )
+    if previous is not None:
+        removed = _cluster_entry(
+            previous['location'], previous['species_name'], previous['is_public'], previous['duplicate_of'], -1
+        )
+        if removed and changes and removed[0][:3] == changes[0][:3]:
+            return
+        changes = removed + changes
+    apply_cluster_deltas(changes)
+
+
+@receiver(post_delete, sender=BiodiversityRecord)
+def update_clusters_on_delete(sender, instance, **kwargs):
+    apply_cluster_deltas(_cluster_entry(
+        instance.location, instance.species_name, instance.is_public, instance.duplicate_of_id, -1
+    ))
+
+
+@receiver(records_bulk_created, sender=BiodiversityRecord)
+def update_map_on_bulk_create(sender, records, **kwargs):
+    public = [record for record in records if record.is_public and record.location is not None]
+    _invalidate_tiles((record.location.x, record.location.y) for record in public)
+    apply_cluster_deltas(
+        (record.location.x, record.location.y, record.species_name, 1)
+        for record in public
+        if record.duplicate_of_id is None
+    )
+
+
+@receiver(records_verified, sender=BiodiversityRecord)
+def invalidate_tiles_on_verify(sender, records, **kwargs):
+    # Tiles carry is_verified as a feature attribute
+    _invalidate_tiles(
+        (record.location.x, record.location.y)
+        for record in records
+        if record.is_public and record.location is not None
+    )
+
+
+@receiver(records_regrouped, sender=BiodiversityRecord)
+def update_clusters_on_regroup(sender, records, **kwargs):
+    # Records that became canonical enter the clusters, new duplicates leave
+    apply_cluster_deltas(
+        change
+        for record in records
+        for change in _cluster_entry(
+            record.location, record.species_name, record.is_public, None,
+            1 if record.duplicate_of_id is None else -1
+        )
+    )
+
+
+@receiver(records_regrouped, sender=BiodiversityRecord)
+def rescore_missions_on_regroup(sender, records, **kwargs):
+    # Near-duplicates earn no points and don't advance missions
+    rescore_records([record.pk for record in records])
+
+
+@receiver(post_save, sender=BiodiversityRecord)
+def rescore_missions_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = previous_values(instance)
+    if previous is not None and (previous['duplicate_of'] is None) != (instance.duplicate_of_id is None):
+        rescore_records([instance.pk])
+
+
+@receiver(records_imported, sender=BiodiversityRecord)
+def rebuild_map_on_import(sender, **kwargs):
+    rebuild_cluster_counts()
+    transaction.on_commit(clear_tile_cache)
@@ -1,3 +1,454 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from io import StringIO
+from django.test import TestCase, override_settings
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point, Polygon
+from rest_framework.test import APIClient
+from rest_framework import status
 
-# Create your tests here.
+from bionexus_gaia.apps.biodiversity.models import BiodiversityRecord
+from .missions import matching_missions
+from .models import CitizenObservation, MapClusterCount, Mission, MissionParticipation
+from .serializers import MapDataSerializer
+from .tiles import tile_path, tiles_containing
+
+User = get_user_model()
+
+
+class BiodiversityTileTestCase(TestCase):
+    """Test suite for the vector tile endpoint and its cache."""
+    
+    def setUp(self):
+        """Set up test data and an isolated tile cache."""
+        self.client = APIClient()
+        self.tile_cache = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(TILE_CACHE_ROOT=self.tile_cache.name)
+        self.settings_override.enable()
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.record = BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Accipiter cooperii',
+            location=Point(-122.4194, 37.7749, srid=4326),
+            observation_date='2024-12-01T10:00:00Z',
+            is_public=True
+        )
+    
+    def tearDown(self):
+        self.settings_override.disable()
+        self.tile_cache.cleanup()
+    
+    def test_tile_is_rendered_and_cached(self):
+        """Test a tile is returned as MVT and written to the cache."""
+        response = self.client.get('/api/v1/citizen/map/tiles/0/0/0.mvt')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/vnd.mapbox-vector-tile')
+        self.assertGreater(len(response.content), 0)
+        self.assertTrue(os.path.exists(tile_path(0, 0, 0)))
+    
+    def test_world_tiles_include_both_hemispheres(self):
+        """Test low-zoom tiles, whose buffer crosses the antimeridian, find their records."""
+        BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Phascolarctos cinereus',
+            location=Point(151.2093, -33.8688, srid=4326),
+            observation_date='2024-12-01T10:00:00Z',
+            is_public=True
+        )
+        for z, x, y in [(0, 0, 0), (1, 0, 0), (1, 1, 1)]:
+            response = self.client.get(f'/api/v1/citizen/map/tiles/{z}/{x}/{y}.mvt')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertGreater(len(response.content), 0, (z, x, y))
+        # Sydney is in the eastern, southern tile only
+        self.assertNotIn(b'Phascolarctos', self.client.get('/api/v1/citizen/map/tiles/1/0/0.mvt').content)
+        self.assertIn(b'Phascolarctos', self.client.get('/api/v1/citizen/map/tiles/1/1/1.mvt').content)
+    
+    @override_settings(TILE_FEATURE_LIMIT=1)
+    def test_full_tile_keeps_latest_records(self):
+        """Test a tile over the feature limit keeps the newest records and is flagged."""
+        BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Buteo jamaicensis',
+            location=Point(-122.4000, 37.7800, srid=4326),
+            observation_date='2024-12-05T10:00:00Z',
+            is_public=True
+        )
+        response = self.client.get('/api/v1/citizen/map/tiles/0/0/0.mvt')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b'Buteo', response.content)
+        self.assertNotIn(b'Accipiter', response.content)
+        self.assertIn(b'truncated', response.content)
+    
+    def test_out_of_range_tile(self):
+        """Test tile coordinates outside the zoom level are rejected."""
+        response = self.client.get('/api/v1/citizen/map/tiles/1/2/0.mvt')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_record_change_invalidates_cached_tiles(self):
+        """Test saving a record removes the cached tiles that contain it."""
+        self.client.get('/api/v1/citizen/map/tiles/0/0/0.mvt')
+        x, y = tiles_containing(-122.4194, 37.7749, 10)[0]
+        self.client.get(f'/api/v1/citizen/map/tiles/10/{x}/{y}.mvt')
+        self.assertTrue(os.path.exists(tile_path(10, x, y)))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.record.species_name = 'Buteo jamaicensis'
+            self.record.save()
+            # Tiles are kept until the change commits
+            self.assertTrue(os.path.exists(tile_path(10, x, y)))
+        
+        self.assertFalse(os.path.exists(tile_path(0, 0, 0)))
+        self.assertFalse(os.path.exists(tile_path(10, x, y)))
+
+
+class BiodiversityMapClusterTestCase(TestCase):
+    """Test suite for the clustered map mode."""
+    
+    def setUp(self):
+        """Set up public and private records around San Francisco."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        for species_name, longitude in [
+            ('Accipiter cooperii', -122.4194),
+            # Far enough from the first not to be its near-duplicate
+            ('Accipiter cooperii', -122.4140),
+            ('Buteo jamaicensis', -122.4180),
+        ]:
+            BiodiversityRecord.objects.create(
+                contributor=self.user,
+                species_name=species_name,
+                location=Point(longitude, 37.7749, srid=4326),
+                observation_date='2024-12-01T10:00:00Z',
+                is_public=True
+            )
+        self.private_record = BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Falco peregrinus',
+            location=Point(-122.4185, 37.7749, srid=4326),
+            observation_date='2024-12-01T10:00:00Z',
+            is_public=False
+        )
+    
+    def test_precomputed_world_clusters(self):
+        """Test coarse zooms are served from precomputed counts."""
+        response = self.client.get('/api/v1/citizen/map/?bbox=-180,-90,180,90&zoom=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        cluster = response.data['clusters'][0]
+        self.assertEqual(cluster['count'], 3)
+        self.assertEqual(cluster['top_species'][0], {'species_name': 'Accipiter cooperii', 'count': 2})
+        self.assertAlmostEqual(cluster['latitude'], 37.7749)
+    
+    def test_near_duplicates_are_not_clustered(self):
+        """Test resubmitted observations are counted once at every zoom."""
+        resubmitted = BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Accipiter cooperii',
+            location=Point(-122.4195, 37.7749, srid=4326),
+            observation_date='2024-12-01T10:05:00Z',
+            is_public=True
+        )
+        self.assertIsNotNone(resubmitted.duplicate_of_id)
+        for query in ['bbox=-180,-90,180,90&zoom=2', 'bbox=-122.5,37.7,-122.3,37.8&zoom=14']:
+            response = self.client.get(f'/api/v1/citizen/map/?{query}')
+            self.assertEqual(sum(cluster['count'] for cluster in response.data['clusters']), 3)
+        
+        # Deleting the original hands its place to the resubmission
+        BiodiversityRecord.objects.get(pk=resubmitted.duplicate_of_id).delete()
+        response = self.client.get('/api/v1/citizen/map/?bbox=-180,-90,180,90&zoom=2')
+        self.assertEqual(response.data['clusters'][0]['count'], 3)
+
+    def test_live_clusters_match_precomputed_counts(self):
+        """Test fine zooms aggregate records inside the bounding box."""
+        response = self.client.get('/api/v1/citizen/map/?bbox=-122.5,37.7,-122.3,37.8&zoom=14')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sum(cluster['count'] for cluster in response.data['clusters']), 3)
+    
+    def test_clusters_follow_record_changes(self):
+        """Test precomputed counts are updated incrementally."""
+        self.private_record.is_public = True
+        self.private_record.save()
+        BiodiversityRecord.objects.filter(species_name='Buteo jamaicensis').get().delete()
+        
+        response = self.client.get('/api/v1/citizen/map/?bbox=-180,-90,180,90&zoom=0')
+        self.assertEqual(response.data['clusters'][0]['count'], 3)
+        
+        species = {entry['species_name'] for entry in response.data['clusters'][0]['top_species']}
+        self.assertEqual(species, {'Accipiter cooperii', 'Falco peregrinus'})
+    
+    def test_rebuild_matches_incremental_counts(self):
+        """Test the rebuild command reproduces the incrementally maintained counts."""
+        before = self.client.get('/api/v1/citizen/map/?bbox=-180,-90,180,90&zoom=5').data
+        MapClusterCount.objects.all().delete()
+        call_command('rebuild_map_clusters', stdout=StringIO())
+        after = self.client.get('/api/v1/citizen/map/?bbox=-180,-90,180,90&zoom=5').data
+        self.assertEqual(len(before['clusters']), len(after['clusters']))
+        for expected, actual in zip(before['clusters'], after['clusters']):
+            self.assertEqual(expected['cell'], actual['cell'])
+            self.assertEqual(expected['count'], actual['count'])
+            self.assertEqual(expected['top_species'], actual['top_species'])
+            self.assertAlmostEqual(expected['longitude'], actual['longitude'])
+    
+    def test_invalid_bbox(self):
+        """Test malformed cluster parameters are rejected."""
+        response = self.client.get('/api/v1/citizen/map/?bbox=1,2,3&zoom=4')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_map_conditional_get(self):
+        """Test unchanged map data is answered with 304 until a record changes."""
+        url = '/api/v1/citizen/map/?bbox=-180,-90,180,90&zoom=2'
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        # Private records are not on the map, so they do not change its version
+        self.private_record.notes = 'Still private'
+        self.private_record.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        self.private_record.is_public = True
+        self.private_record.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['clusters'][0]['count'], 4)
+    
+    def test_map_records_match_serializer(self):
+        """Test map rows built from values_list() match MapDataSerializer's output."""
+        response = self.client.get('/api/v1/citizen/map/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = {row['id']: row for row in json.loads(response.content)['results']}
+        self.assertEqual(len(rows), 3)
+        
+        for record in BiodiversityRecord.objects.filter(is_public=True).select_related('contributor'):
+            expected = MapDataSerializer({
+                'id': record.id,
+                'species_name': record.species_name,
+                'common_name': record.common_name,
+                'latitude': record.location.y,
+                'longitude': record.location.x,
+                'observation_date': record.observation_date,
+                'image_url': record.image.url if record.image else None,
+                'thumbnail_url': None,
+                'webp_url': None,
+                'contributor_username': record.contributor.username,
+                'is_verified': record.is_verified
+            }).data
+            self.assertEqual(rows[str(record.id)], json.loads(json.dumps(expected)))
+
+
+class MissionAssignmentTestCase(TestCase):
+    """Test suite for assigning observations to missions by location."""
+    
+    def setUp(self):
+        """Set up missions around San Francisco and an observer."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='observer',
+            email='observer@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        bay_area = Polygon.from_bbox((-123.0, 37.0, -122.0, 38.0))
+        bay_area.srid = 4326
+        self.hawks = Mission.objects.create(
+            title='Bay Area hawks',
+            description='Hawks around the bay',
+            start_date='2024-11-01T00:00:00Z',
+            end_date='2024-12-31T00:00:00Z',
+            target_species=['Accipiter cooperii', 'Buteo jamaicensis'],
+            area=bay_area,
+            points_reward=50
+        )
+        self.bioblitz = Mission.objects.create(
+            title='Bay Area bioblitz',
+            description='Anything goes',
+            start_date='2024-11-15T00:00:00Z',
+            area=bay_area,
+            points_reward=10
+        )
+        self.ended = Mission.objects.create(
+            title='Autumn count',
+            description='Already over',
+            start_date='2024-09-01T00:00:00Z',
+            end_date='2024-10-31T00:00:00Z',
+            area=bay_area
+        )
+        self.record = BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='accipiter cooperii',
+            location=Point(-122.4194, 37.7749, srid=4326),
+            observation_date='2024-12-01T10:00:00Z',
+            is_public=True
+        )
+    
+    def test_observation_credited_to_matching_missions(self):
+        """Test the server picks every mission covering the record."""
+        response = self.client.post(
+            '/api/v1/citizen/observations/',
+            {'biodiversity_record': str(self.record.id), 'mission': str(self.ended.id)},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.post(
+            '/api/v1/citizen/observations/',
+            {'biodiversity_record': str(self.record.id)},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['mission'], self.hawks.id)
+        self.assertEqual(response.data['points_awarded'], 50)
+        
+        credited = CitizenObservation.objects.filter(biodiversity_record=self.record)
+        self.assertEqual(
+            sorted(credited.values_list('mission__title', 'points_awarded')),
+            [('Bay Area bioblitz', 10), ('Bay Area hawks', 50)]
+        )
+        self.hawks.refresh_from_db()
+        self.assertEqual((self.hawks.observations_count, self.hawks.participants_count), (1, 1))
+        
+        # Other species, places and dates only match what they fall within
+        elsewhere = BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Corvus corax',
+            location=Point(2.3522, 48.8566, srid=4326),
+            observation_date='2024-12-01T10:00:00Z'
+        )
+        crow = BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Corvus corax',
+            location=Point(-122.4194, 37.7749, srid=4326),
+            observation_date='2024-11-20T10:00:00Z'
+        )
+        self.assertEqual(matching_missions(elsewhere), [])
+        self.assertEqual(matching_missions(crow), [self.bioblitz])
+    
+    def test_observation_submitted_to_mission_without_area(self):
+        """Test missions without an area are credited when named explicitly."""
+        anywhere = Mission.objects.create(
+            title='Hawks anywhere',
+            description='No area',
+            start_date='2024-11-01T00:00:00Z',
+            target_species='Accipiter cooperii',
+            points_reward=5
+        )
+        self.assertNotIn(anywhere, matching_missions(self.record))
+        
+        response = self.client.post(
+            '/api/v1/citizen/observations/',
+            {'biodiversity_record': str(self.record.id), 'mission': str(anywhere.id)},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['mission'], anywhere.id)
+        self.assertEqual(
+            sorted(CitizenObservation.objects.filter(
+                biodiversity_record=self.record
+            ).values_list('mission__title', flat=True)),
+            ['Bay Area bioblitz', 'Bay Area hawks', 'Hawks anywhere']
+        )
+        participation = MissionParticipation.objects.get(user=self.user, mission=anywhere)
+        self.assertEqual((participation.observations_count, participation.points_earned), (1, 5))
+        
+        # The named mission must still be open to the record's species
+        crow = BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Corvus corax',
+            location=Point(2.3522, 48.8566, srid=4326),
+            observation_date='2024-12-01T10:00:00Z'
+        )
+        response = self.client.post(
+            '/api/v1/citizen/observations/',
+            {'biodiversity_record': str(crow.id), 'mission': str(anywhere.id)},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_assign_missions_backfill(self):
+        """Test the backfill credits unassigned observations in one pass."""
+        observation = CitizenObservation.objects.create(biodiversity_record=self.record, user=self.user)
+        
+        out = StringIO()
+        call_command('assign_missions', stdout=out)
+        self.assertIn('Credited 2 observations to 2 missions', out.getvalue())
+        
+        observation.refresh_from_db()
+        self.assertEqual((observation.mission, observation.points_awarded), (self.hawks, 50))
+        self.assertTrue(CitizenObservation.objects.filter(
+            biodiversity_record=self.record, mission=self.bioblitz, points_awarded=10
+        ).exists())
+        participation = MissionParticipation.objects.get(user=self.user, mission=self.hawks)
+        self.assertEqual((participation.observations_count, participation.points_earned), (1, 50))
+        self.bioblitz.refresh_from_db()
+        self.assertEqual((self.bioblitz.observations_count, self.bioblitz.participants_count), (1, 1))
+        
+        # Nothing is credited twice
+        out = StringIO()
+        call_command('assign_missions', stdout=out)
+        self.assertIn('Credited 0 observations to 0 missions', out.getvalue())
+    
+    def test_detect_duplicates_rescores_missions(self):
+        """Test records regrouped as near-duplicates lose their mission points."""
+        resubmitted = BiodiversityRecord.objects.create(
+            contributor=self.user,
+            species_name='Accipiter cooperii',
+            location=Point(-122.4194, 37.7749, srid=4326),
+            observation_date='2024-12-01T10:10:00Z',
+            is_public=True
+        )
+        # Stored before duplicate detection existed
+        BiodiversityRecord.objects.filter(pk=resubmitted.pk).update(duplicate_of=None)
+        response = self.client.post(
+            '/api/v1/citizen/observations/', {'biodiversity_record': str(resubmitted.id)}, format='json'
+        )
+        self.assertEqual(response.data['points_awarded'], 50)
+        
+        call_command('detect_duplicates', stdout=StringIO())
+        
+        self.assertEqual(
+            set(CitizenObservation.objects.filter(
+                biodiversity_record=resubmitted
+            ).values_list('points_awarded', flat=True)),
+            {0}
+        )
+        participation = MissionParticipation.objects.get(user=self.user, mission=self.hawks)
+        self.assertEqual((participation.observations_count, participation.points_earned), (0, 0))
+        self.hawks.refresh_from_db()
+        self.assertEqual(self.hawks.observations_count, 0)
+    
+    def test_assign_missions_backfill_skips_duplicate_participation(self):
+        """Test observers of near-duplicates only are not made participants."""
+        other = User.objects.create_user(
+            username='second',
+            email='second@example.com',
+            password='testpass123'
+        )
+        duplicate = BiodiversityRecord.objects.create(
+            contributor=other,
+            species_name='Accipiter cooperii',
+            location=Point(-122.4194, 37.7749, srid=4326),
+            observation_date='2024-12-01T10:00:00Z',
+            duplicate_of=self.record
+        )
+        CitizenObservation.objects.create(biodiversity_record=duplicate, user=other)
+        
+        call_command('assign_missions', stdout=StringIO())
+        
+        self.assertEqual(
+            CitizenObservation.objects.filter(biodiversity_record=duplicate, points_awarded=0).count(), 2
+        )
+        self.assertFalse(MissionParticipation.objects.filter(user=other).exists())
+        self.hawks.refresh_from_db()
+        self.assertEqual((self.hawks.observations_count, self.hawks.participants_count), (0, 0))
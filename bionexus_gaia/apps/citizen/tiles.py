@@ -0,0 +1,204 @@
+"""
+Mapbox Vector Tiles for public biodiversity records, with a filesystem cache.
+
+Tiles are rendered by PostGIS (``ST_AsMVT``) and written to
+``TILE_CACHE_ROOT/{z}/{x}/{y}.mvt``. A tile holds at most
+``TILE_FEATURE_LIMIT`` records, the most recently observed first; when more
+fall into it, every feature has ``truncated`` set so clients can switch to
+the clustered map. When a record change commits, every cached tile whose
+buffered extent contains its location is removed.
+"""
+import math
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.db import connection
+
+from bionexus_gaia.apps.biodiversity.models import BiodiversityRecord
+
+TILE_CONTENT_TYPE = 'application/vnd.mapbox-vector-tile'
+TILE_LAYER_NAME = 'records'
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+MAX_TILE_ZOOM = 22
+
+# Web Mercator cannot represent the poles
+MAX_MERCATOR_LATITUDE = 85.0511287798066
+
+# Half the width of the Web Mercator world, in metres
+MERCATOR_BOUND = 20037508.342789244
+
+# The buffered envelope is clamped to the world before it is turned into a
+# longitude/latitude box: past +/-180 degrees it would wrap around. Records
+# are matched with that planar box against the geometry index on location.
+# One row past the feature limit is fetched to tell whether the tile is full.
+TILE_SQL = """
+    WITH bounds AS (
+        SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS geom
+    ),
+    search AS (
+        SELECT ST_Transform(ST_MakeEnvelope(
+            greatest(ST_XMin(buffered.geom), -%(world)s), greatest(ST_YMin(buffered.geom), -%(world)s),
+            least(ST_XMax(buffered.geom), %(world)s), least(ST_YMax(buffered.geom), %(world)s),
+            3857
+        ), 4326) AS geom
+        FROM (SELECT ST_Expand(bounds.geom, %(margin)s) AS geom FROM bounds) AS buffered
+    ),
+    features AS (
+        SELECT
+            record.id, record.location, record.species_name, record.common_name,
+            record.is_verified, record.observation_date
+        FROM {table} AS record, search
+        WHERE record.is_public
+          AND record.location::geometry(Geometry, 4326) && search.geom
+        ORDER BY record.observation_date DESC, record.id
+        LIMIT %(limit)s + 1
+    ),
+    kept AS (
+        SELECT * FROM features ORDER BY observation_date DESC, id LIMIT %(limit)s
+    )
+    SELECT ST_AsMVT(tile.*, %(layer)s, %(extent)s, 'geom')
+    FROM (
+        SELECT
+            ST_AsMVTGeom(
+                ST_Transform(kept.location::geometry, 3857),
+                bounds.geom, %(extent)s, %(buffer)s, true
+            ) AS geom,
+            kept.id::text AS id,
+            kept.species_name,
+            kept.common_name,
+            kept.is_verified,
+            to_char(
+                kept.observation_date AT TIME ZONE 'UTC',
+                'YYYY-MM-DD"T"HH24:MI:SS"Z"'
+            ) AS observation_date,
+            (SELECT count(*) FROM features) > %(limit)s AS truncated
+        FROM kept, bounds
+    ) AS tile
+"""
+
+
+def tile_cache_root():
+    return getattr(settings, 'TILE_CACHE_ROOT', os.path.join(settings.BASE_DIR, 'tile_cache'))
+
+
+def tile_cache_max_zoom():
+    return getattr(settings, 'TILE_CACHE_MAX_ZOOM', 16)
+
+
+def tile_feature_limit():
+    return getattr(settings, 'TILE_FEATURE_LIMIT', 50000)
+
+
+def is_valid_tile(z, x, y):
+    return 0 <= z <= MAX_TILE_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def tile_path(z, x, y):
+    return os.path.join(tile_cache_root(), str(z), str(x), f'{y}.mvt')
+
+
+def render_tile(z, x, y):
+    """
+    Render one tile of public records with PostGIS and return its bytes.
+    """
+    # Size of the buffer in EPSG:3857 metres at this zoom
+    tile_size = 2 * math.pi * 6378137 / 2 ** z
+    params = {
+        'z': z,
+        'x': x,
+        'y': y,
+        'extent': TILE_EXTENT,
+        'buffer': TILE_BUFFER,
+        'margin': tile_size * TILE_BUFFER / TILE_EXTENT,
+        'world': MERCATOR_BOUND,
+        'limit': tile_feature_limit(),
+        'layer': TILE_LAYER_NAME,
+    }
+    sql = TILE_SQL.format(table=connection.ops.quote_name(BiodiversityRecord._meta.db_table))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    return bytes(row[0]) if row and row[0] else b''
+
+
+def get_tile(z, x, y):
+    """
+    Return tile bytes, serving from and populating the filesystem cache.
+    """
+    if z > tile_cache_max_zoom():
+        return render_tile(z, x, y)
+
+    path = tile_path(z, x, y)
+    try:
+        with open(path, 'rb') as cached:
+            return cached.read()
+    except FileNotFoundError:
+        pass
+
+    data = render_tile(z, x, y)
+    _write_atomic(path, data)
+    return data
+
+
+def _write_atomic(path, data):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def tiles_containing(longitude, latitude, z):
+    """
+    Return the (x, y) tiles at zoom ``z`` whose buffered extent contains the point.
+    """
+    latitude = max(-MAX_MERCATOR_LATITUDE, min(MAX_MERCATOR_LATITUDE, latitude))
+    n = 2 ** z
+    fx = (longitude + 180.0) / 360.0 * n
+    lat_rad = math.radians(latitude)
+    fy = (1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n
+
+    # A feature is drawn in a neighbour's tile when it falls inside its buffer
+    margin = TILE_BUFFER / TILE_EXTENT
+    xs = {min(n - 1, max(0, int(math.floor(fx + offset)))) for offset in (-margin, 0, margin)}
+    ys = {min(n - 1, max(0, int(math.floor(fy + offset)))) for offset in (-margin, 0, margin)}
+    return [(x, y) for x in xs for y in ys]
+
+
+def invalidate_point(longitude, latitude):
+    """
+    Remove every cached tile that a feature at this location is drawn in.
+    """
+    invalidate_points([(longitude, latitude)])
+
+
+def invalidate_points(points):
+    """
+    Remove every cached tile that a feature at any of ``points`` is drawn in,
+    touching each tile once however many points fall in it.
+    """
+    tiles = set()
+    for longitude, latitude in points:
+        for z in range(tile_cache_max_zoom() + 1):
+            tiles.update((z, x, y) for x, y in tiles_containing(longitude, latitude, z))
+    for z, x, y in tiles:
+        try:
+            os.unlink(tile_path(z, x, y))
+        except FileNotFoundError:
+            pass
+
+
+def clear_tile_cache():
+    """
+    Remove every cached tile, after changes too large to invalidate point by point.
+    """
+    shutil.rmtree(tile_cache_root(), ignore_errors=True)
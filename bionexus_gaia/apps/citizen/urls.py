@@ -4,7 +4,8 @@ from .views import (
     MissionViewSet,
     CitizenObservationViewSet,
     LeaderboardView,
-    BiodiversityMapView
+    BiodiversityMapView,
+    BiodiversityTileView
 )
 
 router = DefaultRouter()
@@ -15,4 +16,5 @@ urlpatterns = [
     path('', include(router.urls)),
     path('leaderboard/', LeaderboardView.as_view(), name='leaderboard'),
     path('map/', BiodiversityMapView.as_view(), name='biodiversity-map'),
+    path('map/tiles/<int:z>/<int:x>/<int:y>.mvt', BiodiversityTileView.as_view(), name='biodiversity-map-tile'),
 ]
\ No newline at end of file
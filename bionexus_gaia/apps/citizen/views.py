@@ -1,13 +1,19 @@
 from django.utils import timezone
 from django.db.models import Sum, Count, F, Q
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
-from rest_framework import viewsets, generics, status, filters
+from django.http import HttpResponse
+from django.core.files.storage import default_storage
+from rest_framework import serializers, viewsets, generics, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema
+from drf_spectacular.types import OpenApiTypes
 
 from .models import Mission, MissionParticipation, CitizenObservation
 from .serializers import (
@@ -17,8 +23,15 @@ from .serializers import (
     LeaderboardEntrySerializer,
     MapDataSerializer
 )
+from .tiles import TILE_CONTENT_TYPE, get_tile, is_valid_tile
+from .clustering import MAX_CLUSTER_ZOOM, cell_size, get_clusters
+from bionexus_gaia.conditional import make_etag, queryset_version, respond_conditionally
+from bionexus_gaia.pagination import KeysetPagination
 from bionexus_gaia.apps.biodiversity.models import BiodiversityRecord
 from bionexus_gaia.apps.biodiversity.serializers import BiodiversityRecordSerializer
+from bionexus_gaia.apps.biodiversity.fastpath import coordinate_annotations
+from bionexus_gaia.apps.biodiversity.renderers import FastJSONRenderer
+from bionexus_gaia.apps.biodiversity.storage import media_storage
 
 User = get_user_model()
 
@@ -122,10 +135,11 @@ class LeaderboardView(generics.ListAPIView):
         # Check for swagger schema generation
         if getattr(self, 'swagger_fake_view', False):
             return []
-        # Calculate total points per user
+        # Calculate total points per user; near-duplicate observations don't count
+        canonical = Q(biodiversity_record__duplicate_of__isnull=True)
         users_data = CitizenObservation.objects.values('user').annotate(
-            total_points=Sum('points_awarded'),
-            observations_count=Count('id')
+            total_points=Coalesce(Sum('points_awarded', filter=canonical), 0),
+            observations_count=Count('id', filter=canonical)
         ).order_by('-total_points')
         
         # Get missions completed count
@@ -170,11 +184,70 @@ class LeaderboardView(generics.ListAPIView):
 class BiodiversityMapView(generics.ListAPIView):
     """
     API endpoint for the interactive biodiversity map.
+    
+    Pass ``bbox=west,south,east,north`` and ``zoom`` to get server-side
+    clusters for that viewport instead of individual records. Both forms
+    support conditional GET, versioned by the public records' count and
+    latest ``updated_at``.
     """
     serializer_class = MapDataSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     queryset = BiodiversityRecord.objects.none()  # Fix for schema generation
     
+    def list(self, request, *args, **kwargs):
+        """
+        Answer 304 if the public map data is unchanged, otherwise build it.
+        """
+        count, latest = queryset_version(
+            BiodiversityRecord.objects.filter(is_public=True, location__isnull=False)
+        )
+        return respond_conditionally(
+            request,
+            make_etag(request, count, latest),
+            latest,
+            lambda: self.map_response(request, *args, **kwargs)
+        )
+    
+    def map_response(self, request, *args, **kwargs):
+        """
+        Return clusters when a bounding box and zoom are given, records otherwise.
+        """
+        if 'bbox' not in request.query_params and 'zoom' not in request.query_params:
+            # Rows are built ready to render, so skip MapDataSerializer
+            rows = self.filter_queryset(self.get_queryset())
+            page = self.paginate_queryset(rows)
+            if page is not None:
+                return self.get_paginated_response(page)
+            return Response(rows)
+        
+        try:
+            bbox = [float(value) for value in request.query_params.get('bbox', '').split(',')]
+            zoom = int(request.query_params.get('zoom', ''))
+        except ValueError:
+            bbox, zoom = [], None
+        
+        if (
+            len(bbox) != 4
+            or zoom is None
+            or not 0 <= zoom <= MAX_CLUSTER_ZOOM
+            or not (-180 <= bbox[0] <= 180 and -180 <= bbox[2] <= 180)
+            or not -90 <= bbox[1] <= bbox[3] <= 90
+        ):
+            return Response(
+                {"detail": "bbox must be 'west,south,east,north' in degrees and zoom an integer "
+                           f"between 0 and {MAX_CLUSTER_ZOOM}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        clusters = get_clusters(bbox, zoom)
+        return Response({
+            'zoom': zoom,
+            'cell_size': cell_size(zoom),
+            'count': len(clusters),
+            'clusters': clusters
+        })
+    
     def get_queryset(self):
         """
         Get biodiversity records for map display.
@@ -183,34 +256,68 @@ class BiodiversityMapView(generics.ListAPIView):
         if getattr(self, 'swagger_fake_view', False):
             return []
             
-        # Query public biodiversity records with location data
+        # Public records with coordinates computed in SQL instead of GEOS points
         records = BiodiversityRecord.objects.filter(
             is_public=True,
             location__isnull=False
-        ).select_related('contributor')
+        ).annotate(**coordinate_annotations()).values_list(
+            'id', 'species_name', 'common_name', 'location_y', 'location_x',
+            'observation_date', 'image', 'renditions', 'contributor__username',
+            'is_verified'
+        )
         
         # Limit to 1000 records for performance
         records = records[:1000]
         
-        # Format for map display
+        # Format for map display, already in MapDataSerializer's representation
+        date = serializers.DateTimeField().to_representation
         map_data = []
-        for record in records:
-            if record.location:
-                map_data.append({
-                    'id': record.id,
-                    'species_name': record.species_name,
-                    'common_name': record.common_name,
-                    'latitude': record.location.y,
-                    'longitude': record.location.x,
-                    'observation_date': record.observation_date,
-                    'image_url': record.image.url if record.image else None,
-                    'contributor_username': record.contributor.username,
-                    'is_verified': record.is_verified
-                })
+        for (record_id, species_name, common_name, latitude, longitude, observation_date,
+             image, renditions, contributor_username, is_verified) in records:
+            renditions = renditions or {}
+            map_data.append({
+                'id': str(record_id),
+                'species_name': species_name,
+                'common_name': common_name,
+                'latitude': latitude,
+                'longitude': longitude,
+                'observation_date': date(observation_date),
+                'image_url': media_storage.url(image) if image else None,
+                'thumbnail_url': default_storage.url(renditions['thumbnail']) if renditions.get('thumbnail') else None,
+                'webp_url': default_storage.url(renditions['webp']) if renditions.get('webp') else None,
+                'contributor_username': contributor_username,
+                'is_verified': is_verified
+            })
         
         return map_data
 
 
+class BiodiversityTileView(APIView):
+    """
+    API endpoint serving public biodiversity records as Mapbox Vector Tiles.
+    
+    Each feature in the ``records`` layer carries ``id``, ``species_name``,
+    ``common_name``, ``is_verified`` and ``observation_date`` attributes.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    
+    @extend_schema(
+        tags=['Citizen Science'],
+        summary='Get a vector tile of biodiversity records',
+        responses={(200, TILE_CONTENT_TYPE): OpenApiTypes.BINARY}
+    )
+    def get(self, request, z, x, y):
+        if not is_valid_tile(z, x, y):
+            return Response(
+                {"detail": "Tile coordinates are out of range."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        response = HttpResponse(get_tile(z, x, y), content_type=TILE_CONTENT_TYPE)
+        response['Cache-Control'] = 'public, max-age=60'
+        return response
+
+
 class CitizenObservationViewSet(viewsets.ModelViewSet):
     """
     API endpoint for citizen science observations.
@@ -218,6 +325,8 @@ class CitizenObservationViewSet(viewsets.ModelViewSet):
     queryset = CitizenObservation.objects.all()
     serializer_class = CitizenObservationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
         """
@@ -6,6 +6,7 @@ from rest_framework.permissions import IsAuthenticated
 from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample
 from django.contrib.auth import get_user_model
 
+from bionexus_gaia.conditional import make_etag, payload_digest, respond_conditionally
 from ..users.models import UserActivity, Project, Notification, Reward
 # Temporarily disabled due to GDAL/GEOS dependency
 # from ..biodiversity.models import BiodiversityRecord
@@ -51,6 +52,10 @@ User = get_user_model()
 def dashboard_overview(request):
     """
     Get dashboard overview data for the authenticated user.
+    
+    The overview mixes several tables without a shared version, so its ETag
+    is a digest of the assembled data: a matching poll skips rendering and
+    transfer, though not the queries.
     """
     user = request.user
     
@@ -97,7 +102,7 @@ def dashboard_overview(request):
     # Suggested actions (based on user role and activity)
     suggested_actions = _get_suggested_actions(user)
     
-    return Response({
+    payload = {
         'user_stats': user_stats,
         'recent_activities': [
             {
@@ -131,7 +136,11 @@ def dashboard_overview(request):
             for reward in recent_rewards
         ],
         'suggested_actions': suggested_actions
-    })
+    }
+    
+    return respond_conditionally(
+        request, make_etag(request, payload_digest(payload)), None, lambda: Response(payload)
+    )
 
 
 def _calculate_user_level(total_points):
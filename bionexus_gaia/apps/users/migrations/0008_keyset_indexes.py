@@ -0,0 +1,21 @@
+# Generated by Django 4.2.11 on 2026-10-17 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_add_sections_to_terms'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='users_notif_user_id_fc8d65_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useractivity',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='users_usera_user_id_6b6ec3_idx'),
+        ),
+    ]
@@ -115,6 +115,9 @@ class UserActivity(models.Model):
         ordering = ['-created_at']
         verbose_name = _('user activity')
         verbose_name_plural = _('user activities')
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.activity_type} on {self.created_at.date()}"
@@ -147,6 +150,9 @@ class Notification(models.Model):
         ordering = ['-created_at']
         verbose_name = _('notification')
         verbose_name_plural = _('notifications')
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.title}"
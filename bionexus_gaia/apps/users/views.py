@@ -36,6 +36,7 @@ from .serializers import (
 )
 from .models import UserActivity, Notification, Project, ProjectParticipation, Reward, EmailVerification, PasswordResetToken, TermsAndConditions, UserTermsAcceptance
 from django.utils import timezone
+from bionexus_gaia.pagination import KeysetPagination
 # Temporarily disabled due to GDAL/GEOS dependency
 # from bionexus_gaia.apps.biodiversity.models import BiodiversityRecord
 # from bionexus_gaia.apps.citizen.models import MissionParticipation, CitizenObservation
@@ -200,6 +201,8 @@ class UserActivityViewSet(viewsets.ReadOnlyModelViewSet):
     """
     serializer_class = UserActivitySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
         """
@@ -476,6 +479,8 @@ class NotificationViewSet(viewsets.ModelViewSet):
     """
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
         """
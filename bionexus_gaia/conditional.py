@@ -0,0 +1,102 @@
+"""
+Conditional GET support shared across the API.
+
+Read endpoints derive validators for the data behind a response from cheap
+aggregates, such as ``MAX(updated_at)`` with a row count or a summary table's
+version, and compare them with ``If-None-Match`` / ``If-Modified-Since``
+before the full query runs and anything is serialized. A client whose copy is
+current gets an empty 304 instead of the whole payload.
+
+ETags are weak: they identify the data a response was built from, not its
+exact bytes, and they also cover the request URL, the user and the negotiated
+media type. The row count in the version catches deletions, which do not move
+``MAX(updated_at)``; clients sending only ``If-Modified-Since`` can miss them
+until the next change, so ETags are preferred when both are sent.
+"""
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def make_etag(request, *parts):
+    """
+    Return a weak ETag for ``parts`` as seen by this request.
+    """
+    user = getattr(request, 'user', None)
+    key = [
+        request.get_full_path(),
+        str(user.pk) if user is not None and user.is_authenticated else '',
+        getattr(request, 'accepted_media_type', ''),
+    ]
+    key.extend(parts)
+    digest = hashlib.sha256(
+        json.dumps(key, cls=DjangoJSONEncoder, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def payload_digest(payload):
+    """
+    Digest of an assembled payload, for responses with no cheaper version.
+    """
+    return hashlib.sha256(
+        json.dumps(payload, cls=DjangoJSONEncoder, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+
+
+def queryset_version(queryset, field='updated_at'):
+    """
+    Return ``(count, latest)`` for ``queryset`` from a single aggregate query.
+    """
+    stats = queryset.order_by().aggregate(count=Count('pk'), latest=Max(field))
+    return stats['count'], stats['latest']
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Cacheable, but always revalidated and never stored by shared caches
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def respond_conditionally(request, etag, last_modified, build_response):
+    """
+    Return 304 if the client's validators match, otherwise ``build_response()``.
+
+    Validators are attached to successful responses either way.
+    """
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified is not None else None,
+    )
+    if response is None:
+        response = build_response()
+    if response.status_code in (200, 304):
+        set_validators(response, etag, last_modified)
+    return response
+
+
+class ConditionalListMixin:
+    """
+    Viewset mixin answering ``list`` with 304 when the filtered queryset has
+    not changed since the client's copy.
+    """
+    conditional_version_field = 'updated_at'
+
+    def list(self, request, *args, **kwargs):
+        count, latest = queryset_version(
+            self.filter_queryset(self.get_queryset()), self.conditional_version_field
+        )
+        return respond_conditionally(
+            request,
+            make_etag(request, count, latest),
+            latest,
+            lambda: super(ConditionalListMixin, self).list(request, *args, **kwargs),
+        )
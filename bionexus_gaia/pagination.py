@@ -0,0 +1,161 @@
+"""
+Pagination classes shared across the API.
+"""
+import base64
+import binascii
+import json
+import uuid
+from datetime import date, datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination with an opt-in keyset (cursor) mode.
+
+    Requests without a ``cursor`` parameter are paginated by page number as
+    before. Passing ``cursor`` (empty for the first page) switches to keyset
+    pagination on the view's ``keyset_ordering``, e.g.
+    ``('-observation_date', '-id')``: each page seeks past the last row of the
+    previous one instead of using OFFSET, and no COUNT(*) is run, so every page
+    costs the same as the first. The ordering must end in a unique field.
+
+    A cursor cannot be combined with any other ordering, such as
+    ``?ordering=`` or search relevance; such requests are rejected with a 400
+    rather than silently re-sorted.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    conflicting_ordering_message = 'A cursor cannot be combined with this ordering; use page numbers instead.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_ordering = getattr(view, 'keyset_ordering', None)
+        if self.cursor_query_param not in request.query_params or not self.keyset_ordering:
+            self.keyset_ordering = None
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.display_page_controls = False
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        if not self._follows_keyset(queryset):
+            raise ValidationError({self.cursor_query_param: [self.conflicting_ordering_message]})
+        queryset = queryset.order_by(*self.keyset_ordering)
+        encoded = request.query_params[self.cursor_query_param]
+        if encoded:
+            queryset = queryset.filter(self._seek_condition(queryset.model, self.decode_cursor(encoded)))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = self._position(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_paginated_response(self, data):
+        if self.keyset_ordering is None:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['next']['description'] = (
+            'Next page link; carries a cursor when keyset pagination is requested.'
+        )
+        return response_schema
+
+    def get_next_link(self):
+        if self.keyset_ordering is None:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        if getattr(view, 'keyset_ordering', None):
+            parameters.append({
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Keyset cursor; pass an empty value for the first page.',
+                'schema': {'type': 'string'},
+            })
+        return parameters
+
+    def _follows_keyset(self, queryset):
+        """
+        Whether the ordering already applied is a prefix of the keyset ordering.
+        """
+        ordering = list(queryset.query.order_by)
+        return all(isinstance(field, str) for field in ordering) and (
+            ordering == list(self.keyset_ordering[:len(ordering)])
+        )
+
+    def _fields(self):
+        return [
+            (field.lstrip('-'), field.startswith('-'))
+            for field in self.keyset_ordering
+        ]
+
+    def _position(self, row):
+        return [getattr(row, name) for name, _ in self._fields()]
+
+    def _seek_condition(self, model, position):
+        """
+        Build ``(a, b, ...) > (x, y, ...)`` respecting each field's direction.
+
+        The leading bound on the first field is redundant but lets the database
+        start the index scan at the cursor instead of filtering from the top.
+        """
+        fields = self._fields()
+        if len(position) != len(fields):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            values = [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(fields, position)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+        first_name, first_descending = fields[0]
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(fields, values):
+            condition |= equal & Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+            equal &= Q(**{name: value})
+        bound = Q(**{f"{first_name}__{'lte' if first_descending else 'gte'}": values[0]})
+        return bound & condition
+
+    def encode_cursor(self, position):
+        payload = json.dumps([self._encode_value(value) for value in position])
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, encoded):
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    @staticmethod
+    def _encode_value(value):
+        # Full precision; DjangoJSONEncoder would truncate microseconds
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        return value
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.gis',
+    'django.contrib.postgres',
     
     # Third-party apps
     'rest_framework',
@@ -185,6 +186,48 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
 
+# Vector tile cache for the biodiversity map
+TILE_CACHE_ROOT = os.getenv('TILE_CACHE_ROOT', os.path.join(BASE_DIR, 'tile_cache'))
+TILE_CACHE_MAX_ZOOM = int(os.getenv('TILE_CACHE_MAX_ZOOM', 16))
+TILE_FEATURE_LIMIT = int(os.getenv('TILE_FEATURE_LIMIT', 50000))
+
+# Zoom levels up to this one serve map clusters from precomputed counts
+CLUSTER_PRECOMPUTED_MAX_ZOOM = int(os.getenv('CLUSTER_PRECOMPUTED_MAX_ZOOM', 8))
+
+# Largest file accepted by the resumable media upload API, in bytes
+RESUMABLE_UPLOAD_MAX_SIZE = int(os.getenv('RESUMABLE_UPLOAD_MAX_SIZE', 2 * 1024 ** 3))
+
+# Ledger used to anchor Merkle roots of validated records, and the most
+# records anchored under a single root
+ANCHOR_BACKEND = os.getenv('ANCHOR_BACKEND', 'bionexus_gaia.apps.biodiversity.anchoring.LocalChainBackend')
+ANCHOR_BATCH_SIZE = int(os.getenv('ANCHOR_BATCH_SIZE', 4096))
+
+# Seconds after which a batch claimed by a worker that died before writing it
+# to the ledger is taken over by another
+ANCHOR_CLAIM_TIMEOUT = int(os.getenv('ANCHOR_CLAIM_TIMEOUT', 300))
+
+# Seconds after which a validation job left running by a dead worker is retried
+VALIDATION_JOB_TIMEOUT = int(os.getenv('VALIDATION_JOB_TIMEOUT', 300))
+
+# Width and height in degrees of the observation rollup grid cells
+ROLLUP_GRID_DEGREES = float(os.getenv('ROLLUP_GRID_DEGREES', 1.0))
+
+# Observation heatmaps: cell size in degrees at level 0 (halved at each
+# further level), number of levels, and how old records must be before an
+# incremental refresh bins them
+HEATMAP_BASE_DEGREES = float(os.getenv('HEATMAP_BASE_DEGREES', 1.0))
+HEATMAP_LEVELS = int(os.getenv('HEATMAP_LEVELS', 4))
+HEATMAP_SETTLE_SECONDS = int(os.getenv('HEATMAP_SETTLE_SECONDS', 60))
+
+# Records of the same species observed this close in space and time, by the
+# same contributor or with the same media, are treated as duplicates
+DEDUP_DISTANCE_METRES = float(os.getenv('DEDUP_DISTANCE_METRES', 50))
+DEDUP_WINDOW_MINUTES = int(os.getenv('DEDUP_WINDOW_MINUTES', 30))
+
+# Dataset metadata written to the eml.xml of Darwin Core Archive exports
+DWCA_DATASET_TITLE = os.getenv('DWCA_DATASET_TITLE', 'BioNexus Gaia biodiversity observations')
+DWCA_PUBLISHER = os.getenv('DWCA_PUBLISHER', 'BioNexus Gaia')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 